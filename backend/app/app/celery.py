@@ -40,5 +40,9 @@ app.autodiscover_tasks(
         "apptasks.tasks.discord",
         "apptasks.tasks.snappy",
         "apptasks.tasks.bh_chaser",
+        "apptasks.tasks.scale_teams",
+        "apptasks.tasks.correction_points",
+        "apptasks.tasks.project_catalog",
+        "apptasks.tasks.snapshot_archive",
     ]
 )
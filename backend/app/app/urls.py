@@ -20,10 +20,11 @@ from django.urls import path
 from ninja import NinjaAPI
 
 from appaccount.api import router as account_router
+from appcore.services.renderers import ORJSONParser, ORJSONRenderer
 from appdata.api import router as data_router
 from apptasks.api import router as tasks_router
 
-api = NinjaAPI()
+api = NinjaAPI(renderer=ORJSONRenderer(), parser=ORJSONParser())
 api.add_router("/account", account_router)
 api.add_router("/data", data_router)
 api.add_router("/apptasks", tasks_router)
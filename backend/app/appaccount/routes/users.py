@@ -1,4 +1,5 @@
 from appaccount.serializers.users import MeGetOut, MePatchIn, MePatchOut
+from appaccount.services.auths import AsyncBearerTokenAuth
 from ninja import Router
 
 router = Router(tags=["user", "account"])
@@ -7,14 +8,15 @@ router = Router(tags=["user", "account"])
 @router.get(
     "/me/",
     response={200: MeGetOut},
+    auth=AsyncBearerTokenAuth(),
 )
-def get_me(request):
+async def get_me(request):
     """
     Get current user profile
     """
     user = request.auth.user
 
-    return {**user.userprofile.__dict__, "username": user.username}
+    return {**user.profile.__dict__, "username": user.username}
 
 
 @router.patch(
@@ -36,7 +38,7 @@ def patch_me(request, payload: MePatchIn):
 
     user.userprofile.save()
 
-    return {**user.userprofile.__dict__, "username": user.username}
+    return {**user.profile.__dict__, "username": user.username}
 
 
 @router.delete(
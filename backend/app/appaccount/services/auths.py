@@ -102,3 +102,29 @@ class BearerTokenAuth(HttpBearer):
             return None
 
         return session
+
+
+class AsyncBearerTokenAuth(HttpBearer):
+    """Authenthicate using user's access_token, without a thread on async routes."""
+
+    async def authenticate(self, request, token) -> Session | None:
+        """This is a function to authenticate the token.
+
+        Args:
+            request (HttpRequest): request object
+            token (str): token
+
+        Returns:
+            Session: session object, with its user and profile loaded
+        """
+        session: Session | None = (
+            await Session.objects.select_related("user__profile")
+            .filter(access_token=token)
+            .afirst()
+        )
+        if session is None:
+            return None
+        if session.is_expired():
+            return None
+
+        return session
@@ -1,11 +1,11 @@
 from django.test import TestCase
-from ninja.testing import TestClient
-from unittest.mock import patch, MagicMock
-from appaccount.models.accounts import User
+from ninja.testing import TestAsyncClient, TestClient
+from unittest.mock import patch, AsyncMock, MagicMock
+from appaccount.models.accounts import Profile, User
 from appaccount.models.auths import Session
 from appaccount.api import router
 from appcore.services.auths import ServiceBearerTokenAuth
-from appaccount.services.auths import BearerTokenAuth
+from appaccount.services.auths import AsyncBearerTokenAuth, BearerTokenAuth
 
 
 class AuthAPITest(TestCase):
@@ -117,11 +117,13 @@ class UserAPITest(TestCase):
         # Set userprofile attribute on user
         self.user.userprofile = self.profile
     
-    def test_get_user_info_authenticated(self):
+    async def test_get_user_info_authenticated(self):
         """Test getting user info when authenticated."""
         # Mock auth to return the session
-        with patch.object(BearerTokenAuth, '__call__', return_value=self.session):
-            response = self.client.get('/users/me/')
+        with patch.object(
+            AsyncBearerTokenAuth, '__call__', new_callable=AsyncMock, return_value=self.session
+        ):
+            response = await TestAsyncClient(router).get('/users/me/')
         
         self.assertEqual(response.status_code, 200)
         data = response.json()
@@ -189,4 +191,67 @@ class UserAPITest(TestCase):
         
         # Verify user and profile were deleted
         self.assertFalse(User.objects.filter(id=user_id).exists())
-        self.assertFalse(Profile.objects.filter(id=profile_id).exists())
\ No newline at end of file
+        self.assertFalse(Profile.objects.filter(id=profile_id).exists())
+
+
+class AsyncBearerTokenAuthTest(TestCase):
+    """Test cases for the async access_token authentication."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='asyncuser',
+            email='async@example.com',
+            password='testpass123'
+        )
+        self.session = Session.objects.create(user=self.user)
+
+    async def test_valid_token(self):
+        """Test that a valid token resolves its session and user."""
+        session = await AsyncBearerTokenAuth().authenticate(None, self.session.access_token)
+
+        self.assertEqual(session, self.session)
+        self.assertEqual(session.user.username, 'asyncuser')
+
+    async def test_unknown_token(self):
+        """Test that an unknown token is rejected."""
+        self.assertIsNone(await AsyncBearerTokenAuth().authenticate(None, 'unknown'))
+
+    async def test_expired_token(self):
+        """Test that an expired session is rejected."""
+        self.session.expires_in = -1
+        await self.session.asave()
+
+        self.assertIsNone(
+            await AsyncBearerTokenAuth().authenticate(None, self.session.access_token)
+        )
+
+    async def test_get_me_unknown_token(self):
+        """Test that the async me route authenticates through AsyncBearerTokenAuth."""
+        with patch.object(
+            AsyncBearerTokenAuth, 'authenticate', autospec=True,
+            side_effect=AsyncBearerTokenAuth.authenticate,
+        ) as mock_authenticate:
+            response = await self.async_client.get(
+                '/api/account/users/me/', headers={'Authorization': 'Bearer unknown'}
+            )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(mock_authenticate.call_args.args[2], 'unknown')
+
+    async def test_get_me(self):
+        """Test that the async me route returns the profile loaded with the session."""
+        await Profile.objects.filter(user=self.user).aupdate(
+            first_name='Async', last_name='User', gender='f'
+        )
+
+        response = await self.async_client.get(
+            '/api/account/users/me/',
+            headers={'Authorization': f'Bearer {self.session.access_token}'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['username'], 'asyncuser')
+        self.assertEqual(data['first_name'], 'Async')
+        self.assertEqual(data['last_name'], 'User')
+        self.assertEqual(data['gender'], 'f')
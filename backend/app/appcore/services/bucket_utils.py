@@ -1,6 +1,10 @@
 import os
 from uuid import uuid4
 
+from django.conf import settings
+from django.core.files.storage import Storage
+from django.utils.module_loading import import_string
+
 from appcore.services.utils import slugify
 
 
@@ -30,3 +34,12 @@ def gen_url(name: str):
     bucket = os.getenv("AWS_STORAGE_BUCKET_NAME")
 
     return f"{base}/{bucket}/{name}"
+
+
+def file_storage() -> Storage:
+    """storage configured by DEFAULT_FILE_STORAGE, S3 in deployments
+
+    Returns:
+        Storage: storage instance
+    """
+    return import_string(settings.DEFAULT_FILE_STORAGE)()
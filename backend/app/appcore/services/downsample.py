@@ -0,0 +1,46 @@
+"""
+Downsampling of chart series.
+"""
+
+
+def lttb(points: list[tuple], threshold: int) -> list[tuple]:
+    """
+    Largest-Triangle-Three-Buckets downsampling, keeps the visual shape of a series
+    with at most threshold points. First and last points are always kept.
+    Args:
+        points: (x, y) pairs sorted by x, x and y numbers, extra items are kept as is
+        threshold: the maximum number of points, at least 3
+    Returns:
+        list[tuple]: the selected points, in order
+    """
+    if threshold < 3:
+        raise ValueError("threshold must be at least 3")
+    if len(points) <= threshold:
+        return list(points)
+
+    ret = [points[0]]
+    # the points between the first and the last are split into threshold - 2 buckets
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        # average of the next bucket, or the last point for the last bucket
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        next_bucket = points[end:next_end] or points[-1:]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        ax, ay = points[a][0], points[a][1]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(
+                (ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay)
+            )
+            if area > best_area:
+                best, best_area = j, area
+        ret.append(points[best])
+        a = best
+    ret.append(points[-1])
+
+    return ret
@@ -0,0 +1,149 @@
+"""
+Adaptive (AIMD) concurrency control for intra requests.
+
+The number of requests allowed in flight grows additively (+1 per window of healthy
+responses) and shrinks multiplicatively on 429s, 5xx, transport errors and latency
+spikes, so sync throughput follows what the API can serve at the moment instead of
+fixed sleeps.
+
+The current window is published to the cache as a per-process metric under
+`intraapi:metrics:aimd-window:<host>:<pid>` and logged whenever it changes.
+
+Usage:
+    from appcore.services.intra.aimd import controller
+    with controller.slot():
+        r = client.get(...)
+    controller.record(r.status_code, latency)
+"""
+
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from appcore.services.console import console
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+    initial_window: starting number of requests in flight
+    min_window, max_window: bounds of the window
+    decrease_factor: window multiplier on congestion
+    latency_factor: a response slower than latency_factor * average latency is a spike
+    cooldown: seconds during which further congestion signals are ignored after a decrease
+    """
+
+    METRIC_TTL = 60 * 60
+
+    def __init__(
+        self,
+        initial_window: int = 2,
+        min_window: int = 1,
+        max_window: int = 16,
+        decrease_factor: float = 0.5,
+        latency_factor: float = 3.0,
+        cooldown: float = 1.0,
+    ):
+        self.min_window = min_window
+        self.max_window = max_window
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self._window = float(initial_window)
+        self._in_flight = 0
+        self._latency_avg: float | None = None
+        self._last_decrease = 0.0
+        self._published: int | None = None
+        self._cond = threading.Condition()
+
+    @property
+    def window(self) -> int:
+        """
+        The current number of requests allowed in flight.
+        """
+        return max(self.min_window, int(self._window))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @contextmanager
+    def slot(self):
+        """
+        Blocks until a request may be sent, and holds the slot for the duration of the block.
+        """
+        with self._cond:
+            while self._in_flight >= self.window:
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def _is_congested(self, status_code: int | None, latency: float) -> bool:
+        if status_code is None or status_code == 429 or status_code >= 500:
+            return True
+        if self._latency_avg is None:
+            return False
+
+        return latency > self.latency_factor * self._latency_avg
+
+    def record(self, status_code: int | None, latency: float) -> None:
+        """
+        Adjusts the window from the outcome of a request.
+        Args:
+            status_code: HTTP status, None for transport errors and timeouts
+            latency: seconds the request took
+        """
+        with self._cond:
+            if self._is_congested(status_code, latency):
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self._window = max(
+                        self.min_window, self._window * self.decrease_factor
+                    )
+                    self._last_decrease = now
+            else:
+                self._window = min(self.max_window, self._window + 1 / self._window)
+                if self._latency_avg is None:
+                    self._latency_avg = latency
+                else:
+                    self._latency_avg = 0.8 * self._latency_avg + 0.2 * latency
+            self._cond.notify_all()
+        self._publish()
+
+    def metrics(self) -> dict:
+        """
+        Returns the controller state.
+        """
+        return {
+            "window": self.window,
+            "in_flight": self.in_flight,
+            "latency_avg": self._latency_avg,
+        }
+
+    def _publish(self) -> None:
+        """
+        Publishes the window to the cache when it changes.
+        """
+        window = self.window
+        if window == self._published:
+            return
+        self._published = window
+        console.log(f"intra AIMD window: {window}")
+        key = f"intraapi:metrics:aimd-window:{socket.gethostname()}:{os.getpid()}"
+        try:
+            cache.set(key, window, self.METRIC_TTL)
+        except Exception:
+            # metrics must never fail a request
+            pass
+
+
+controller = AIMDController()
@@ -0,0 +1,155 @@
+"""
+Circuit breaker per intra endpoint pattern, shared across workers through the cache (Redis).
+
+closed: requests go through, 5xx and transport errors are counted
+open: after failure_threshold failures within failure_window seconds, requests to the
+    endpoint fail fast with CircuitOpenError for cooldown seconds
+half-open: once the cooldown is over a single probe request is let through,
+    success closes the circuit, failure opens it again
+
+Endpoints are keyed by path with user/project ids collapsed, cursus and campus ids kept,
+so one broken cursus listing does not block the others.
+    /v2/users/jdoe/correction_point_historics -> users/:id/correction_point_historics
+    /v2/cursus/3/users/ -> cursus/3/users
+"""
+
+from urllib.parse import urlparse
+
+from django.core.cache import cache
+
+from appcore.services.console import console
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# segments following these are resource ids
+ID_PARENTS = {"users", "pools", "projects", "projects_users", "scale_teams"}
+# segments following these identify a distinct listing and are kept
+KEPT_PARENTS = {"cursus", "campus"}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request to an endpoint whose circuit is open.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        super().__init__(f"Circuit open for intra endpoint {endpoint}")
+
+
+class CircuitBreaker:
+    """
+    failure_threshold: failures that open the circuit
+    failure_window: seconds over which failures are counted
+    cooldown: seconds the circuit stays open before a probe is allowed
+    probe_timeout: seconds before another probe may be tried if one never reports back
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        failure_window: int = 60,
+        cooldown: int = 300,
+        probe_timeout: int = 60,
+    ):
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+
+    @staticmethod
+    def endpoint(url: str) -> str:
+        """
+        Returns the endpoint pattern of an intra URL.
+        """
+        segments = [i for i in urlparse(url).path.split("/") if i]
+        if segments and segments[0] == "v2":
+            segments = segments[1:]
+        ret = []
+        for i, segment in enumerate(segments):
+            parent = segments[i - 1] if i > 0 else None
+            if parent in KEPT_PARENTS:
+                ret.append(segment)
+            elif parent in ID_PARENTS or segment.isdigit():
+                ret.append(":id")
+            else:
+                ret.append(segment)
+
+        return "/".join(ret)
+
+    @staticmethod
+    def _keys(endpoint: str) -> dict[str, str]:
+        base = f"intraapi:breaker:{endpoint}"
+        return {
+            "failures": f"{base}:failures",
+            "open": f"{base}:open",
+            "tripped": f"{base}:tripped",
+            "probe": f"{base}:probe",
+        }
+
+    def state(self, endpoint: str) -> str:
+        """
+        Returns the state of the endpoint's circuit.
+        """
+        keys = self._keys(endpoint)
+        values = cache.get_many([keys["open"], keys["tripped"]])
+        if keys["open"] in values:
+            return OPEN
+        if keys["tripped"] in values:
+            return HALF_OPEN
+
+        return CLOSED
+
+    def before_request(self, endpoint: str) -> str:
+        """
+        Checks that a request may be sent to the endpoint.
+        Returns:
+            str: the state the request is sent in
+        Raises:
+            CircuitOpenError: if the circuit is open, or half-open with a probe in flight
+        """
+        state = self.state(endpoint)
+        if state == OPEN:
+            raise CircuitOpenError(endpoint)
+        if state == HALF_OPEN and not cache.add(
+            self._keys(endpoint)["probe"], 1, self.probe_timeout
+        ):
+            raise CircuitOpenError(endpoint)
+
+        return state
+
+    def record(self, endpoint: str, success: bool, state: str = CLOSED) -> None:
+        """
+        Records the outcome of a request sent in the given state.
+        """
+        keys = self._keys(endpoint)
+        if success:
+            if state == HALF_OPEN:
+                cache.delete_many(list(keys.values()))
+                console.log(f"intra circuit closed: {endpoint}")
+            return
+
+        if state == HALF_OPEN:
+            self._open(endpoint)
+            return
+
+        cache.add(keys["failures"], 0, self.failure_window)
+        try:
+            failures = cache.incr(keys["failures"])
+        except ValueError:
+            # the window expired between add and incr
+            return
+        if failures >= self.failure_threshold:
+            self._open(endpoint)
+
+    def _open(self, endpoint: str) -> None:
+        keys = self._keys(endpoint)
+        cache.set(keys["open"], 1, self.cooldown)
+        cache.set(keys["tripped"], 1, None)
+        cache.delete_many([keys["failures"], keys["probe"]])
+        console.log(f"intra circuit opened for {self.cooldown}s: {endpoint}")
+
+
+breaker = CircuitBreaker()
@@ -1,27 +1,37 @@
-import threading
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from time import monotonic, sleep
 from urllib.parse import urlencode
 import httpx
 from appcore.services.env_manager import ENVS
 from django.core.cache import cache
 from pydantic import validate_call
 from appcore.services.console import console
+from appcore.services.intra.aimd import controller
+from appcore.services.intra.breaker import CircuitOpenError, breaker
+from appcore.services.intra.lanes import Lane, scheduler
 from rich.progress import track
 
 
 class Intra:
     """
     Wraps the 42 Intra API.
+    Requests share the application rate limit through priority lanes:
+    ad-hoc calls use Lane.NORMAL, syncs use Lane.BULK and yield to them.
     """
 
     BASE = "https://api.intra.42.fr/v2"
 
-    def __init__(self):
+    __slots__ = ("timeout", "lane")
+
+    def __init__(self, lane: Lane = Lane.NORMAL):
         """
         Initializes the Intra API.
         defaults timeout to 30 because, well, you know :*(
+        Args:
+            lane (Lane, optional): priority of this client's requests. Defaults to Lane.NORMAL.
         """
         self.timeout = 30
+        self.lane = lane
 
     @property
     def access_token(self) -> str:
@@ -59,6 +69,56 @@ class Intra:
 
         return r.json()["access_token"]
 
+    def request(
+        self,
+        method: str,
+        url: str,
+        client: httpx.Client | None = None,
+        endpoint: str | None = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Sends an authenticated request once the lane scheduler, then the AIMD controller grant a slot.
+        The outcome is fed back to the AIMD controller and the endpoint's circuit breaker.
+
+        Args:
+            method (str): HTTP method
+            url (str): full URL
+            client (httpx.Client, optional): client to reuse. Defaults to a new client.
+            endpoint (str, optional): circuit breaker key. Defaults to the URL's endpoint pattern.
+            **kwargs: passed to httpx
+
+        Returns:
+            httpx.Response: the response, status is not checked
+
+        Raises:
+            CircuitOpenError: if the endpoint's circuit is open
+        """
+        endpoint = endpoint or breaker.endpoint(url)
+        state = breaker.before_request(endpoint)
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        headers.update(kwargs.pop("headers", {}))
+        kwargs.setdefault("timeout", self.timeout)
+        # the lane is waited on first so a bulk request queued behind the rate limit
+        # does not hold an AIMD slot that a higher lane could use
+        scheduler.acquire(self.lane)
+        with controller.slot():
+            start = monotonic()
+            try:
+                if client is not None:
+                    r = client.request(method, url, headers=headers, **kwargs)
+                else:
+                    with httpx.Client(timeout=self.timeout) as client:
+                        r = client.request(method, url, headers=headers, **kwargs)
+            except httpx.TransportError:
+                controller.record(None, monotonic() - start)
+                breaker.record(endpoint, False, state)
+                raise
+            controller.record(r.status_code, monotonic() - start)
+            breaker.record(endpoint, r.status_code < 500, state)
+
+        return r
+
     @validate_call
     def user(self, login: str) -> dict:
         """
@@ -71,10 +131,8 @@ class Intra:
             dict: A dictionary containing the user information.
         """
         url = f"{self.BASE}/users/{login}"
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-        with httpx.Client(timeout=self.timeout) as client:
-            r = client.get(url, headers=headers)
-            r.raise_for_status()
+        r = self.request("GET", url)
+        r.raise_for_status()
 
         return r.json()
 
@@ -106,9 +164,8 @@ class Intra:
             }
         )
         url = f"{self.BASE}/users"
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         with httpx.Client(timeout=self.timeout) as client:
-            r = client.get(url, headers=headers, params=filter_params)
+            r = self.request("GET", url, client=client, params=filter_params)
             r.raise_for_status()
             ret += r.json()
 
@@ -116,7 +173,7 @@ class Intra:
                 count = len(r.json())
                 page += 1
                 filter_params.update({"page": page})
-                r = client.get(url, headers=headers, params=filter_params)
+                r = self.request("GET", url, client=client, params=filter_params)
                 r.raise_for_status()
                 ret += r.json()
 
@@ -139,11 +196,8 @@ class Intra:
             }
         )
         url = f"{self.BASE}/cursus/{cursus_id}/users/"
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         with httpx.Client(timeout=self.timeout) as client:
-            r = client.get(
-                url, headers=headers, params=filter_params, timeout=self.timeout
-            )
+            r = self.request("GET", url, client=client, params=filter_params)
             r.raise_for_status()
             ret += r.json()
 
@@ -151,7 +205,7 @@ class Intra:
                 count = len(r.json())
                 page += 1
                 filter_params.update({"page": page})
-                r = client.get(url, headers=headers, params=filter_params)
+                r = self.request("GET", url, client=client, params=filter_params)
                 r.raise_for_status()
                 ret += r.json()
 
@@ -176,11 +230,9 @@ class Intra:
         Raises:
             Exception: If the pool cannot be fetched.
         """
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         url = f"{self.BASE}/pools/{pool_id}"
-        with httpx.Client(timeout=self.timeout) as client:
-            r = client.get(url, headers=headers)
-            r.raise_for_status()
+        r = self.request("GET", url)
+        r.raise_for_status()
 
         return r.json()
 
@@ -205,12 +257,10 @@ class Intra:
         Raises:
             Exception: If failed to add points to pool.
         """
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         url = f"{self.BASE}/pools/{pool_id}/points/add"
         data = {"points": value}
-        with httpx.Client(timeout=self.timeout) as client:
-            r = client.post(url, headers=headers, data=data, timeout=self.timeout)
-            r.raise_for_status()
+        r = self.request("POST", url, data=data)
+        r.raise_for_status()
 
         return r.json()
 
@@ -232,8 +282,14 @@ class Intra:
         def _get_users_at_page(pagenum):
             url = f"{self.BASE}/{ENDPOINT}/{cursus_id}/users/?{params}&page[number]={pagenum}&page[size]=50"
             console.log(f"Getting {url}")
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            r = httpx.get(url, headers=headers, timeout=self.timeout)
+            r = self.request("GET", url)
+            tries = 10
+            # retries stop early with CircuitOpenError once the listing's circuit opens
+            while r.status_code >= 500 and tries > 0:
+                console.log(f"Getting {url} Failed! Retrying {tries=}")
+                sleep(1)
+                r = self.request("GET", url)
+                tries -= 1
             r.raise_for_status()
             return r.json()
 
@@ -245,20 +301,57 @@ class Intra:
 
         return l_users
 
+    def get_cursus_users_by_cursus_id(self, cursus_id: int, filter: dict) -> list:
+        """
+        {{BASE_API}}/cursus/:cursus_id/cursus_users?filter[primary_campus_id]=33&sort=id&page[size]=100
+        https://api.intra.42.fr/apidoc/2.0/cursus_users/index.html
+        Each record carries level, grade, begin_at, end_at, blackholed_at and a short user
+        (id, login, email, names, pool), no per-user call needed.
+        Pages are sorted by id so offsets stay stable between requests.
+        ex.
+        filter = {
+            'filter[primary_campus_id]': 33,
+        }
+        """
+        ENDPOINT = "cursus"
+        params = urlencode(filter)
+
+        def _get_cursus_users_at_page(pagenum):
+            url = f"{self.BASE}/{ENDPOINT}/{cursus_id}/cursus_users?{params}&sort=id&page[number]={pagenum}&page[size]=100"
+            console.log(f"Getting {url}")
+            r = self.request("GET", url)
+            tries = 10
+            while r.status_code >= 500 and tries > 0:
+                console.log(f"Getting {url} Failed! Retrying {tries=}")
+                sleep(1)
+                r = self.request("GET", url)
+                tries -= 1
+            r.raise_for_status()
+            return r.json()
+
+        l_cursus_users = []
+        pagenum = 1
+        while r := _get_cursus_users_at_page(pagenum):
+            l_cursus_users += r
+            pagenum += 1
+
+        return l_cursus_users
+
     def get_user_info(self, id) -> dict:
         """
         Get user info by id
+        Only the first try counts toward the shared users/:id circuit, retries have a
+        circuit of their own so one broken record cannot open it for every user.
         """
         ENDPOINT = "users"
 
         with httpx.Client(timeout=self.timeout) as client:
             url = f"{self.BASE}/{ENDPOINT}/{id}"
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            r = client.get(url, headers=headers, timeout=self.timeout)
+            r = self.request("GET", url, client=client)
             tries = 10
             while r.status_code != 200 and tries > 0:
                 console.log(f"Getting user {id=} Failed! Retrying {tries=}")
-                r = client.get(url, headers=headers)
+                r = self.request("GET", url, client=client, endpoint=f"{ENDPOINT}/{id}")
                 tries -= 1
                 sleep(1)
             if r.status_code != 200:
@@ -266,29 +359,72 @@ class Intra:
 
         return r.json()
 
-    def get_user_infos_thr(self, l_ids, delay=0.5, token=None) -> list:
+    def get_user_infos_thr(self, l_ids, token=None) -> tuple[list, list]:
         """
         Get user info by ids using threading to speed up
-        delay more than 0.5 will risk cause 429
+        Requests in flight are bounded by the AIMD controller, users that fail are skipped
+        Returns:
+            tuple: the user infos, and the ids skipped because a circuit was open
         """
         user_infos = []
-        thrs = []
-
-        def thr_get_user_info(id):
-            user_infos.append(self.get_user_info(id))
-
-        for id in l_ids:
-            thr = threading.Thread(target=thr_get_user_info, args=(id,))
-            thrs.append(thr)
+        circuit_skipped = []
+        with ThreadPoolExecutor(max_workers=controller.max_window) as executor:
+            futures = {executor.submit(self.get_user_info, id): id for id in l_ids}
+            for future in track(
+                as_completed(futures),
+                total=len(futures),
+                description="Getting user info",
+            ):
+                try:
+                    user_infos.append(future.result())
+                except CircuitOpenError:
+                    circuit_skipped.append(futures[future])
+                except Exception as e:
+                    console.log(f"Getting user info failed: {e}")
+        if circuit_skipped:
+            console.log(f"Skipped {len(circuit_skipped)} users, circuit open")
+
+        return user_infos, circuit_skipped
+
+    def get_scale_teams(self, filter: dict) -> list:
+        """
+        {{BASE_API}}/scale_teams?filter[campus_id]=33&range[updated_at]=a,b&page[size]=100
+        https://api.intra.42.fr/apidoc/2.0/scale_teams/index.html
+        Evaluations of a whole campus in one listing, the number of pages scales with
+        the evaluations in the range, not with the number of cadets.
+        ex.
+        filter = {
+            'filter[campus_id]': 33,
+            'range[updated_at]': '2024-01-01T00:00:00Z,2024-02-01T00:00:00Z',
+        }
+        """
+        url = f"{self.BASE}/scale_teams"
 
-        for thr in track(thrs, description="Getting user info"):
-            thr.start()
-            sleep(delay)
+        def _get_scale_teams_at_page(pagenum: int, client: httpx.Client):
+            params = {
+                **filter,
+                "sort": "id",
+                "page[number]": pagenum,
+                "page[size]": 100,
+            }
+            r = self.request("GET", url, client=client, params=params)
+            tries = 10
+            while r.status_code >= 500 and tries > 0:
+                console.log(f"Getting {url} Failed! Retrying {tries=}")
+                sleep(1)
+                r = self.request("GET", url, client=client, params=params)
+                tries -= 1
+            r.raise_for_status()
+            return r.json()
 
-        for thr in thrs:
-            thr.join()
+        scale_teams = []
+        pagenum = 1
+        with httpx.Client(timeout=self.timeout) as client:
+            while r := _get_scale_teams_at_page(pagenum, client):
+                scale_teams += r
+                pagenum += 1
 
-        return user_infos
+        return scale_teams
 
     def get_projects_by_cursus(self, cursus_id: int) -> list:
         """
@@ -298,12 +434,12 @@ class Intra:
 
         def _get_projects_at_page(pagenum: int, client: httpx.Client):
             url = f"{self.BASE}/cursus/{cursus_id}/projects"
-            headers = {"Authorization": f"Bearer {self.access_token}"}
             params = {
                 "page[number]": pagenum,
                 "page[size]": 100,
             }
-            r = client.get(url, headers=headers, params=params)
+            r = self.request("GET", url, client=client, params=params)
+            r.raise_for_status()
             return r.json()
 
         projects = []
@@ -0,0 +1,120 @@
+"""
+Priority lanes for the 42 API rate limit, shared across processes through the cache (Redis).
+
+Every Intra request takes a slot of the per-second rate limit before it is sent.
+A lane only competes for a slot when no higher-priority lane has callers waiting,
+so an ad-hoc call preempts a bulk sync at the next free slot instead of
+queueing behind it.
+
+Usage:
+    from appcore.services.intra.lanes import Lane, scheduler
+    scheduler.acquire(Lane.BULK)
+"""
+
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+
+from django.core.cache import cache
+
+
+class Lane(IntEnum):
+    """
+    Request priority, lower value is served first.
+    NORMAL: default for ad-hoc calls
+    BULK: background syncs and reports
+    """
+
+    NORMAL = 0
+    BULK = 1
+
+
+class LaneScheduler:
+    """
+    Cross-process, prioritized rate limiter for the 42 API.
+    rate_limit: requests per second allowed for the application
+    poll_interval: seconds to wait before retrying to take a slot
+    waiting_ttl: seconds after which a crashed caller stops holding its lane
+    """
+
+    def __init__(
+        self,
+        rate_limit: int = 2,
+        poll_interval: float = 0.05,
+        waiting_ttl: int = 30,
+    ):
+        self.rate_limit = rate_limit
+        self.poll_interval = poll_interval
+        self.waiting_ttl = waiting_ttl
+
+    @staticmethod
+    def _waiting_key(lane: Lane) -> str:
+        return f"intraapi:lane:{lane.name.lower()}:waiting"
+
+    def waiting(self, lane: Lane) -> int:
+        """
+        Returns the number of callers waiting for a slot in the given lane.
+        """
+        return cache.get(self._waiting_key(lane), 0)
+
+    def _higher_lane_waiting(self, lane: Lane) -> bool:
+        return any(self.waiting(higher) > 0 for higher in Lane if higher < lane)
+
+    def _join(self, key: str) -> None:
+        cache.add(key, 0, self.waiting_ttl)
+        cache.incr(key)
+        cache.touch(key, self.waiting_ttl)
+
+    def _keep_waiting(self, lane: Lane) -> None:
+        """
+        Keeps the lane counter alive while the caller waits, so it cannot expire and
+        be re-created by another caller whose count the decr on exit would then take.
+        If it expired anyway (the caller stalled past waiting_ttl), it joins again.
+        """
+        key = self._waiting_key(lane)
+        if not cache.touch(key, self.waiting_ttl):
+            self._join(key)
+
+    @contextmanager
+    def _register_waiting(self, lane: Lane):
+        """
+        Marks the caller as waiting in its lane for the duration of the block.
+        """
+        key = self._waiting_key(lane)
+        self._join(key)
+        try:
+            yield
+        finally:
+            try:
+                cache.decr(key)
+            except ValueError:
+                # the counter expired while waiting
+                pass
+
+    def _try_take_slot(self) -> bool:
+        """
+        Takes a slot of the current second if any is left.
+        """
+        key = f"intraapi:rate:{int(time.time())}"
+        cache.add(key, 0, 2)
+        try:
+            return cache.incr(key) <= self.rate_limit
+        except ValueError:
+            # the second rolled over between add and incr
+            return False
+
+    def acquire(self, lane: Lane = Lane.NORMAL) -> None:
+        """
+        Blocks until the caller may send one request.
+        Args:
+            lane: the priority of the request
+        """
+        with self._register_waiting(lane):
+            while True:
+                if not self._higher_lane_waiting(lane) and self._try_take_slot():
+                    return
+                time.sleep(self.poll_interval)
+                self._keep_waiting(lane)
+
+
+scheduler = LaneScheduler()
@@ -0,0 +1,151 @@
+"""
+Compact, typed cadet records.
+Only the fields the app uses are kept from the 42 API user payload (identity, pool,
+correction point, cursus_users and slim projects_users), in slotted dataclasses,
+so reports over thousands of cadets hold a fraction of the raw dicts in memory.
+
+Usage:
+    from appcore.services.intra.records import CadetRecord
+    record = CadetRecord.from_api(r.json())
+    record = CadetRecord.from_snapshot(hist_intra_profile_data)
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from dateutil.parser import isoparse
+from django.utils import timezone
+
+
+@dataclass(slots=True, frozen=True)
+class CursusUserRecord:
+    cursus_id: int
+    level: float
+    grade: str | None
+    blackholed_at: datetime | None
+
+
+@dataclass(slots=True, frozen=True)
+class ProjectUserRecord:
+    slug: str
+    cursus_ids: tuple[int, ...]
+    final_mark: int | None
+    status: str | None
+    occurrence: int
+    updated_at: str | None
+
+
+def _parse_dt(value: str | None) -> datetime | None:
+    return isoparse(value) if value else None
+
+
+@dataclass(slots=True, frozen=True)
+class CadetRecord:
+    """
+    cursus_users: by cursus id
+    projects_users: by (cursus id, project slug), a project user is listed under each of its cursus
+    snapshot_at: when the data was fetched, None if straight from the API
+    """
+
+    id: int
+    login: str
+    email: str | None
+    first_name: str | None
+    last_name: str | None
+    pool_month: str | None
+    pool_year: str | None
+    correction_point: int
+    cursus_users: dict[int, CursusUserRecord]
+    projects_users: dict[tuple[int, str], ProjectUserRecord]
+    snapshot_at: datetime | None = None
+
+    @classmethod
+    def from_api(cls, data: dict, snapshot_at: datetime | None = None) -> "CadetRecord":
+        """
+        Decodes a user as returned by the API /users/:id.
+        """
+        cursus_users = {}
+        for cu in data.get("cursus_users", []):
+            cursus_users.setdefault(
+                cu["cursus_id"],
+                CursusUserRecord(
+                    cursus_id=cu["cursus_id"],
+                    level=cu.get("level") or 0,
+                    grade=cu.get("grade"),
+                    blackholed_at=_parse_dt(cu.get("blackholed_at")),
+                ),
+            )
+        projects_users = {}
+        for pu in data.get("projects_users", []):
+            record = ProjectUserRecord(
+                slug=pu["project"]["slug"],
+                cursus_ids=tuple(pu["cursus_ids"]),
+                final_mark=pu.get("final_mark"),
+                status=pu.get("status"),
+                occurrence=pu.get("occurrence") or 0,
+                updated_at=pu.get("updated_at"),
+            )
+            for cursus_id in record.cursus_ids:
+                projects_users.setdefault((cursus_id, record.slug), record)
+
+        return cls(
+            id=data["id"],
+            login=data["login"],
+            email=data.get("email"),
+            first_name=data.get("first_name"),
+            last_name=data.get("last_name"),
+            pool_month=data.get("pool_month"),
+            pool_year=data.get("pool_year"),
+            correction_point=data.get("correction_point") or 0,
+            cursus_users=cursus_users,
+            projects_users=projects_users,
+            snapshot_at=snapshot_at,
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "CadetRecord":
+        """
+        Decodes a stored snapshot, anything with data and created like HistIntraProfileData.
+        """
+        return cls.from_api(snapshot.data, snapshot_at=snapshot.created)
+
+    def level(self, cursus_id: int) -> float:
+        """
+        Returns the level in the given cursus, 0 if not in the cursus.
+        """
+        cu = self.cursus_users.get(cursus_id)
+
+        return cu.level if cu else 0
+
+    def project_users(self, cursus_id: int) -> list[ProjectUserRecord]:
+        """
+        Returns the project users in the given cursus.
+        """
+        return [pu for (c, _), pu in self.projects_users.items() if c == cursus_id]
+
+    def project(self, cursus_id: int, project_slug: str) -> ProjectUserRecord | None:
+        """
+        Returns the project user of the given project, None if not in the project.
+        """
+        return self.projects_users.get((cursus_id, project_slug))
+
+    def total_tries(self, cursus_id: int) -> int:
+        """
+        Returns the total number of tries in the given cursus.
+        """
+        return sum(pu.occurrence + 1 for pu in self.project_users(cursus_id))
+
+    def days_inactive(self, cursus_id: int, now: datetime | None = None) -> int:
+        """
+        Returns the days since the last project update in the given cursus,
+        counted from 1970-01-01 if there is none.
+        """
+        now = now or timezone.now()
+        updated_ats = [
+            isoparse(pu.updated_at)
+            for pu in self.project_users(cursus_id)
+            if pu.updated_at
+        ]
+        last = max(updated_ats, default=isoparse("1970-01-01T00:00:00Z"))
+
+        return (now - last).days
@@ -3,57 +3,104 @@ import logging
 from time import sleep
 
 import dateutil
-import httpx
 import pytz
 from appcore.services.intra.intra import Intra
+from appcore.services.intra.lanes import Lane
 from dateutil.parser import parse as datetime_parse
 from django.utils import timezone
 from pydantic import validate_call
 import pandas as pd
 
 
+def _disabled_method(*args, **kwargs):
+    raise Exception("Superclass method disabled")
+
+
 class IntraUser(Intra):
     """
     Represents a user from the 42 API.
+    Lookups by cursus and project slug go through indexes built lazily from data,
+    and dropped whenever data is replaced.
     """
 
-    DISABLED_METHODS = [
-        "users",
-        "pools",
-    ]
+    __slots__ = (
+        "login",
+        "_data",
+        "_cursus_users_index",
+        "_project_users_index",
+        "pts_gain",
+        "pts_lost",
+    )
+
+    # superclass methods disabled for a single user
+    users = _disabled_method
+    pools = _disabled_method
+    # correction point historic reasons of evaluations
+    EARNING_REASON = "Earning after defense"
+    DEFENSE_REASON = "Defense plannification"
 
     @validate_call
-    def __init__(self, login: str, data: dict = None):
+    def __init__(self, login: str, data: dict = None, lane: Lane = Lane.NORMAL):
         """
         Initialize the user.
         Args:
             login (str): The login of the user.
             data (dict, optional): The data of the user. Defaults to None. If not provided, the data will be fetched from the API.
+            lane (Lane, optional): The priority of requests made for this user. Defaults to Lane.NORMAL.
             pts_gain (int, optional): The evalation points gained by the user calculated by calling calc_eval_pts_gainloss. Defaults to None.
             pts_lost (int, optional): The evalation points lost by the user calculated by calling calc_eval_pts_gainloss. Defaults to None.
 
         """
-        super().__init__()
+        super().__init__(lane=lane)
         self.login = login
         if data:
             self.data = data
         elif data is None:
             self.data = self.user(login)
-        self._disable_methods(self.DISABLED_METHODS)
 
         self.pts_gain: int | None = None
         self.pts_lost: int | None = None
 
-    def _disable_methods(self, methods: list):
+    @property
+    def data(self) -> dict:
+        """
+        The data of the user as returned by the API.
+        """
+        return self._data
+
+    @data.setter
+    def data(self, value: dict):
+        self._data = value
+        self._cursus_users_index = None
+        self._project_users_index = None
+
+    def _cursus_users(self) -> dict[int, dict]:
         """
-        Disable methods from the list.
+        Returns the cursus users of the user by cursus id, built on first use.
         """
+        if self._cursus_users_index is None:
+            index = {}
+            for cu in self.data["cursus_users"]:
+                index.setdefault(cu["cursus_id"], cu)
+            self._cursus_users_index = index
+
+        return self._cursus_users_index
 
-        def _raise_exception():
-            raise Exception("Superclass method disabled")
+    def _project_users(self) -> tuple[dict[int, list], dict[tuple[int, str], dict]]:
+        """
+        Returns the project users of the user by cursus id and by (cursus id, project slug),
+        built on first use.
+        """
+        if self._project_users_index is None:
+            by_cursus = {}
+            by_slug = {}
+            for pu in self.data["projects_users"]:
+                for cursus_id in pu["cursus_ids"]:
+                    by_cursus.setdefault(cursus_id, []).append(pu)
+                    by_slug.setdefault((cursus_id, pu["project"]["slug"]), pu)
+            self._project_users_index = (by_cursus, by_slug)
 
-        for method in methods:
-            setattr(self, method, _raise_exception)
+        return self._project_users_index
 
     @property
     def id(self) -> int:
@@ -80,11 +127,11 @@ class IntraUser(Intra):
         :param cursus_id: The cursus id.
         :return: The level of the user in the given cursus.
         """
-        for cu in self.data["cursus_users"]:
-            if cu["cursus_id"] == cursus_id:
-                return cu["level"]
+        cu = self._cursus_users().get(cursus_id)
+        if cu is None:
+            return 0
 
-        return 0
+        return cu["level"]
 
     def project_users(self, cursus_id: int) -> list:
         """
@@ -92,12 +139,9 @@ class IntraUser(Intra):
         :param cursus_id: The cursus id.
         :return: The project users of the user in the given cursus.
         """
-        ret = []
-        for pu in self.data["projects_users"]:
-            if cursus_id in pu["cursus_ids"]:
-                ret.append(pu)
+        by_cursus, _ = self._project_users()
 
-        return ret
+        return list(by_cursus.get(cursus_id, []))
 
     def calc_total_tries(self, cursus_id):
         """
@@ -120,11 +164,12 @@ class IntraUser(Intra):
         :param cursus_id: The cursus id.
         :return: The final mark of the user in the given project.
         """
-        for project in self.project_users(cursus_id):
-            if project["project"]["slug"] == project_slug:
-                return project["final_mark"]
+        _, by_slug = self._project_users()
+        project = by_slug.get((cursus_id, project_slug))
+        if project is None:
+            return None
 
-        return None
+        return project["final_mark"]
 
     def project(self, cursus_id: int, project_slug: str) -> dict:
         """
@@ -132,11 +177,9 @@ class IntraUser(Intra):
         :param cursus_id: The cursus id.
         :return: The project of the user in the given cursus.
         """
-        for project in self.project_users(cursus_id):
-            if project["project"]["slug"] == project_slug:
-                return project
+        _, by_slug = self._project_users()
 
-        return {}
+        return by_slug.get((cursus_id, project_slug), {})
 
     @validate_call
     def set_correction_point(
@@ -162,11 +205,9 @@ class IntraUser(Intra):
             return True
 
         diff = value - self.correction_point
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         params = {"reason": reason, "amount": diff}
         url = f"{self.BASE}/users/{self.login}/correction_points/add"
-        with httpx.Client() as client:
-            r = client.post(url, headers=headers, params=params, timeout=self.timeout)
+        r = self.request("POST", url, params=params)
         if r.status_code not in [i for i in range(200, 300)]:
             raise Exception("Could not set correction point")
 
@@ -218,14 +259,13 @@ class IntraUser(Intra):
         Raises:
             ValueError: If the user is not in the specified cursus.
         """
-        for cursus in self.data["cursus_users"]:
-            if cursus["cursus_id"] == cursus_id:
-                if cursus["blackholed_at"] is None:
-                    return None
-                blackholed_at = datetime_parse(cursus["blackholed_at"])
-                return blackholed_at
+        cursus = self._cursus_users().get(cursus_id)
+        if cursus is None:
+            raise ValueError("User is not in this cursus")
+        if cursus["blackholed_at"] is None:
+            return None
 
-        raise ValueError("User is not in this cursus")
+        return datetime_parse(cursus["blackholed_at"])
 
     @validate_call
     def is_blackholed(self, cursus_id: int = 21) -> bool:
@@ -255,31 +295,54 @@ class IntraUser(Intra):
             bool: True if success,
         Exception: if failed
         """
-        url = self.api.BASE + f"/users/{self.login}"
-        headers = {
-            "Authorization": f"Bearer {self.api.access_token}",
-            "Content-Type": "application/json",
-        }
-        r = httpx.patch(
+        url = self.BASE + f"/users/{self.login}"
+        r = self.request(
+            "PATCH",
             url,
-            headers=headers,
             json={"user": {"email": email}},
         )
         r.raise_for_status()
 
         return True
 
-    def get_correction_point_hist(self) -> list:
+    def get_last_correction_point_hist_id(
+        self, reasons: list[str] | None = None
+    ) -> int | None:
+        """
+        /users/:user_id/correction_point_historics?filter[reason]=&sort=-id&page[size]=1
+        Args:
+            reasons (list[str], optional): Only consider entries with these reasons.
+        Returns:
+            int | None: The ID of the newest entry, None if there is none.
+        """
+        params = {"sort": "-id", "page[size]": 1}
+        if reasons:
+            params["filter[reason]"] = ",".join(reasons)
+        url = f"{self.BASE}/users/{self.login}/correction_point_historics"
+        r = self.request("GET", url, params=params)
+        r.raise_for_status()
+
+        return r.json()[0]["id"] if r.json() else None
+
+    def get_correction_point_hist(
+        self, after_id: int | None = None, reasons: list[str] | None = None
+    ) -> list:
         """
-        /users/:user_id/correction_point_historics?filter[reason]=&page[size]=100&page[number]=1
+        /users/:user_id/correction_point_historics?filter[reason]=&sort=-id&page[size]=100&page[number]=1
+        Args:
+            after_id (int, optional): Only return entries with a greater ID. Pages are read
+                newest first and paging stops at the first known entry.
+            reasons (list[str], optional): Only return entries with these reasons.
         Returns:
-            list: A list of correction point history.
+            list: A list of correction point history, newest first.
         """
+        params = {"sort": "-id", "page[size]": 100}
+        if reasons:
+            params["filter[reason]"] = ",".join(reasons)
 
         def _get_at_page(pagenum):
-            url = f"{self.BASE}/users/{self.login}/correction_point_historics?page[number]={pagenum}&page[size]=100"
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            r = httpx.get(url, headers=headers)
+            url = f"{self.BASE}/users/{self.login}/correction_point_historics"
+            r = self.request("GET", url, params={**params, "page[number]": pagenum})
             tries = 10
             while r.status_code != 200:
                 if tries == 0:
@@ -289,7 +352,7 @@ class IntraUser(Intra):
                 logging.info(
                     f"get_correction_point_hist {self.login=} Failed! Retrying {tries=}"
                 )
-                r = httpx.get(url, headers=headers)
+                r = self.request("GET", url, params={**params, "page[number]": pagenum})
                 tries -= 1
                 sleep(1)
             return r.json()
@@ -297,7 +360,12 @@ class IntraUser(Intra):
         l_eval_hists = []
         pagenum = 1
         while r := _get_at_page(pagenum):
-            l_eval_hists += r
+            if after_id is None:
+                l_eval_hists += r
+            else:
+                l_eval_hists += [i for i in r if i["id"] > after_id]
+                if any(i["id"] <= after_id for i in r):
+                    break
             pagenum += 1
 
         return l_eval_hists
@@ -309,7 +377,9 @@ class IntraUser(Intra):
         Returns:
             tuple[int, int]: The total points gained and lost by evaluation.
         """
-        l_eval_hists = self.get_correction_point_hist()
+        l_eval_hists = self.get_correction_point_hist(
+            reasons=[self.EARNING_REASON, self.DEFENSE_REASON]
+        )
         df_eval_hist = pd.DataFrame(l_eval_hists)
 
         # catch user with no eval history
@@ -321,11 +391,9 @@ class IntraUser(Intra):
             return self.pts_gain, self.pts_lost
 
         self.pts_lost = abs(
-            df_eval_hist[df_eval_hist["reason"] == "Defense plannification"][
-                "sum"
-            ].sum()
+            df_eval_hist[df_eval_hist["reason"] == self.DEFENSE_REASON]["sum"].sum()
         )
-        self.pts_gain = df_eval_hist[df_eval_hist["reason"] == "Earning after defense"][
+        self.pts_gain = df_eval_hist[df_eval_hist["reason"] == self.EARNING_REASON][
             "sum"
         ].sum()
 
@@ -1,9 +1,17 @@
+import binascii
+import hashlib
+import json
 import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from typing import Any
 
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
 from django.db.models.query import QuerySet
 from ninja import Schema
-from ninja.pagination import PageNumberPagination
+from ninja.errors import HttpError
+from ninja.pagination import AsyncPaginationBase, PageNumberPagination
 
 
 class PageNumberPaginationExt(PageNumberPagination):
@@ -23,9 +31,179 @@ class PageNumberPaginationExt(PageNumberPagination):
         **params: Any,
     ) -> Any:
         offset = (pagination.page - 1) * self.page_size
+        count = self._items_count(queryset)
         ret = {
             "items": queryset[offset : offset + self.page_size],
-            "count": self._items_count(queryset),
-            "total_page": math.ceil(self._items_count(queryset) / self.page_size),
+            "count": count,
+            "total_page": math.ceil(count / self.page_size),
         }
         return ret
+
+    async def apaginate_queryset(
+        self,
+        queryset: QuerySet,
+        pagination: PageNumberPagination.Input,
+        **params: Any,
+    ) -> Any:
+        offset = (pagination.page - 1) * self.page_size
+        count = await self._aitems_count(queryset)
+        items = queryset[offset : offset + self.page_size]
+        if isinstance(queryset, QuerySet):
+            items = [i async for i in items]
+        ret = {
+            "items": items,
+            "count": count,
+            "total_page": math.ceil(count / self.page_size),
+        }
+        return ret
+
+
+class CursorPagination(AsyncPaginationBase):
+    """Keyset pagination cls for ninja
+    - pages are fetched with a WHERE on the ordering fields instead of an OFFSET,
+      so a page costs the same at any depth
+    - next is an opaque cursor to the following page, None on the last page
+    - count is only computed when asked for, and cached for count_ttl seconds
+    The queryset is ordered by `ordering` unless already ordered, in which case its
+    ordering must start with `ordering`. The last ordering field must be unique and
+    none of them nullable.
+    """
+
+    class Input(Schema):
+        cursor: str | None = None
+        count: bool = False
+
+    class Output(Schema):
+        next: str | None = None
+        count: int | None = None
+        items: list[Any]
+
+    def __init__(
+        self,
+        *,
+        ordering: tuple[str, ...] = ("-created", "id"),
+        page_size: int = 100,
+        count_ttl: int = 60,
+        **kwargs: Any,
+    ) -> None:
+        self.ordering = ordering
+        self.page_size = page_size
+        self.count_ttl = count_ttl
+        super().__init__(**kwargs)
+
+    @staticmethod
+    def encode_cursor(values: list) -> str:
+        raw = json.dumps([str(v) for v in values]).encode()
+        return urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> list[str]:
+        try:
+            values = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except (ValueError, binascii.Error):
+            raise HttpError(400, "Invalid cursor")
+        if not isinstance(values, list):
+            raise HttpError(400, "Invalid cursor")
+        return values
+
+    def _clean_cursor(self, queryset: QuerySet, values: list) -> list:
+        """
+        Converts the decoded values to the python type of their ordering field,
+        so a tampered cursor is a 400 instead of a database error.
+        """
+        if len(values) != len(self.ordering):
+            raise HttpError(400, "Invalid cursor")
+        ret = []
+        for field, value in zip(self.ordering, values):
+            model = queryset.model
+            *relations, name = field.lstrip("-").split("__")
+            for relation in relations:
+                model = model._meta.get_field(relation).related_model
+            try:
+                ret.append(model._meta.get_field(name).to_python(value))
+            except (ValidationError, TypeError):
+                raise HttpError(400, "Invalid cursor")
+        return ret
+
+    def _after(self, values: list[str]) -> Q:
+        """
+        Rows strictly after the given ordering values,
+        ex. for ("-created", "id"): created < c OR (created = c AND id > i)
+        """
+        q = Q()
+        for i, field in enumerate(self.ordering):
+            lookup = "lt" if field.startswith("-") else "gt"
+            cond = Q(**{f"{field.lstrip('-')}__{lookup}": values[i]})
+            for prev, value in zip(self.ordering[:i], values[:i]):
+                cond &= Q(**{prev.lstrip("-"): value})
+            q |= cond
+        return q
+
+    def _count_key(self, queryset: QuerySet) -> str:
+        return (
+            "pagination:count:" + hashlib.md5(str(queryset.query).encode()).hexdigest()
+        )
+
+    def _cached_count(self, queryset: QuerySet) -> int:
+        return cache.get_or_set(
+            self._count_key(queryset),
+            lambda: self._items_count(queryset),
+            timeout=self.count_ttl,
+        )
+
+    async def _acached_count(self, queryset: QuerySet) -> int:
+        key = self._count_key(queryset)
+        count = await cache.aget(key)
+        if count is None:
+            count = await self._aitems_count(queryset)
+            await cache.aset(key, count, timeout=self.count_ttl)
+        return count
+
+    def _page_queryset(self, queryset: QuerySet, pagination: Input) -> tuple:
+        """
+        Returns the ordered queryset and the slice of it to fetch for the page,
+        one row more than the page size to know if there is a next page.
+        """
+        if not queryset.query.order_by:
+            queryset = queryset.order_by(*self.ordering)
+        page = queryset
+        if pagination.cursor:
+            values = self._clean_cursor(queryset, self.decode_cursor(pagination.cursor))
+            page = queryset.filter(self._after(values))
+        return queryset, page[: self.page_size + 1]
+
+    def _page(self, items: list, count: int | None) -> dict:
+        next_cursor = None
+        if len(items) > self.page_size:
+            items = items[: self.page_size]
+            next_cursor = self.encode_cursor(
+                [getattr(items[-1], f.lstrip("-")) for f in self.ordering]
+            )
+        ret = {
+            "items": items,
+            "next": next_cursor,
+            "count": count,
+        }
+        return ret
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        pagination: Input,
+        **params: Any,
+    ) -> Any:
+        queryset, page = self._page_queryset(queryset, pagination)
+        items = list(page)
+        count = self._cached_count(queryset) if pagination.count else None
+        return self._page(items, count)
+
+    async def apaginate_queryset(
+        self,
+        queryset: QuerySet,
+        pagination: Input,
+        **params: Any,
+    ) -> Any:
+        queryset, page = self._page_queryset(queryset, pagination)
+        items = [i async for i in page]
+        count = await self._acached_count(queryset) if pagination.count else None
+        return self._page(items, count)
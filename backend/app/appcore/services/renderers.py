@@ -0,0 +1,34 @@
+"""
+orjson renderer and parser for NinjaAPI.
+Responses are mostly nested Intra JSON blobs, orjson serializes them several times
+faster than the stdlib encoder. Types orjson does not know (Decimal, pydantic
+models, lazy strings, ...) fall back to ninja's encoder, so output matches the
+default renderer apart from datetimes keeping their microseconds.
+
+Usage:
+    api = NinjaAPI(renderer=ORJSONRenderer(), parser=ORJSONParser())
+"""
+
+from typing import Any
+
+import orjson
+from django.http import HttpRequest
+from ninja.parser import Parser
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+from ninja.types import DictStrAny
+
+_default = NinjaJSONEncoder().default
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> Any:
+        return orjson.dumps(data, default=_default, option=self.options)
+
+
+class ORJSONParser(Parser):
+    def parse_body(self, request: HttpRequest) -> DictStrAny:
+        return orjson.loads(request.body)
@@ -0,0 +1,177 @@
+"""
+Response cache for read endpoints whose data only changes when a sync stores new snapshots.
+Rendered 200 responses are kept in the cache (Redis) under the route, query params,
+Authorization header and a global data version. Writers bump the version instead of
+deleting keys, old entries expire on their own. Responses carry an ETag so clients
+can revalidate with If-None-Match and get a 304. A view whose data expires on its own
+sets a Cache-Control max-age, the entry is then kept no longer than that and served
+with the max-age it has left.
+
+Usage:
+    from ninja.decorators import decorate_view
+    from appcore.services.response_cache import cache_response
+
+    @router.get("/path/")
+    @decorate_view(cache_response())
+    def view(request): ...
+
+    bump_data_version()  # after writing the data the view reads
+"""
+
+import hashlib
+import math
+import time
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import get_max_age, patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag, urlencode
+
+DATA_VERSION_KEY = "response-cache:data-version"
+# bumped when the layout of stored entries changes
+ENTRY_VERSION = 2
+RESPONSE_TTL = 60 * 60
+
+
+def data_version() -> int:
+    """
+    Returns the current data version.
+    """
+    # seeded from the clock so a lost version never falls back onto old entries
+    cache.add(DATA_VERSION_KEY, int(time.time()), timeout=None)
+    return cache.get(DATA_VERSION_KEY)
+
+
+async def adata_version() -> int:
+    """
+    Async version of data_version.
+    """
+    await cache.aadd(DATA_VERSION_KEY, int(time.time()), timeout=None)
+    return await cache.aget(DATA_VERSION_KEY)
+
+
+def bump_data_version() -> int:
+    """
+    Invalidates every cached response by moving to a new data version.
+    """
+    data_version()
+    return cache.incr(DATA_VERSION_KEY)
+
+
+def _response_key(request, version: int) -> str:
+    params = urlencode(sorted(request.GET.lists()), doseq=True)
+    auth = request.headers.get("Authorization", "")
+    digest = hashlib.sha256(f"{request.path}?{params}\n{auth}".encode()).hexdigest()
+    return f"response-cache:{ENTRY_VERSION}:{version}:{digest}"
+
+
+def _is_cacheable(request) -> bool:
+    return request.method in ("GET", "HEAD")
+
+
+def _ttl(response, timeout: int) -> int:
+    max_age = get_max_age(response)
+    return timeout if max_age is None else min(timeout, max_age)
+
+
+def _to_cached(response, ttl: int) -> tuple | None:
+    if response.status_code != 200 or response.streaming:
+        return None
+    etag = quote_etag(hashlib.md5(response.content).hexdigest())
+    # Cache-Control is replayed with the max-age left at serving time
+    cache_control = response.get("Cache-Control")
+    expires_at = time.time() + ttl if get_max_age(response) is not None else None
+    return (response.content, response["Content-Type"], etag, cache_control, expires_at)
+
+
+def _checks(view):
+    """
+    Returns the security checks (auth, csrf, throttling) of the ninja operation
+    whose run is decorated, None for a plain view.
+    """
+    # decorate_view replaces Operation.run, so the view is bound to the operation
+    return getattr(getattr(view, "__self__", None), "_run_checks", None)
+
+
+def _from_cached(request, cached: tuple) -> HttpResponse:
+    content, content_type, etag, cache_control, expires_at = cached
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in etags or "*" in etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type=content_type)
+    response["ETag"] = etag
+    if cache_control:
+        response["Cache-Control"] = cache_control
+    if expires_at is not None:
+        patch_cache_control(
+            response, max_age=max(math.ceil(expires_at - time.time()), 0)
+        )
+    patch_vary_headers(response, ["Authorization"])
+
+    return response
+
+
+def cache_response(timeout: int = RESPONSE_TTL):
+    """
+    View decorator caching GET 200 responses until the data version changes.
+    Meant for ninja operations through decorate_view, it wraps the whole operation:
+    a miss runs it with its checks, a hit runs the checks again before serving, so
+    a revoked token is refused even while its responses are cached. The
+    Authorization header is part of the key and only 200s are stored.
+    Async views are cached through the async cache API.
+    Args:
+        timeout: seconds to keep a response if the data version does not change,
+            capped by the max-age of the response if any
+    """
+
+    def decorator(view):
+        checks = _checks(view)
+
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if not _is_cacheable(request):
+                    return await view(request, *args, **kwargs)
+
+                key = _response_key(request, await adata_version())
+                cached = await cache.aget(key)
+                if cached is None:
+                    response = await view(request, *args, **kwargs)
+                    ttl = _ttl(response, timeout)
+                    cached = _to_cached(response, ttl)
+                    if cached is None or ttl <= 0:
+                        return response
+                    await cache.aset(key, cached, ttl)
+                elif checks and (error := await checks(request)):
+                    return error
+
+                return _from_cached(request, cached)
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable(request):
+                return view(request, *args, **kwargs)
+
+            key = _response_key(request, data_version())
+            cached = cache.get(key)
+            if cached is None:
+                response = view(request, *args, **kwargs)
+                ttl = _ttl(response, timeout)
+                cached = _to_cached(response, ttl)
+                if cached is None or ttl <= 0:
+                    return response
+                cache.set(key, cached, ttl)
+            elif checks and (error := checks(request)):
+                return error
+
+            return _from_cached(request, cached)
+
+        return wrapper
+
+    return decorator
@@ -1,7 +1,14 @@
-from datetime import date, datetime
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
 from unittest.mock import patch
 
-from django.test import TestCase
+import httpx
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from ninja.renderers import JSONRenderer
 
 from appcore.services.date_utils import (
     dec_month,
@@ -11,7 +18,23 @@ from appcore.services.date_utils import (
     next_n_months,
     prev_n_months,
 )
+from appcore.services.downsample import lttb
 from appcore.services.gen_token import gen_token
+from appcore.services.intra.aimd import AIMDController
+from appcore.services.intra.breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    breaker,
+)
+from appcore.services.intra.intra import Intra
+from appcore.services.intra.lanes import Lane, LaneScheduler, scheduler
+from appcore.services.intra.records import CadetRecord
+from appcore.services.intra.user import IntraUser
+from appcore.services.renderers import ORJSONParser, ORJSONRenderer
+from appcore.tests.utils import LOCMEM_CACHES
 
 
 class GenTokenTest(TestCase):
@@ -155,3 +178,356 @@ class DateUtilsTest(TestCase):
         dt = datetime(2024, 6, 15)
         result = dt_range_from_dt(dt, 0)
         self.assertEqual(result, [dt])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LaneSchedulerTest(TestCase):
+    """Test cases for the intra API priority lanes."""
+
+    def setUp(self):
+        cache.clear()
+        self.scheduler = LaneScheduler(rate_limit=2)
+
+    def test_slots_are_capped_per_second(self):
+        """Test that no more than rate_limit slots are granted in a second."""
+        with patch("appcore.services.intra.lanes.time.time", return_value=1000.0):
+            self.assertTrue(self.scheduler._try_take_slot())
+            self.assertTrue(self.scheduler._try_take_slot())
+            self.assertFalse(self.scheduler._try_take_slot())
+
+    def test_lower_lane_yields_to_waiting_higher_lane(self):
+        """Test that bulk requests wait while an ad-hoc request is queued."""
+        with self.scheduler._register_waiting(Lane.NORMAL):
+            self.assertEqual(self.scheduler.waiting(Lane.NORMAL), 1)
+            self.assertTrue(self.scheduler._higher_lane_waiting(Lane.BULK))
+            self.assertFalse(self.scheduler._higher_lane_waiting(Lane.NORMAL))
+
+        self.assertEqual(self.scheduler.waiting(Lane.NORMAL), 0)
+        self.assertFalse(self.scheduler._higher_lane_waiting(Lane.BULK))
+
+    def test_expired_counter_keeps_other_waiters(self):
+        """Test that a waiter whose counter expired does not drop another's count."""
+        key = self.scheduler._waiting_key(Lane.NORMAL)
+        with self.scheduler._register_waiting(Lane.NORMAL):
+            cache.delete(key)
+            self.scheduler._keep_waiting(Lane.NORMAL)
+            with self.scheduler._register_waiting(Lane.NORMAL):
+                self.assertEqual(self.scheduler.waiting(Lane.NORMAL), 2)
+            self.assertEqual(self.scheduler.waiting(Lane.NORMAL), 1)
+
+        self.assertEqual(self.scheduler.waiting(Lane.NORMAL), 0)
+
+    def test_acquire_returns_when_slot_free(self):
+        """Test that acquire grants a slot without waiting when idle."""
+        self.scheduler.acquire(Lane.BULK)
+        self.assertEqual(self.scheduler.waiting(Lane.BULK), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AIMDControllerTest(TestCase):
+    """Test cases for the intra API adaptive concurrency controller."""
+
+    def setUp(self):
+        self.controller = AIMDController(initial_window=4, max_window=8, cooldown=0)
+
+    def test_healthy_responses_increase_window_additively(self):
+        """Test that about a window of healthy responses adds one slot."""
+        for _ in range(5):
+            self.controller.record(200, 0.2)
+        self.assertEqual(self.controller.window, 5)
+
+    def test_window_is_capped(self):
+        """Test that the window never exceeds max_window."""
+        for _ in range(200):
+            self.controller.record(200, 0.2)
+        self.assertEqual(self.controller.window, 8)
+
+    def test_rate_limit_halves_window(self):
+        """Test that 429 and 5xx shrink the window multiplicatively."""
+        self.controller.record(429, 0.2)
+        self.assertEqual(self.controller.window, 2)
+        self.controller.record(502, 0.2)
+        self.assertEqual(self.controller.window, 1)
+        self.controller.record(None, 30)
+        self.assertEqual(self.controller.window, 1)
+
+    def test_latency_spike_decreases_window(self):
+        """Test that a response much slower than average is congestion."""
+        self.controller.record(200, 0.2)
+        window = self.controller._window
+        self.controller.record(200, 5.0)
+        self.assertLess(self.controller._window, window)
+
+    def test_cooldown_ignores_repeated_signals(self):
+        """Test that one congestion episode only decreases once."""
+        controller = AIMDController(initial_window=8, cooldown=60)
+        controller.record(429, 0.2)
+        controller.record(429, 0.2)
+        self.assertEqual(controller.window, 4)
+
+    def test_slot_tracks_in_flight(self):
+        """Test that slots are counted while held."""
+        with self.controller.slot():
+            self.assertEqual(self.controller.in_flight, 1)
+        self.assertEqual(self.controller.in_flight, 0)
+
+    @patch.object(Intra, "access_token", "token")
+    def test_lane_is_acquired_before_the_slot(self):
+        """Test that no AIMD slot is held while waiting in the lane scheduler."""
+        in_flight = []
+        response = httpx.Response(200, request=httpx.Request("GET", "https://x"))
+        with (
+            patch("appcore.services.intra.intra.controller", self.controller),
+            patch.object(
+                scheduler,
+                "acquire",
+                side_effect=lambda lane: in_flight.append(self.controller.in_flight),
+            ),
+            patch.object(httpx.Client, "request", return_value=response),
+        ):
+            Intra(lane=Lane.BULK).request("GET", "https://api.intra.42.fr/v2/me")
+
+        self.assertEqual(in_flight, [0])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CircuitBreakerTest(TestCase):
+    """Test cases for the intra API circuit breaker."""
+
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker(failure_threshold=3, cooldown=300)
+        self.endpoint = "cursus/3/users"
+
+    def test_endpoint_pattern(self):
+        """Test that ids are collapsed and cursus ids kept."""
+        base = "https://api.intra.42.fr/v2"
+        self.assertEqual(
+            CircuitBreaker.endpoint(
+                f"{base}/users/jdoe/correction_point_historics?page[number]=2"
+            ),
+            "users/:id/correction_point_historics",
+        )
+        self.assertEqual(CircuitBreaker.endpoint(f"{base}/users/123"), "users/:id")
+        self.assertEqual(
+            CircuitBreaker.endpoint(f"{base}/cursus/3/users/"), "cursus/3/users"
+        )
+        self.assertEqual(
+            CircuitBreaker.endpoint(f"{base}/pools/73/points/add"),
+            "pools/:id/points/add",
+        )
+
+    def test_opens_after_threshold(self):
+        """Test that repeated failures open the circuit and fail fast."""
+        for _ in range(3):
+            state = self.breaker.before_request(self.endpoint)
+            self.breaker.record(self.endpoint, False, state)
+
+        self.assertEqual(self.breaker.state(self.endpoint), OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request(self.endpoint)
+        # other listings are unaffected
+        self.assertEqual(self.breaker.before_request("cursus/21/users"), CLOSED)
+
+    def test_success_does_not_open(self):
+        """Test that failures below the threshold keep the circuit closed."""
+        self.breaker.record(self.endpoint, False)
+        self.breaker.record(self.endpoint, True)
+        self.assertEqual(self.breaker.state(self.endpoint), CLOSED)
+
+    def test_half_open_allows_single_probe(self):
+        """Test that after cooldown one probe goes through and success closes."""
+        self.breaker._open(self.endpoint)
+        cache.delete(self.breaker._keys(self.endpoint)["open"])  # cooldown over
+
+        state = self.breaker.before_request(self.endpoint)
+        self.assertEqual(state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request(self.endpoint)
+
+        self.breaker.record(self.endpoint, True, state)
+        self.assertEqual(self.breaker.state(self.endpoint), CLOSED)
+
+    def test_failed_probe_reopens(self):
+        """Test that a failing probe opens the circuit again."""
+        self.breaker._open(self.endpoint)
+        cache.delete(self.breaker._keys(self.endpoint)["open"])
+
+        state = self.breaker.before_request(self.endpoint)
+        self.breaker.record(self.endpoint, False, state)
+        self.assertEqual(self.breaker.state(self.endpoint), OPEN)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@patch.object(Intra, "access_token", "token")
+@patch("appcore.services.intra.intra.controller", AIMDController())
+@patch("appcore.services.intra.intra.sleep")
+class IntraUserInfoBreakerTest(TestCase):
+    """Test cases for the circuit breaker keys of the per-user fetches."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_retries_keep_the_shared_circuit_closed(self, _):
+        """Test that one failing user only opens a circuit of its own."""
+        response = httpx.Response(500, request=httpx.Request("GET", "https://x"))
+        with patch.object(httpx.Client, "request", return_value=response):
+            with self.assertRaises(CircuitOpenError):
+                Intra().get_user_info(1)
+
+        self.assertEqual(breaker.state("users/1"), OPEN)
+        self.assertEqual(breaker.state("users/:id"), CLOSED)
+
+    def test_circuit_skipped_users_are_returned(self, _):
+        """Test that users skipped on an open circuit are reported."""
+        breaker._open("users/:id")
+        user_infos, skipped = Intra().get_user_infos_thr([1, 2])
+
+        self.assertEqual(user_infos, [])
+        self.assertEqual(sorted(skipped), [1, 2])
+
+
+def _user_data(level=4.2):
+    return {
+        "id": 1,
+        "login": "alice",
+        "cursus_users": [
+            {"cursus_id": 9, "level": 8.0, "blackholed_at": None},
+            {"cursus_id": 21, "level": level, "blackholed_at": None},
+        ],
+        "projects_users": [
+            {
+                "cursus_ids": [21],
+                "final_mark": 100,
+                "occurrence": 0,
+                "project": {"slug": "libft"},
+            },
+            {
+                "cursus_ids": [9],
+                "final_mark": 50,
+                "occurrence": 1,
+                "project": {"slug": "c-piscine-shell-00"},
+            },
+        ],
+    }
+
+
+class IntraUserTest(TestCase):
+    """Test cases for the IntraUser lookups."""
+
+    def test_lookups(self):
+        """Test that lookups by cursus and slug read the indexes."""
+        user = IntraUser("alice", _user_data())
+
+        self.assertEqual(user.level(21), 4.2)
+        self.assertEqual(user.level(3), 0)
+        self.assertEqual(user.project_final_mark(21, "libft"), 100)
+        self.assertIsNone(user.project_final_mark(9, "libft"))
+        self.assertEqual(user.project(9, "c-piscine-shell-00")["final_mark"], 50)
+        self.assertEqual(user.project(21, "c-piscine-shell-00"), {})
+        self.assertEqual(len(user.project_users(21)), 1)
+        self.assertIsNone(user.blackholed_at(21))
+        with self.assertRaises(ValueError):
+            user.blackholed_at(3)
+
+    def test_data_replacement_invalidates_indexes(self):
+        """Test that replacing data, as a refresh does, rebuilds the indexes."""
+        user = IntraUser("alice", _user_data(level=4.2))
+        self.assertEqual(user.level(21), 4.2)
+
+        user.data = _user_data(level=5.5)
+        self.assertEqual(user.level(21), 5.5)
+
+    def test_slots_and_disabled_methods(self):
+        """Test that users have no instance dict and superclass listings are disabled."""
+        user = IntraUser("alice", _user_data())
+
+        self.assertFalse(hasattr(user, "__dict__"))
+        with self.assertRaises(Exception):
+            user.users({})
+        with self.assertRaises(Exception):
+            user.pools()
+
+
+class CadetRecordTest(TestCase):
+    """Test cases for the compact cadet records."""
+
+    def test_from_api_keeps_used_fields_only(self):
+        """Test that decoding drops unused payload and answers lookups."""
+        data = _user_data()
+        data["achievements"] = [{"id": 1}] * 100
+        data["projects_users"][0]["updated_at"] = "2024-01-01T00:00:00Z"
+        record = CadetRecord.from_api(data)
+
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertFalse(hasattr(record, "achievements"))
+        self.assertEqual(record.level(21), 4.2)
+        self.assertEqual(record.level(3), 0)
+        self.assertEqual(record.project(21, "libft").final_mark, 100)
+        self.assertIsNone(record.project(9, "libft"))
+        self.assertEqual(record.total_tries(9), 2)
+        self.assertEqual(
+            record.days_inactive(21, now=datetime(2024, 1, 11, tzinfo=timezone.utc)),
+            10,
+        )
+
+    def test_from_snapshot(self):
+        """Test that a snapshot's creation date is kept."""
+        created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        snapshot = SimpleNamespace(data=_user_data(), created=created)
+
+        self.assertEqual(CadetRecord.from_snapshot(snapshot).snapshot_at, created)
+
+
+class ORJSONRendererTest(TestCase):
+    """Test cases for the orjson renderer and parser."""
+
+    def test_render_matches_json_renderer(self):
+        """Test that output decodes to the same data as the default renderer."""
+        data = {
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "created": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            "score": Decimal("1.50"),
+            "data": {"cursus_users": [{"level": 4.2, "grade": None}], 1: "a"},
+        }
+        expected = json.loads(JSONRenderer().render(None, data, response_status=200))
+        rendered = json.loads(ORJSONRenderer().render(None, data, response_status=200))
+
+        self.assertEqual(rendered.pop("created"), "2024-01-02T03:04:05Z")
+        expected.pop("created")
+        self.assertEqual(rendered, expected)
+
+    def test_parse_body(self):
+        """Test that request bodies are parsed."""
+        request = SimpleNamespace(body=b'{"logins": ["a", "b"]}')
+
+        self.assertEqual(ORJSONParser().parse_body(request), {"logins": ["a", "b"]})
+
+
+class LTTBTest(TestCase):
+    """Test cases for the LTTB downsampling."""
+
+    def test_short_series_unchanged(self):
+        """Test that series within the threshold are returned as is."""
+        points = [(0, 1), (1, 2), (2, 3)]
+
+        self.assertEqual(lttb(points, 3), points)
+
+    def test_keeps_ends_and_peaks(self):
+        """Test that the first, last and extreme points are kept."""
+        points = [(i, 0) for i in range(100)]
+        points[37] = (37, 50)
+        points[80] = (80, -20)
+        sampled = lttb(points, 10)
+
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual(sampled[0], points[0])
+        self.assertEqual(sampled[-1], points[-1])
+        self.assertIn((37, 50), sampled)
+        self.assertIn((80, -20), sampled)
+        self.assertEqual(sampled, sorted(sampled))
+
+    def test_invalid_threshold(self):
+        """Test that fewer than 3 points cannot be asked for."""
+        with self.assertRaises(ValueError):
+            lttb([(0, 0)] * 5, 2)
@@ -0,0 +1,8 @@
+"""
+Helpers shared by the test suites of every app.
+"""
+
+# in-process cache, for tests touching the cache without a Redis server
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
@@ -1,9 +1,17 @@
 from django.contrib import admin
 
 from appdata.models.cadetmetas import CadetMeta
-from appdata.models.intras import IntraProfile
+from appdata.models.dashboards import DashboardAggregate
+from appdata.models.evaluations import CorrectionPointEvent, ScaleTeam
+from appdata.models.intras import CursusUser, IntraProfile
+from appdata.models.projects import Project
 
 
 # Register your models here.
 admin.site.register(CadetMeta)
 admin.site.register(IntraProfile)
+admin.site.register(CursusUser)
+admin.site.register(CorrectionPointEvent)
+admin.site.register(ScaleTeam)
+admin.site.register(Project)
+admin.site.register(DashboardAggregate)
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:48
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appdata", "0003_alter_intraprofile_login"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="intraprofile",
+            name="email",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="intraprofile",
+            name="first_name",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="intraprofile",
+            name="last_name",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.CreateModel(
+            name="CursusUser",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("cursus_id", models.IntegerField()),
+                ("intra_id", models.IntegerField(blank=True, null=True)),
+                ("level", models.FloatField(default=0)),
+                ("grade", models.CharField(blank=True, max_length=255, null=True)),
+                ("begin_at", models.DateTimeField(blank=True, null=True)),
+                ("end_at", models.DateTimeField(blank=True, null=True)),
+                ("blackholed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="appdata.intraprofile",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("profile", "cursus_id"),
+                        name="unique_cursususer_profile_cursus",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:52
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appdata", "0004_cursususer_intraprofile_identity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CorrectionPointEvent",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("intra_id", models.IntegerField(unique=True)),
+                ("reason", models.CharField(max_length=255)),
+                ("sum", models.IntegerField()),
+                ("total", models.IntegerField(blank=True, null=True)),
+                ("scale_team_id", models.IntegerField(blank=True, null=True)),
+                ("occurred_at", models.DateTimeField()),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="appdata.intraprofile",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["profile", "-intra_id"],
+                        name="appdata_cor_profile_548ef0_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:53
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appdata", "0005_correctionpointevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScaleTeam",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("intra_id", models.IntegerField(unique=True)),
+                ("corrector_id", models.IntegerField(blank=True, null=True)),
+                (
+                    "corrected_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(), default=list, size=None
+                    ),
+                ),
+                ("project_id", models.IntegerField(blank=True, null=True)),
+                ("final_mark", models.IntegerField(blank=True, null=True)),
+                ("flag", models.CharField(blank=True, max_length=255, null=True)),
+                ("begin_at", models.DateTimeField(blank=True, null=True)),
+                ("filled_at", models.DateTimeField(blank=True, null=True)),
+                ("intra_updated_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["corrector_id"], name="appdata_sca_correct_85f71f_idx"
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["corrected_ids"], name="appdata_sca_correct_b5c1aa_gin"
+                    ),
+                    models.Index(
+                        fields=["-intra_updated_at"],
+                        name="appdata_sca_intra_u_70176e_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
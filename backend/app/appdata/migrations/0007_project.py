@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:59
+
+import django.contrib.postgres.fields
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appdata", "0006_scaleteam"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Project",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("intra_id", models.IntegerField(unique=True)),
+                ("slug", models.CharField(db_index=True, max_length=255)),
+                ("name", models.CharField(max_length=255)),
+                (
+                    "cursus_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(), default=list, size=None
+                    ),
+                ),
+                ("exam", models.BooleanField(default=False)),
+                ("solo", models.BooleanField(default=False)),
+                ("parent_id", models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["intra_id"],
+            },
+        ),
+    ]
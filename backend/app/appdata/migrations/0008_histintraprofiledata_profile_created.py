@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 00:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appdata", "0007_project"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="histintraprofiledata",
+            index=models.Index(
+                fields=["profile", "-created"], name="appdata_his_profile_c7cda6_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-19 00:17
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appdata", "0008_histintraprofiledata_profile_created"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="cadetmeta",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["note"], name="cadetmeta_note_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="intraprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["login"],
+                name="intraprofile_login_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="intraprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["first_name"],
+                name="intraprofile_first_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="intraprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["last_name"],
+                name="intraprofile_last_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="intraprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["email"],
+                name="intraprofile_email_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-19 00:25
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appdata", "0009_cadet_search_trgm"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardAggregate",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("metric", models.CharField(max_length=50)),
+                ("key", models.CharField(max_length=255)),
+                ("count", models.IntegerField()),
+                ("position", models.IntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["metric", "position"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("metric", "key"),
+                        name="unique_dashboardaggregate_metric_key",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+from dateutil.parser import isoparse
+from django.db import migrations
+
+BATCH_SIZE = 500
+IDENTITY_FIELDS = ["email", "first_name", "last_name"]
+
+
+def _parse_dt(value):
+    return isoparse(value) if value else None
+
+
+def backfill_cursususer_identity(apps, schema_editor):
+    """
+    Fills CursusUser rows and the IntraProfile identity fields from each profile's
+    latest snapshot, so readers of these columns do not wait for the next full sync.
+    Rows already written by a sync are kept.
+    """
+    HistIntraProfileData = apps.get_model("appdata", "HistIntraProfileData")
+    IntraProfile = apps.get_model("appdata", "IntraProfile")
+    CursusUser = apps.get_model("appdata", "CursusUser")
+
+    latest = (
+        HistIntraProfileData.objects.order_by("profile", "-created")
+        .distinct("profile")
+        .values_list("profile_id", "data")
+    )
+    profiles, cursus_users = [], []
+    for profile_id, data in latest.iterator(chunk_size=BATCH_SIZE):
+        profiles.append(
+            IntraProfile(
+                id=profile_id,
+                **{field: data.get(field) or "" for field in IDENTITY_FIELDS},
+            )
+        )
+        cursus_users += [
+            CursusUser(
+                profile_id=profile_id,
+                cursus_id=cursus_user["cursus_id"],
+                intra_id=cursus_user.get("id"),
+                level=cursus_user.get("level") or 0,
+                grade=cursus_user.get("grade"),
+                begin_at=_parse_dt(cursus_user.get("begin_at")),
+                end_at=_parse_dt(cursus_user.get("end_at")),
+                blackholed_at=_parse_dt(cursus_user.get("blackholed_at")),
+            )
+            for cursus_user in data.get("cursus_users") or []
+        ]
+        if len(profiles) >= BATCH_SIZE:
+            _save(IntraProfile, CursusUser, profiles, cursus_users)
+            profiles, cursus_users = [], []
+    _save(IntraProfile, CursusUser, profiles, cursus_users)
+
+
+def _save(IntraProfile, CursusUser, profiles, cursus_users):
+    # identity fields are only filled where a sync has not set them yet
+    for profile in profiles:
+        IntraProfile.objects.filter(id=profile.id, email="").update(
+            **{field: getattr(profile, field) for field in IDENTITY_FIELDS}
+        )
+    CursusUser.objects.bulk_create(cursus_users, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appdata", "0010_dashboardaggregate"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_cursususer_identity, migrations.RunPython.noop),
+    ]
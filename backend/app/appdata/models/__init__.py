@@ -1,2 +1,5 @@
 from .intras import *  # noqa
 from .cadetmetas import *  # noqa
+from .evaluations import *  # noqa
+from .projects import *  # noqa
+from .dashboards import *  # noqa
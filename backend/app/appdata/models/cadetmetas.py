@@ -1,4 +1,5 @@
 from appcore.models.commons import BaseAutoDate, BaseUUID
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 
@@ -15,5 +16,14 @@ class CadetMeta(BaseAutoDate, BaseUUID):
     login = models.CharField(max_length=255, unique=True)
     note = models.TextField(default="")
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                name="cadetmeta_note_trgm",
+                fields=["note"],
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
     def __str__(self):
         return self.login
@@ -0,0 +1,30 @@
+from django.db import models
+
+from appcore.models.commons import BaseAutoDate, BaseUUID
+
+
+class DashboardAggregate(BaseAutoDate, BaseUUID):
+    """
+    Precomputed dashboard counts, rebuilt after each sync by refresh_dashboard_aggregates.
+    metric: enrollment | blackhole | level | pool
+    key: the bucket within the metric ex. cadet, in 14 days, 4, 2024 july
+    count: the number of cadets in the bucket
+    position: display order of the bucket within the metric
+    """
+
+    metric = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    count = models.IntegerField()
+    position = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["metric", "position"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["metric", "key"],
+                name="unique_dashboardaggregate_metric_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} - {self.key}: {self.count}"
@@ -0,0 +1,74 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models
+
+from appcore.models.commons import BaseAutoDate, BaseUUID
+from appdata.models.intras import IntraProfile
+
+
+class CorrectionPointEvent(BaseAutoDate, BaseUUID):
+    """
+    A correction point historic of a given intra profile, append-only on intra.
+    intra_id: the correction_point_historic ID on intra, increasing over time
+    reason: ex. Earning after defense, Defense plannification
+    sum: the amount of points added (negative when removed)
+    total: the correction points of the user after the event
+    scale_team_id: the evaluation the event comes from, None if none
+    occurred_at: when the event happened on intra
+    """
+
+    profile = models.ForeignKey(
+        IntraProfile,
+        on_delete=models.CASCADE,
+    )
+    intra_id = models.IntegerField(unique=True)
+    reason = models.CharField(max_length=255)
+    sum = models.IntegerField()
+    total = models.IntegerField(null=True, blank=True)
+    scale_team_id = models.IntegerField(null=True, blank=True)
+    occurred_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["profile", "-intra_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.profile} - {self.reason} {self.sum}"
+
+
+class ScaleTeam(BaseAutoDate, BaseUUID):
+    """
+    An evaluation of the campus, ingested in bulk from the scale_teams listing.
+    Users are referenced by their intra ID, so evaluations of cadets without
+    an IntraProfile are kept too.
+    intra_id: the scale_team ID on intra
+    corrector_id: the intra ID of the evaluator, None for supervisors and hidden correctors
+    corrected_ids: the intra IDs of the evaluated team members
+    project_id: the intra ID of the evaluated project
+    final_mark: None until the evaluation is filled
+    flag: ex. Ok, Outstanding project, Cheat
+    begin_at: when the evaluation is scheduled
+    filled_at: when the evaluation was filled, None if not yet
+    intra_updated_at: last update on intra, used to ingest incrementally
+    """
+
+    intra_id = models.IntegerField(unique=True)
+    corrector_id = models.IntegerField(null=True, blank=True)
+    corrected_ids = ArrayField(models.IntegerField(), default=list)
+    project_id = models.IntegerField(null=True, blank=True)
+    final_mark = models.IntegerField(null=True, blank=True)
+    flag = models.CharField(max_length=255, null=True, blank=True)
+    begin_at = models.DateTimeField(null=True, blank=True)
+    filled_at = models.DateTimeField(null=True, blank=True)
+    intra_updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["corrector_id"]),
+            GinIndex(fields=["corrected_ids"]),
+            models.Index(fields=["-intra_updated_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.intra_id} - {self.corrector_id} -> {self.corrected_ids}"
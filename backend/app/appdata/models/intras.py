@@ -1,5 +1,6 @@
 from appcore.models.commons import BaseAutoDate, BaseUUID
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 
@@ -13,6 +14,7 @@ class IntraProfile(BaseAutoDate, BaseUUID):
     pool_month: the month the user joined the pool
     pool_year: the year the user joined the pool
     cursus_ids: the cursus IDs the user is in
+    email, first_name, last_name: identity of the user, kept by both the full and the cursus sync
     """
 
     login = models.CharField(
@@ -27,6 +29,34 @@ class IntraProfile(BaseAutoDate, BaseUUID):
     pool_month = models.CharField(max_length=100, null=True, blank=True)
     pool_year = models.CharField(max_length=100, null=True, blank=True)
     cursus_ids = ArrayField(models.IntegerField(), default=list)
+    email = models.CharField(max_length=255, default="", blank=True)
+    first_name = models.CharField(max_length=255, default="", blank=True)
+    last_name = models.CharField(max_length=255, default="", blank=True)
+
+    class Meta:
+        indexes = [
+            # trigram indexes for the fuzzy search, see query_search_profiles
+            GinIndex(
+                name="intraprofile_login_trgm",
+                fields=["login"],
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                name="intraprofile_first_name_trgm",
+                fields=["first_name"],
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                name="intraprofile_last_name_trgm",
+                fields=["last_name"],
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                name="intraprofile_email_trgm",
+                fields=["email"],
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
 
     def __str__(self):
         return self.login
@@ -47,5 +77,47 @@ class HistIntraProfileData(BaseAutoDate, BaseUUID):
     )
     data = models.JSONField()
 
+    class Meta:
+        indexes = [
+            # latest snapshot per profile, see query_latest_hist_intra_profile_data
+            models.Index(fields=["profile", "-created"]),
+        ]
+
     def __str__(self):
         return f"{self.profile} - {self.created}"
+
+
+class CursusUser(BaseAutoDate, BaseUUID):
+    """
+    Latest cursus fields of a given intra profile, one row per (profile, cursus).
+    Refreshed in bulk from the /cursus/:id/cursus_users listing by the lightweight cursus sync,
+    and from each snapshot by the full sync.
+    intra_id: the cursus_user ID on intra
+    level: the level of the user in the cursus
+    grade: the grade of the user in the cursus ex. Learner, Member
+    begin_at, end_at: the cursus dates
+    blackholed_at: the blackhole date, None if none
+    """
+
+    profile = models.ForeignKey(
+        IntraProfile,
+        on_delete=models.CASCADE,
+    )
+    cursus_id = models.IntegerField()
+    intra_id = models.IntegerField(null=True, blank=True)
+    level = models.FloatField(default=0)
+    grade = models.CharField(max_length=255, null=True, blank=True)
+    begin_at = models.DateTimeField(null=True, blank=True)
+    end_at = models.DateTimeField(null=True, blank=True)
+    blackholed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["profile", "cursus_id"],
+                name="unique_cursususer_profile_cursus",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.profile} - {self.cursus_id}"
@@ -0,0 +1,30 @@
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+
+from appcore.models.commons import BaseAutoDate, BaseUUID
+
+
+class Project(BaseAutoDate, BaseUUID):
+    """
+    Project catalog, refreshed from the /cursus/:id/projects listings.
+    intra_id: the project ID on intra
+    slug: ex. libft
+    cursus_ids: the cursus IDs the project is listed in
+    exam: whether the project is an exam
+    solo: whether the project is done alone
+    parent_id: the intra ID of the parent project, None if top-level ex. piscine days
+    """
+
+    intra_id = models.IntegerField(unique=True)
+    slug = models.CharField(max_length=255, db_index=True)
+    name = models.CharField(max_length=255)
+    cursus_ids = ArrayField(models.IntegerField(), default=list)
+    exam = models.BooleanField(default=False)
+    solo = models.BooleanField(default=False)
+    parent_id = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["intra_id"]
+
+    def __str__(self):
+        return self.slug
@@ -1,5 +1,13 @@
+import re
+
+from django.db.models import Func, JSONField, QuerySet, Value
+from django.db.models.fields.json import KeyTransform
+
 from appdata.models.intras import HistIntraProfileData
 
+FIELD_PATH_RE = re.compile(r"^[\w-]+(\.[\w-]+)*$")
+MAX_FIELD_PATHS = 50
+
 
 def query_latest_hist_intra_profile_data():
     """
@@ -13,3 +21,56 @@ def query_latest_hist_intra_profile_data():
     )
 
     return qs
+
+
+def parse_field_paths(fields: str) -> list[str]:
+    """
+    Parses a comma separated list of dotted JSON paths, ex. "login,image.link"
+    Raises:
+        ValueError: if a path is malformed or there are too many paths
+    """
+    paths = [i.strip() for i in fields.split(",") if i.strip()]
+    if not paths or len(paths) > MAX_FIELD_PATHS:
+        raise ValueError(f"Expected 1 to {MAX_FIELD_PATHS} field paths")
+    for path in paths:
+        if not FIELD_PATH_RE.match(path):
+            raise ValueError(f"Invalid field path {path}")
+
+    return paths
+
+
+def _build_object(tree: dict, prefix: list[str]) -> Func:
+    args = []
+    for key, subtree in tree.items():
+        path = [*prefix, key]
+        if subtree:
+            value = _build_object(subtree, path)
+        else:
+            value = "data"
+            for segment in path:
+                value = KeyTransform(segment, value)
+        args += [Value(key), value]
+
+    return Func(*args, function="jsonb_build_object", output_field=JSONField())
+
+
+def with_sparse_data(qs: QuerySet, paths: list[str]) -> QuerySet:
+    """
+    Selects only the given JSON paths of data in SQL, as sparse_data, and defers data.
+    Nested paths keep their nesting, ex. ["login", "image.link"] gives
+    {"login": ..., "image": {"link": ...}}, missing keys are null and arrays are
+    selected whole.
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        segments = path.split(".")
+        for segment in segments[:-1]:
+            # a selected parent wins over its children
+            if node.get(segment) == {}:
+                break
+            node = node.setdefault(segment, {})
+        else:
+            node[segments[-1]] = {}
+
+    return qs.annotate(sparse_data=_build_object(tree, [])).defer("data")
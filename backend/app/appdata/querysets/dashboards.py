@@ -0,0 +1,93 @@
+from calendar import month_name
+from datetime import datetime, timedelta
+
+from django.db.models import Case, CharField, Count, Q, QuerySet, Value, When
+from django.db.models.functions import Floor
+
+from appdata.models.intras import CursusUser, IntraProfile
+
+MAIN_CURSUS_ID = 21
+MONTHS = [m.lower() for m in month_name]
+# bh_chaser buckets, on whole days left: in 14 days, in 14-30 days, in 45 days
+BLACKHOLE_BUCKETS = {
+    "in 14 days": (None, 15),
+    "in 14-30 days": (15, 31),
+    "in 45 days": (None, 46),
+}
+
+
+def query_enrollment_counts() -> QuerySet:
+    """
+    Counts profiles per enrollment, as resolved by the cadet status endpoint:
+    cadet if in the main cursus, no-cursus if in none, pisciner otherwise
+    """
+    return (
+        IntraProfile.objects.annotate(
+            enrollment=Case(
+                When(cursus_ids__contains=[MAIN_CURSUS_ID], then=Value("cadet")),
+                When(
+                    Q(cursus_ids__len=0) | Q(cursus_ids__len__isnull=True),
+                    then=Value("no-cursus"),
+                ),
+                default=Value("pisciner"),
+                output_field=CharField(),
+            )
+        )
+        .values("enrollment")
+        .annotate(count=Count("id"))
+        .order_by("enrollment")
+    )
+
+
+def query_blackhole_counts(now: datetime) -> dict:
+    """
+    Counts main cursus users per blackhole bucket, in a single query.
+    Like bh_chaser, blackholes older than a day are left out and buckets use
+    whole days left, so in 14 days is anything before now + 15 days.
+    """
+    upcoming = CursusUser.objects.filter(
+        cursus_id=MAIN_CURSUS_ID,
+        blackholed_at__gte=now - timedelta(days=1),
+    )
+    counts = {}
+    for i, (start, end) in enumerate(BLACKHOLE_BUCKETS.values()):
+        bucket = Q(blackholed_at__lt=now + timedelta(days=end))
+        if start is not None:
+            bucket &= Q(blackholed_at__gte=now + timedelta(days=start))
+        counts[f"bucket_{i}"] = Count("id", filter=bucket)
+    counts = upcoming.aggregate(**counts)
+
+    return {key: counts[f"bucket_{i}"] for i, key in enumerate(BLACKHOLE_BUCKETS)}
+
+
+def query_level_histogram() -> QuerySet:
+    """
+    Counts main cursus users per whole level
+    """
+    return (
+        CursusUser.objects.filter(cursus_id=MAIN_CURSUS_ID)
+        .annotate(bucket=Floor("level"))
+        .values("bucket")
+        .annotate(count=Count("id"))
+        .order_by("bucket")
+    )
+
+
+def query_pool_counts() -> list[dict]:
+    """
+    Counts profiles per pool year and month, oldest pool first
+    """
+    qs = (
+        IntraProfile.objects.filter(pool_year__isnull=False, pool_month__isnull=False)
+        .values("pool_year", "pool_month")
+        .annotate(count=Count("id"))
+    )
+
+    return sorted(
+        qs,
+        key=lambda i: (
+            i["pool_year"],
+            MONTHS.index(i["pool_month"]) if i["pool_month"] in MONTHS else 13,
+            i["pool_month"],
+        ),
+    )
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from django.db.models import F, Func, IntegerField, OuterRef, Q, QuerySet, Subquery
+
+from appdata.models.evaluations import ScaleTeam
+
+
+def _count(qs: QuerySet) -> Subquery:
+    """
+    Wraps a filtered ScaleTeam queryset into a correlated COUNT subquery.
+    COUNT is used as a plain function so no GROUP BY is added.
+    """
+    return Subquery(
+        qs.order_by().annotate(n=Func(F("id"), function="COUNT")).values("n"),
+        output_field=IntegerField(),
+    )
+
+
+def query_evaluation_stats(
+    profiles: QuerySet,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> QuerySet:
+    """
+    Annotates intra profiles with their evaluation counts from ingested scale teams,
+    in a single query. Only filled evaluations are counted, on both sides.
+    evaluations_done: filled evaluations done as evaluator
+    evaluations_received: filled evaluations of the cadet's teams
+    Point flows are summed from CorrectionPointEvent, see correction_point_gainloss.
+    Args:
+        profiles: IntraProfile queryset
+        since, until: optional bounds on the evaluation begin_at
+    """
+    filters = Q(filled_at__isnull=False)
+    if since:
+        filters &= Q(begin_at__gte=since)
+    if until:
+        filters &= Q(begin_at__lt=until)
+    scale_teams = ScaleTeam.objects.filter(filters)
+
+    return profiles.annotate(
+        evaluations_done=_count(scale_teams.filter(corrector_id=OuterRef("intra_id"))),
+        evaluations_received=_count(
+            scale_teams.filter(corrected_ids__contains=[OuterRef("intra_id")])
+        ),
+    )
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from django.db.models import F, Func, JSONField, QuerySet, Value
+from django.db.models.fields.json import KeyTransform
+
+from appdata.models.intras import HistIntraProfileData
+
+# level of the cursus given as $cursus_id, from the snapshot's cursus_users
+LEVEL_PATH = "$.cursus_users[*] ? (@.cursus_id == $cursus_id).level"
+
+
+def query_profile_as_of(login: str, at: datetime) -> QuerySet:
+    """
+    Returns the snapshots of the given login taken at or before at, latest first.
+    The first row is an index seek on (profile, -created).
+    """
+    return HistIntraProfileData.objects.filter(
+        profile__login=login, created__lte=at
+    ).order_by("-created")
+
+
+def query_progression(
+    logins: list[str],
+    since: datetime | None = None,
+    until: datetime | None = None,
+    cursus_id: int = 21,
+) -> QuerySet:
+    """
+    Returns (login, created, level, correction_point) of the last snapshot of each
+    day of the given logins, ordered by login and date.
+    Values are extracted from the JSON data in SQL, level is None when the cadet
+    is not in the cursus.
+    """
+    qs = HistIntraProfileData.objects.filter(profile__login__in=logins)
+    if since:
+        qs = qs.filter(created__gte=since)
+    if until:
+        qs = qs.filter(created__lt=until)
+
+    return (
+        qs.annotate(
+            level=Func(
+                F("data"),
+                Value(LEVEL_PATH),
+                Func(
+                    Value("cursus_id"),
+                    Value(cursus_id),
+                    function="jsonb_build_object",
+                ),
+                function="jsonb_path_query_first",
+                output_field=JSONField(),
+            ),
+            correction_point=KeyTransform("correction_point", "data"),
+        )
+        .order_by("profile__login", "created__date", "-created")
+        .distinct("profile__login", "created__date")
+        .values_list("profile__login", "created", "level", "correction_point")
+    )
@@ -0,0 +1,38 @@
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import FloatField, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from appdata.models.cadetmetas import CadetMeta
+from appdata.models.intras import IntraProfile
+
+SEARCH_FIELDS = ["login", "first_name", "last_name", "email"]
+
+
+def query_search_profiles(q: str) -> QuerySet:
+    """
+    Returns the profiles fuzzily matching q on login, first_name, last_name, email
+    or their CadetMeta note, ranked by best trigram word similarity.
+    Served by the gin_trgm_ops indexes, notes of logins without a profile are not searched.
+    """
+    noted_logins = CadetMeta.objects.filter(note__trigram_word_similar=q).values(
+        "login"
+    )
+    note_rank = (
+        CadetMeta.objects.filter(login=OuterRef("login"))
+        .annotate(rank=TrigramWordSimilarity(q, "note"))
+        .values("rank")[:1]
+    )
+    matches = Q(login__in=noted_logins)
+    for field in SEARCH_FIELDS:
+        matches |= Q(**{f"{field}__trigram_word_similar": q})
+
+    return (
+        IntraProfile.objects.filter(matches)
+        .annotate(
+            rank=Greatest(
+                *[TrigramWordSimilarity(q, field) for field in SEARCH_FIELDS],
+                Coalesce(Subquery(note_rank), 0.0, output_field=FloatField()),
+            )
+        )
+        .order_by("-rank", "login")
+    )
@@ -1,9 +1,25 @@
+import csv
+import json
+from typing import Literal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from ninja import Router
+from ninja.decorators import decorate_view
+from ninja.errors import HttpError
 
 from ninja.pagination import paginate
-from appcore.services.paginate_queryset import PageNumberPaginationExt
+from appcore.services.paginate_queryset import (
+    CursorPagination,
+    PageNumberPaginationExt,
+)
+from appcore.services.response_cache import bump_data_version, cache_response
 from appdata.models.cadetmetas import CadetMeta
-from appdata.querysets.cadetmeta import query_latest_hist_intra_profile_data
+from appdata.querysets.cadetmeta import (
+    parse_field_paths,
+    query_latest_hist_intra_profile_data,
+    with_sparse_data,
+)
 from appdata.serializers.cadetmeta import (
     CadetmetaGetOut,
     CadetmetaPatchIn,
@@ -13,6 +29,92 @@ from appdata.serializers.cadetmeta import (
 
 router = Router(tags=["cadet-meta"])
 
+# rows fetched per round trip of the export server-side cursor
+EXPORT_CHUNK_SIZE = 500
+EXPORT_COLUMNS = ["id", "profile", "created", "updated"]
+
+
+def _field_paths(fields: str | None) -> list[str] | None:
+    if fields is None:
+        return None
+    try:
+        return parse_field_paths(fields)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+
+def _latest_hist_intra_profile_data(fields: str | None):
+    qs = query_latest_hist_intra_profile_data()
+    paths = _field_paths(fields)
+    if paths is None:
+        return qs
+
+    return with_sparse_data(qs, paths)
+
+
+class _Echo:
+    """File-like object for csv.writer, returns the written line"""
+
+    def write(self, value):
+        return value
+
+
+def _get_path(data, path: str):
+    for key in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+async def _export_rows(paths: list[str] | None):
+    """
+    Yields the latest snapshots as dicts, through a server-side cursor
+    """
+    qs = query_latest_hist_intra_profile_data()
+    data_field = "data"
+    if paths is not None:
+        qs = with_sparse_data(qs, paths)
+        data_field = "sparse_data"
+    # values() and not values_list(), whose aiterator runs the query outside a thread
+    rows = qs.values("id", "profile_id", "created", "updated", data_field)
+    async for row in rows.aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            "id": row["id"],
+            "profile": row["profile_id"],
+            "created": row["created"],
+            "updated": row["updated"],
+            "data": row[data_field],
+        }
+
+
+async def _export_ndjson(paths: list[str] | None):
+    async for row in _export_rows(paths):
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    return value
+
+
+async def _export_csv(paths: list[str] | None):
+    """
+    One column per field path, or a data column holding the JSON data,
+    objects and arrays are JSON encoded.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow([*EXPORT_COLUMNS, *(paths or ["data"])])
+    async for row in _export_rows(paths):
+        if paths is None:
+            values = [row["data"]]
+        else:
+            values = [_get_path(row["data"], i) for i in paths]
+        yield writer.writerow(
+            [row[i] for i in EXPORT_COLUMNS] + [_csv_value(i) for i in values]
+        )
+
 
 @router.get(
     "/latest/",
@@ -20,12 +122,53 @@ router = Router(tags=["cadet-meta"])
         200: list[GetLastestCadetMetaOut],
     },
 )
+@decorate_view(cache_response())
 @paginate(PageNumberPaginationExt, page_size=100)
-def get_latest_cadetmeta(request):
+async def get_latest_cadetmeta(request, fields: str | None = None):
     """
     Get the latest cadetmeta of all users
+    fields: comma separated JSON paths of data to return, ex. login,image.link
+    """
+    return _latest_hist_intra_profile_data(fields)
+
+
+@router.get(
+    "/latest/cursor/",
+    response={
+        200: list[GetLastestCadetMetaOut],
+    },
+)
+@decorate_view(cache_response())
+@paginate(CursorPagination, ordering=("profile_id",), page_size=100)
+async def get_latest_cadetmeta_cursor(request, fields: str | None = None):
+    """
+    Get the latest cadetmeta of all users, keyset paginated on profile
+    Pass the returned next as cursor to get the following page, count=true to get the total.
+    fields: comma separated JSON paths of data to return, ex. login,image.link
+    """
+    return _latest_hist_intra_profile_data(fields)
+
+
+@router.get("/latest/export/")
+async def export_latest_cadetmeta(
+    request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    fields: str | None = None,
+):
+    """
+    Streams the latest cadetmeta of all users as NDJSON or CSV, from async
+    generators so the export does not hold a worker thread under ASGI
+    fields: comma separated JSON paths of data to export, ex. login,image.link
     """
-    return query_latest_hist_intra_profile_data()
+    paths = _field_paths(fields)
+    if format == "csv":
+        response = StreamingHttpResponse(_export_csv(paths), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="cadetmeta.csv"'
+        return response
+
+    return StreamingHttpResponse(
+        _export_ndjson(paths), content_type="application/x-ndjson"
+    )
 
 
 @router.get(
@@ -34,12 +177,12 @@ def get_latest_cadetmeta(request):
         200: CadetmetaGetOut,
     },
 )
-def get_cadetmeta(request, login: str):
+async def get_cadetmeta(request, login: str):
     """
     Get the cadetmeta of a user for the given login
     If meta does not exist it creates one regardless of it being on intra or not.
     """
-    cadetmeta, _ = CadetMeta.objects.get_or_create(login=login)
+    cadetmeta, _ = await CadetMeta.objects.aget_or_create(login=login)
     return cadetmeta
 
 
@@ -58,4 +201,5 @@ def patch_cadetmeta(request, login: str, payload: CadetmetaPatchIn):
     for key, value in payload.dict().items():
         setattr(cadetmeta, key, value)
     cadetmeta.save()
+    bump_data_version()
     return cadetmeta
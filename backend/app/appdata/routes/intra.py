@@ -2,22 +2,97 @@
 Aggregates intra data
 """
 
+import datetime
+import math
 from typing import Literal
+from django.http import HttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from dateutil.parser import isoparse
-from ninja import Router
+from ninja import Query, Router
+from ninja.decorators import decorate_view
+from ninja.errors import HttpError
 
+from appcore.services.downsample import lttb
+from appcore.services.response_cache import cache_response
+from appdata.models.dashboards import DashboardAggregate
 from appdata.models.intras import HistIntraProfileData
-from appdata.serializers.intra import CadetStatusGetOut
+from appdata.querysets.cadetmeta import (
+    parse_field_paths,
+    query_latest_hist_intra_profile_data,
+    with_sparse_data,
+)
+from appdata.querysets.history import query_profile_as_of, query_progression
+from appdata.querysets.search import query_search_profiles
+from appdata.serializers.cadetmeta import GetLastestCadetMetaOut
+from appdata.serializers.intra import (
+    MAX_SEARCH_LIMIT,
+    MAX_SERIES_LOGINS,
+    MAX_SERIES_POINTS,
+    CadetSearchOut,
+    CadetSeriesOut,
+    CadetStatusBatchIn,
+    CadetStatusBatchItemOut,
+    CadetStatusGetOut,
+    DashboardAggregatesOut,
+)
 
 router = Router(tags=["intra-data"])
 
 
+def _blackholed_at(data) -> datetime.datetime | None:
+    """
+    Returns the blackhole date of the cadet's 42cursus
+    Args:
+        data: The intra profile data
+    Returns:
+        datetime | None: the blackhole date, None if not in 42cursus or without one
+    """
+    for cursus in data["cursus_users"]:
+        if cursus["cursus"]["slug"] == "42cursus":
+            if cursus["blackholed_at"] is None:
+                return None
+            return isoparse(cursus["blackholed_at"])
+
+    return None
+
+
+def _is_blackholed(data) -> bool:
+    """
+    Checks if the cadet's 42cursus is blackholed
+    Args:
+        data: The intra profile data
+    Returns:
+        bool: True if blackholed in 42cursus, False otherwise
+    """
+    blackholed_at = _blackholed_at(data)
+    return blackholed_at is not None and timezone.now() > blackholed_at
+
+
+def _resolve_enrollment(data) -> Literal["cadet", "pisciner", "no-cursus"]:
+    """
+    Resolves the enrollment status of the cadet
+    Args:
+        data: The intra profile data
+    Returns:
+        str: The enrollment status of the cadet
+    """
+    if len(data["cursus_users"]) == 0:
+        return "no-cursus"
+
+    for cursus in data["cursus_users"]:
+        if cursus["cursus"]["slug"] == "42cursus":
+            return "cadet"
+
+    return "pisciner"
+
+
 @router.get(
     "user/{login}/status/",
     response={200: CadetStatusGetOut, 404: None},
 )
-def get_cadet_status(request, login: str):
+@decorate_view(cache_response())
+async def get_cadet_status(request, login: str, response: HttpResponse):
     """
     Resolves the cadet status of the given login for the pedago usage\n
     ```
@@ -25,55 +100,174 @@ def get_cadet_status(request, login: str):
     enrollment: cadet | pisciner | no-cursus
     ```
     """
-
-    def _is_blackholed(data) -> bool:
-        """
-        Checks if the cadet's 42cursus is blackholed
-        Args:
-            data: The intra profile data
-        Returns:
-            bool: True if blackholed in 42cursus, False otherwise
-        """
-        for cursus in data["cursus_users"]:
-            if cursus["cursus"]["slug"] == "42cursus":
-                if cursus["blackholed_at"] is None:
-                    return False
-                return timezone.now() > isoparse(cursus["blackholed_at"])
-
-        return False
-
-    def _resolve_enrollment(data) -> Literal["cadet", "pisciner", "no-cursus"]:
-        """
-        Resolves the enrollment status of the cadet
-        Args:
-            data: The intra profile data
-        Returns:
-            str: The enrollment status of the cadet
-        """
-        if len(data["cursus_users"]) == 0:
-            return "no-cursus"
-
-        for cursus in data["cursus_users"]:
-            if cursus["cursus"]["slug"] == "42cursus":
-                return "cadet"
-
-        return "pisciner"
-
     q = (
-        HistIntraProfileData.objects.filter(profile__login=login)
+        await HistIntraProfileData.objects.filter(profile__login=login)
         .order_by("-created")
-        .first()
+        .afirst()
     )
 
     if q is None:
         return 404, None
 
     data = q.data
+    now = timezone.now()
+    blackholed_at = _blackholed_at(data)
+    if blackholed_at is not None and blackholed_at > now:
+        # blackholed flips at blackholed_at, the cached response must not outlive it
+        patch_cache_control(
+            response, max_age=math.ceil((blackholed_at - now).total_seconds())
+        )
 
     ret = {
         "updated": q.created,
-        "blackholed": _is_blackholed(data),
+        "blackholed": blackholed_at is not None and now > blackholed_at,
         "enrollment": _resolve_enrollment(data),
     }
 
     return 200, ret
+
+
+@router.post(
+    "status/batch/",
+    response={200: list[CadetStatusBatchItemOut]},
+)
+def get_cadet_status_batch(request, payload: CadetStatusBatchIn):
+    """
+    Resolves the cadet status of many logins at once, see get_cadet_status\n
+    Items follow the order of the given logins, without duplicates,
+    found is false for logins without intra data.
+    """
+    logins = list(dict.fromkeys(payload.logins))
+    qs = with_sparse_data(
+        query_latest_hist_intra_profile_data().filter(profile__login__in=logins),
+        ["cursus_users"],
+    ).select_related("profile")
+    latest = {}
+    for q in qs:
+        data = {"cursus_users": q.sparse_data["cursus_users"] or []}
+        latest[q.profile.login] = {
+            "login": q.profile.login,
+            "found": True,
+            "updated": q.created,
+            "blackholed": _is_blackholed(data),
+            "enrollment": _resolve_enrollment(data),
+        }
+
+    return 200, [
+        latest.get(login, {"login": login, "found": False}) for login in logins
+    ]
+
+
+@router.get(
+    "search/",
+    response={200: list[CadetSearchOut]},
+)
+async def search_cadets(
+    request,
+    q: str = Query(..., min_length=2),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT),
+):
+    """
+    Fuzzy search of cadets by login, first name, last name, email or note\n
+    Best matches first, rank is the trigram word similarity of the best matching field.
+    """
+    return 200, [i async for i in query_search_profiles(q)[:limit]]
+
+
+@router.get(
+    "aggregates/",
+    response={200: DashboardAggregatesOut},
+)
+async def get_dashboard_aggregates(request):
+    """
+    Dashboard counts, refreshed after each sync\n
+    ```
+    enrollment: cadets per cadet | pisciner | no-cursus
+    blackhole: main cursus blackholes in 14 days | in 14-30 days | in 45 days
+    level: main cursus users per whole level
+    pool: cadets per "<pool_year> <pool_month>"
+    computed: when the counts were refreshed, null before the first sync
+    ```
+    """
+    ret = {"computed": None}
+    async for i in DashboardAggregate.objects.all():
+        ret.setdefault(i.metric, {})[i.key] = i.count
+        ret["computed"] = i.created
+
+    return 200, ret
+
+
+@router.get(
+    "user/{login}/asof/",
+    response={200: GetLastestCadetMetaOut, 404: None},
+)
+async def get_cadet_as_of(
+    request, login: str, at: datetime.datetime, fields: str | None = None
+):
+    """
+    The intra data of the given login as it was at the given date,
+    from the latest snapshot taken at or before it\n
+    fields: comma separated JSON paths to return instead of the whole data, ex. login,image.link
+    """
+    qs = query_profile_as_of(login, at)
+    if fields is not None:
+        try:
+            qs = with_sparse_data(qs, parse_field_paths(fields))
+        except ValueError as e:
+            raise HttpError(400, str(e))
+    q = await qs.afirst()
+
+    if q is None:
+        return 404, None
+
+    return 200, q
+
+
+def _series(rows: list[tuple], max_points: int) -> list[tuple]:
+    """
+    Downsamples (created, value) rows with LTTB, rows without a value are dropped
+    """
+    points = [(t.timestamp(), v, t) for t, v in rows if v is not None]
+    return [(t, v) for _, v, t in lttb(points, max_points)]
+
+
+@router.get(
+    "series/",
+    response={200: list[CadetSeriesOut]},
+)
+async def get_cadet_series(
+    request,
+    logins: str,
+    since: datetime.datetime | None = None,
+    until: datetime.datetime | None = None,
+    cursus_id: int = 21,
+    max_points: int = Query(200, ge=3, le=MAX_SERIES_POINTS),
+):
+    """
+    Level and correction point series of the given logins between since and until\n
+    ```
+    logins: comma separated, at most 50
+    level: [date, level] in the given cursus
+    correction_point: [date, correction points]
+    ```
+    One point per day, the day's last snapshot, downsampled to max_points with LTTB.
+    Logins without snapshots in the range are left out.
+    """
+    logins = list(dict.fromkeys(i.strip() for i in logins.split(",") if i.strip()))
+    if not logins or len(logins) > MAX_SERIES_LOGINS:
+        raise HttpError(400, f"Expected 1 to {MAX_SERIES_LOGINS} logins")
+
+    rows = {}
+    async for login, created, level, correction_point in query_progression(
+        logins, since, until, cursus_id
+    ):
+        rows.setdefault(login, []).append((created, level, correction_point))
+
+    return 200, [
+        {
+            "login": login,
+            "level": _series([(t, lv) for t, lv, _ in days], max_points),
+            "correction_point": _series([(t, cp) for t, _, cp in days], max_points),
+        }
+        for login, days in rows.items()
+    ]
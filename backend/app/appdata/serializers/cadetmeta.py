@@ -23,3 +23,10 @@ class GetLastestCadetMetaOut(ModelSchema):
     class Meta:
         model = HistIntraProfileData
         fields = "__all__"
+
+    @staticmethod
+    def resolve_data(obj):
+        # only the requested paths when selected in SQL, see with_sparse_data
+        if hasattr(obj, "sparse_data"):
+            return obj.sparse_data
+        return obj.data
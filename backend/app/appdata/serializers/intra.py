@@ -1,9 +1,49 @@
 import datetime
 from typing import Literal
-from ninja import Schema
+from ninja import Field, Schema
+
+MAX_BATCH_LOGINS = 5000
+MAX_SEARCH_LIMIT = 100
+MAX_SERIES_LOGINS = 50
+MAX_SERIES_POINTS = 1000
 
 
 class CadetStatusGetOut(Schema):
     updated: datetime.datetime
     blackholed: bool
     enrollment: Literal["cadet", "pisciner", "no-cursus"]
+
+
+class CadetStatusBatchIn(Schema):
+    logins: list[str] = Field(..., max_length=MAX_BATCH_LOGINS)
+
+
+class CadetStatusBatchItemOut(Schema):
+    login: str
+    found: bool
+    updated: datetime.datetime | None = None
+    blackholed: bool | None = None
+    enrollment: Literal["cadet", "pisciner", "no-cursus"] | None = None
+
+
+class CadetSearchOut(Schema):
+    login: str | None
+    intra_id: int
+    first_name: str
+    last_name: str
+    email: str
+    rank: float
+
+
+class DashboardAggregatesOut(Schema):
+    computed: datetime.datetime | None = None
+    enrollment: dict[str, int] = {}
+    blackhole: dict[str, int] = {}
+    level: dict[str, int] = {}
+    pool: dict[str, int] = {}
+
+
+class CadetSeriesOut(Schema):
+    login: str
+    level: list[tuple[datetime.datetime, float]]
+    correction_point: list[tuple[datetime.datetime, int]]
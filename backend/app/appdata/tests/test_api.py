@@ -1,37 +1,61 @@
-from django.test import TestCase
-from ninja.testing import TestClient
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from asgiref.sync import async_to_sync, sync_to_async
+from ninja.testing import TestAsyncClient, TestClient
 from unittest.mock import patch, MagicMock
+from appcore.services.paginate_queryset import CursorPagination
+from appcore.services.response_cache import data_version
+from appcore.tests.utils import LOCMEM_CACHES
 from appdata.api import router
+from appdata.querysets.cadetmeta import (
+    query_latest_hist_intra_profile_data,
+    with_sparse_data,
+)
+from appdata.routes.cadetmeta import router as cadetmeta_router
+from appdata.routes.intra import router as intra_router
 from appdata.models.cadetmetas import CadetMeta
-from appdata.models.intras import IntraProfile, HistIntraProfileData
+from appdata.serializers.intra import (
+    MAX_BATCH_LOGINS,
+    MAX_SEARCH_LIMIT,
+    MAX_SERIES_LOGINS,
+)
+from appdata.models.intras import CursusUser, IntraProfile, HistIntraProfileData
 from appcore.services.auths import ServiceBearerTokenAuth
+from apptasks.services.dashboard_aggregates import refresh_dashboard_aggregates
+from apptasks.services.update_intraprofile import save_user_infos
 
 
 class CadetMetaAPITest(TestCase):
     """Test cases for CadetMeta API endpoints."""
     
     def setUp(self):
-        self.client = TestClient(router)
+        self.client = TestAsyncClient(router)
         # Create test data
         self.cadet_meta = CadetMeta.objects.create(
             login='testcadet',
             note='Test note'
         )
     
-    def test_get_cadetmeta_existing(self):
+    async def test_get_cadetmeta_existing(self):
         """Test getting existing cadetmeta."""
         with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
-            response = self.client.get('/cadetmeta/testcadet/')
+            response = await self.client.get('/cadetmeta/testcadet/')
         
         self.assertEqual(response.status_code, 200)
         data = response.json()
         self.assertEqual(data['login'], 'testcadet')
         self.assertEqual(data['note'], 'Test note')
     
-    def test_get_cadetmeta_creates_if_not_exists(self):
+    async def test_get_cadetmeta_creates_if_not_exists(self):
         """Test that getting non-existent cadetmeta creates it."""
         with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
-            response = self.client.get('/cadetmeta/newcadet/')
+            response = await self.client.get('/cadetmeta/newcadet/')
         
         self.assertEqual(response.status_code, 200)
         data = response.json()
@@ -39,12 +63,12 @@ class CadetMetaAPITest(TestCase):
         self.assertEqual(data['note'], '')
         
         # Verify it was created in database
-        self.assertTrue(CadetMeta.objects.filter(login='newcadet').exists())
+        self.assertTrue(await CadetMeta.objects.filter(login='newcadet').aexists())
     
-    def test_patch_cadetmeta_existing(self):
+    async def test_patch_cadetmeta_existing(self):
         """Test updating existing cadetmeta."""
         with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
-            response = self.client.patch('/cadetmeta/testcadet/', json={
+            response = await self.client.patch('/cadetmeta/testcadet/', json={
                 'note': 'Updated note'
             })
         
@@ -53,13 +77,13 @@ class CadetMetaAPITest(TestCase):
         self.assertEqual(data['note'], 'Updated note')
         
         # Verify in database
-        self.cadet_meta.refresh_from_db()
+        await self.cadet_meta.arefresh_from_db()
         self.assertEqual(self.cadet_meta.note, 'Updated note')
     
-    def test_patch_cadetmeta_creates_if_not_exists(self):
+    async def test_patch_cadetmeta_creates_if_not_exists(self):
         """Test that patching non-existent cadetmeta creates it."""
         with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
-            response = self.client.patch('/cadetmeta/anothernew/', json={
+            response = await self.client.patch('/cadetmeta/anothernew/', json={
                 'note': 'New cadet note'
             })
         
@@ -69,17 +93,17 @@ class CadetMetaAPITest(TestCase):
         self.assertEqual(data['note'], 'New cadet note')
         
         # Verify it was created in database
-        cadet = CadetMeta.objects.get(login='anothernew')
+        cadet = await CadetMeta.objects.aget(login='anothernew')
         self.assertEqual(cadet.note, 'New cadet note')
     
     @patch('appdata.routes.cadetmeta.query_latest_hist_intra_profile_data')
-    def test_get_latest_cadetmeta(self, mock_query):
+    async def test_get_latest_cadetmeta(self, mock_query):
         """Test getting latest cadetmeta list."""
         # Mock the query to return test data
         mock_query.return_value = []
         
         with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
-            response = self.client.get('/cadetmeta/latest/')
+            response = await self.client.get('/cadetmeta/latest/')
         
         self.assertEqual(response.status_code, 200)
         mock_query.assert_called_once()
@@ -100,4 +124,589 @@ class IntraAPITest(TestCase):
         self.hist_data = HistIntraProfileData.objects.create(
             profile=self.intra_profile,
             data={'test': 'data'}
-        )
\ No newline at end of file
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CursorPaginationTest(TestCase):
+    """Test cases for the keyset paginated latest cadetmeta listing."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = TestAsyncClient(cadetmeta_router)
+        for i in range(5):
+            profile = IntraProfile.objects.create(login=f'cadet{i}', intra_id=i)
+            HistIntraProfileData.objects.create(profile=profile, data={'v': 'old'})
+            HistIntraProfileData.objects.create(profile=profile, data={'v': 'new'})
+
+    def test_walk_all_pages(self):
+        """Test that following next visits every profile once, with its latest snapshot."""
+        paginator = CursorPagination(ordering=('profile_id',), page_size=2)
+        seen = []
+        cursor = None
+        while True:
+            page = paginator.paginate_queryset(
+                query_latest_hist_intra_profile_data(),
+                CursorPagination.Input(cursor=cursor),
+            )
+            seen += page['items']
+            cursor = page['next']
+            if cursor is None:
+                break
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len({i.profile_id for i in seen}), 5)
+        self.assertTrue(all(i.data == {'v': 'new'} for i in seen))
+        self.assertIsNone(page['count'])
+
+    def test_cursor_on_created_and_id(self):
+        """Test the default (-created, id) keyset."""
+        paginator = CursorPagination(page_size=3)
+        qs = HistIntraProfileData.objects.all()
+        first = paginator.paginate_queryset(qs, CursorPagination.Input())
+        second = paginator.paginate_queryset(
+            qs, CursorPagination.Input(cursor=first['next'])
+        )
+        ids = [i.id for i in first['items'] + second['items']]
+
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(
+            ids, list(qs.order_by('-created', 'id').values_list('id', flat=True)[:6])
+        )
+
+    def test_count_is_cached(self):
+        """Test that the count is computed once then read from cache."""
+        paginator = CursorPagination(ordering=('profile_id',), page_size=2)
+        qs = query_latest_hist_intra_profile_data()
+        with patch.object(
+            CursorPagination, '_items_count', return_value=5
+        ) as mock_count:
+            for _ in range(2):
+                page = paginator.paginate_queryset(qs, CursorPagination.Input(count=True))
+
+        self.assertEqual(page['count'], 5)
+        mock_count.assert_called_once()
+
+    async def test_route(self):
+        """Test the cursor route returns items, next and count."""
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            response = await self.client.get('/latest/cursor/?count=true')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['items']), 5)
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['count'], 5)
+
+    async def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            response = await self.client.get('/latest/cursor/?cursor=notacursor')
+
+        self.assertEqual(response.status_code, 400)
+
+    async def test_cursor_with_invalid_value(self):
+        """Test that a well formed cursor with a value of the wrong type is rejected."""
+        cursor = CursorPagination.encode_cursor(['notanid'])
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            response = await self.client.get(f'/latest/cursor/?cursor={cursor}')
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SparseFieldsetTest(TestCase):
+    """Test cases for the fields= selection of snapshot data."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = TestAsyncClient(cadetmeta_router)
+        profile = IntraProfile.objects.create(login='sparse', intra_id=1)
+        HistIntraProfileData.objects.create(
+            profile=profile,
+            data={
+                'login': 'sparse',
+                'image': {'link': 'l', 'versions': {'small': 's'}},
+                'cursus_users': [{'level': 1.5}],
+                'projects_users': [{'final_mark': 100}],
+            },
+        )
+
+    async def _get(self, url):
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            return await self.client.get(url)
+
+    async def test_top_level_and_nested_paths(self):
+        """Test that only the requested paths are returned, keeping their nesting."""
+        response = await self._get('/latest/?fields=login,image.versions.small,cursus_users,missing')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['items'][0]['data'],
+            {
+                'login': 'sparse',
+                'image': {'versions': {'small': 's'}},
+                'cursus_users': [{'level': 1.5}],
+                'missing': None,
+            },
+        )
+
+    def test_parent_path_wins(self):
+        """Test that selecting a parent and its child returns the whole parent."""
+        qs = with_sparse_data(
+            query_latest_hist_intra_profile_data(), ['image.link', 'image']
+        )
+
+        self.assertEqual(
+            qs.get().sparse_data,
+            {'image': {'link': 'l', 'versions': {'small': 's'}}},
+        )
+
+    def test_data_is_deferred(self):
+        """Test that the full data column is not loaded."""
+        qs = with_sparse_data(query_latest_hist_intra_profile_data(), ['login'])
+
+        self.assertIn('data', qs.get().get_deferred_fields())
+
+    async def test_without_fields(self):
+        """Test that the full data is returned by default."""
+        response = await self._get('/latest/cursor/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('projects_users', response.json()['items'][0]['data'])
+
+    async def test_invalid_fields(self):
+        """Test that malformed paths are rejected."""
+        response = await self._get('/latest/?fields=login,image..link')
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheTest(TestCase):
+    """Test cases for the response cache of the data endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = TestAsyncClient(cadetmeta_router)
+        profile = IntraProfile.objects.create(login='cached', intra_id=1)
+        HistIntraProfileData.objects.create(
+            profile=profile, data={'login': 'cached', 'cursus_users': []}
+        )
+
+    async def _get(self, client, url, **headers):
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            return await client.get(url, headers={'Authorization': 'Bearer t', **headers})
+
+    def test_repeated_get_skips_the_database(self):
+        """Test that a cached response is served without any query."""
+        get = async_to_sync(self._get)
+        first = get(self.client, '/latest/?fields=login')
+        with self.assertNumQueries(0):
+            second = get(self.client, '/latest/?fields=login')
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    async def test_params_are_part_of_the_key(self):
+        """Test that different params are cached apart."""
+        await self._get(self.client, '/latest/?fields=login')
+        response = await self._get(self.client, '/latest/')
+
+        self.assertIn('cursus_users', response.json()['items'][0]['data'])
+
+    async def test_if_none_match(self):
+        """Test that a matching ETag gets a 304."""
+        etag = (await self._get(self.client, '/latest/'))['ETag']
+        response = await self._get(self.client, '/latest/', **{'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    async def test_patch_bumps_the_version(self):
+        """Test that a CadetMeta patch invalidates cached responses."""
+        version = data_version()
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            await self.client.patch('/cached/', json={'note': 'n'})
+
+        self.assertEqual(data_version(), version + 1)
+
+    async def test_sync_bumps_the_version(self):
+        """Test that new snapshots invalidate cached responses."""
+        client = TestAsyncClient(intra_router)
+        etag = (await self._get(client, 'user/cached/status/'))['ETag']
+        await sync_to_async(save_user_infos)(
+            [
+                {
+                    'id': 1,
+                    'login': 'cached',
+                    'pool_month': None,
+                    'pool_year': None,
+                    'cursus_users': [],
+                }
+            ]
+        )
+        response = await self._get(client, 'user/cached/status/', **{'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+
+    async def test_errors_are_not_cached(self):
+        """Test that only 200 responses are stored."""
+        client = TestAsyncClient(intra_router)
+        response = await self._get(client, 'user/unknown/status/')
+        self.assertEqual(response.status_code, 404)
+        await IntraProfile.objects.filter(login='cached').aupdate(login='unknown')
+
+        response = await self._get(client, 'user/unknown/status/')
+        self.assertEqual(response.status_code, 200)
+
+    async def test_hit_runs_the_auth(self):
+        """Test that a revoked token is refused even if its response is cached."""
+        await self._get(self.client, '/latest/')
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=None):
+            response = await self.client.get(
+                '/latest/', headers={'Authorization': 'Bearer t'}
+            )
+
+        self.assertEqual(response.status_code, 401)
+
+    async def test_status_expires_at_the_blackhole(self):
+        """Test that a cached status is not served past the cadet's blackhole."""
+        client = TestAsyncClient(intra_router)
+        blackholed_at = datetime.now(timezone.utc) + timedelta(seconds=1)
+        await HistIntraProfileData.objects.aupdate(
+            data={
+                'login': 'cached',
+                'cursus_users': [
+                    {
+                        'cursus': {'slug': '42cursus'},
+                        'blackholed_at': blackholed_at.isoformat(),
+                    }
+                ],
+            }
+        )
+        response = await self._get(client, 'user/cached/status/')
+        self.assertFalse(response.json()['blackholed'])
+        self.assertEqual(response['Cache-Control'], 'max-age=1')
+        await asyncio.sleep(1.1)
+
+        response = await self._get(client, 'user/cached/status/')
+        self.assertTrue(response.json()['blackholed'])
+
+
+class CadetStatusBatchTest(TestCase):
+    """Test cases for the batch cadet status endpoint."""
+
+    def setUp(self):
+        self.client = TestClient(intra_router)
+        cursus_users = {
+            'cadet': [
+                {'cursus': {'slug': 'c-piscine'}, 'blackholed_at': None},
+                {'cursus': {'slug': '42cursus'}, 'blackholed_at': None},
+            ],
+            'blackholed': [
+                {'cursus': {'slug': '42cursus'}, 'blackholed_at': '2020-01-01T00:00:00Z'},
+            ],
+            'pisciner': [{'cursus': {'slug': 'c-piscine'}, 'blackholed_at': None}],
+            'nocursus': [],
+        }
+        for i, (login, cus) in enumerate(cursus_users.items()):
+            profile = IntraProfile.objects.create(login=login, intra_id=i)
+            HistIntraProfileData.objects.create(
+                profile=profile, data={'login': login, 'cursus_users': []}
+            )
+            HistIntraProfileData.objects.create(
+                profile=profile, data={'login': login, 'cursus_users': cus}
+            )
+
+    def _post(self, logins):
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            return self.client.post('status/batch/', json={'logins': logins})
+
+    def test_statuses_in_order_with_not_found(self):
+        """Test that every login gets an item, in order, from its latest snapshot."""
+        with self.assertNumQueries(1):
+            response = self._post(
+                ['pisciner', 'ghost', 'cadet', 'blackholed', 'nocursus', 'cadet']
+            )
+
+        self.assertEqual(response.status_code, 200)
+        items = response.json()
+        self.assertEqual(
+            [(i['login'], i['found'], i['blackholed'], i['enrollment']) for i in items],
+            [
+                ('pisciner', True, False, 'pisciner'),
+                ('ghost', False, None, None),
+                ('cadet', True, False, 'cadet'),
+                ('blackholed', True, True, 'cadet'),
+                ('nocursus', True, False, 'no-cursus'),
+            ],
+        )
+
+    def test_too_many_logins(self):
+        """Test that the batch size is bounded."""
+        response = self._post([f'login{i}' for i in range(MAX_BATCH_LOGINS + 1)])
+
+        self.assertEqual(response.status_code, 422)
+
+
+class ExportLatestCadetMetaTest(TestCase):
+    """Test cases for the streaming export of the latest cadetmeta."""
+
+    def setUp(self):
+        for i in range(3):
+            profile = IntraProfile.objects.create(login=f'cadet{i}', intra_id=i)
+            HistIntraProfileData.objects.create(profile=profile, data={'login': 'old'})
+            HistIntraProfileData.objects.create(
+                profile=profile,
+                data={'login': f'cadet{i}', 'image': {'link': f'l{i}'}, 'cursus_users': [i]},
+            )
+
+    async def _get(self, url):
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            response = await self.async_client.get(
+                f'/api/data/cadetmeta{url}', headers={'Authorization': 'Bearer t'}
+            )
+            content = b''.join([i async for i in response.streaming_content])
+        return response, content.decode()
+
+    async def test_ndjson(self):
+        """Test that every latest snapshot is streamed as a JSON line."""
+        response, content = await self._get('/latest/export/')
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            sorted(r['data']['login'] for r in rows), ['cadet0', 'cadet1', 'cadet2']
+        )
+        self.assertEqual(set(rows[0]), {'id', 'profile', 'created', 'updated', 'data'})
+
+    async def test_ndjson_fields(self):
+        """Test that the export honours the field projection."""
+        _, content = await self._get('/latest/export/?fields=image.link')
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            sorted(r['data']['image']['link'] for r in rows), ['l0', 'l1', 'l2']
+        )
+        self.assertNotIn('login', rows[0]['data'])
+
+    async def test_csv_fields(self):
+        """Test the CSV export, one column per field path."""
+        response, content = await self._get(
+            '/latest/export/?format=csv&fields=login,cursus_users'
+        )
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            list(rows[0]), ['id', 'profile', 'created', 'updated', 'login', 'cursus_users']
+        )
+        self.assertEqual(
+            sorted((r['login'], r['cursus_users']) for r in rows),
+            [('cadet0', '[0]'), ('cadet1', '[1]'), ('cadet2', '[2]')],
+        )
+
+    async def test_streams_asynchronously(self):
+        """Test that the export is streamed from an async iterator."""
+        response, _ = await self._get('/latest/export/?format=csv')
+
+        self.assertTrue(response.is_async)
+
+
+class CadetSearchTest(TestCase):
+    """Test cases for the fuzzy cadet search."""
+
+    def setUp(self):
+        self.client = TestAsyncClient(intra_router)
+        IntraProfile.objects.create(
+            login='tsomchai',
+            intra_id=1,
+            first_name='Somchai',
+            last_name='Jaidee',
+            email='tsomchai@student.42bangkok.com',
+        )
+        IntraProfile.objects.create(
+            login='pnarin',
+            intra_id=2,
+            first_name='Narin',
+            last_name='Sukjai',
+            email='pnarin@student.42bangkok.com',
+        )
+        IntraProfile.objects.create(
+            login='kwan',
+            intra_id=3,
+            first_name='Kwanjai',
+            last_name='Dee',
+            email='kwan@student.42bangkok.com',
+        )
+        CadetMeta.objects.create(login='kwan', note='Needs follow up on piscine')
+
+    async def _search(self, query):
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            return await self.client.get(f'search/?{query}')
+
+    async def test_partial_and_misspelled(self):
+        """Test that partial and misspelled names match, best first."""
+        response = await self._search('q=somchay')
+
+        self.assertEqual(response.status_code, 200)
+        items = response.json()
+        self.assertEqual(items[0]['login'], 'tsomchai')
+        self.assertNotIn('kwan', [i['login'] for i in items])
+
+    async def test_ranked(self):
+        """Test that results are ordered by rank."""
+        response = await self._search('q=jai')
+
+        ranks = [i['rank'] for i in response.json()]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    async def test_note(self):
+        """Test that the CadetMeta note is searched."""
+        response = await self._search('q=follow')
+
+        self.assertEqual([i['login'] for i in response.json()], ['kwan'])
+
+    async def test_limit(self):
+        """Test that the number of results is bounded."""
+        response = await self._search('q=student&limit=2')
+        self.assertEqual(len(response.json()), 2)
+
+        response = await self._search(f'q=student&limit={MAX_SEARCH_LIMIT + 1}')
+        self.assertEqual(response.status_code, 422)
+
+
+class DashboardAggregatesAPITest(TestCase):
+    """Test cases for the dashboard aggregates endpoint."""
+
+    def setUp(self):
+        self.client = TestAsyncClient(intra_router)
+        profile = IntraProfile.objects.create(
+            login='cadet', intra_id=1, cursus_ids=[21], pool_year='2023', pool_month='july'
+        )
+        CursusUser.objects.create(profile=profile, cursus_id=21, level=4.2)
+        IntraProfile.objects.create(login='pisciner', intra_id=2, cursus_ids=[9])
+
+    async def _get(self):
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            return await self.client.get('aggregates/')
+
+    def test_single_query(self):
+        """Test that the stored aggregates are read back with one query."""
+        refresh_dashboard_aggregates()
+        with self.assertNumQueries(1):
+            response = async_to_sync(self._get)()
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['enrollment'], {'cadet': 1, 'pisciner': 1})
+        self.assertEqual(data['level'], {'4': 1})
+        self.assertEqual(data['pool'], {'2023 july': 1})
+        self.assertIsNotNone(data['computed'])
+
+    async def test_empty_before_first_refresh(self):
+        """Test that nothing is computed on read."""
+        response = await self._get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['computed'])
+        self.assertEqual(response.json()['level'], {})
+
+
+class CadetHistoryTest(TestCase):
+    """Test cases for the as of and series endpoints over snapshot history."""
+
+    def setUp(self):
+        self.client = TestAsyncClient(intra_router)
+        self.start = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+        for login, intra_id in [('alice', 1), ('bob', 2)]:
+            profile = IntraProfile.objects.create(login=login, intra_id=intra_id)
+            for day in range(30):
+                for hour in (0, 6):
+                    self._snapshot(profile, day, hour, level=day / 10 + hour / 100)
+        self._snapshot(profile, 30, 0, level=None)
+
+    def _snapshot(self, profile, day, hour, level):
+        cursus_users = [{'cursus_id': 9, 'level': 1.0}]
+        if level is not None:
+            cursus_users.append({'cursus_id': 21, 'level': level})
+        q = HistIntraProfileData.objects.create(
+            profile=profile,
+            data={
+                'login': profile.login,
+                'correction_point': day,
+                'cursus_users': cursus_users,
+            },
+        )
+        created = self.start + timedelta(days=day, hours=hour)
+        HistIntraProfileData.objects.filter(pk=q.pk).update(created=created)
+
+    async def _get(self, url):
+        with patch.object(ServiceBearerTokenAuth, '__call__', return_value=True):
+            return await self.client.get(url)
+
+    async def test_as_of(self):
+        """Test that the latest snapshot at or before the date is returned."""
+        response = await self._get('user/alice/asof/?at=2024-01-03T15:00:00Z')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['created'], '2024-01-03T12:00:00Z')
+        self.assertEqual(data['data']['correction_point'], 2)
+
+    async def test_as_of_fields(self):
+        """Test that the as of data honours the field projection."""
+        response = await self._get(
+            'user/alice/asof/?at=2024-01-03T15:00:00Z&fields=correction_point'
+        )
+
+        self.assertEqual(response.json()['data'], {'correction_point': 2})
+
+    async def test_as_of_before_first_snapshot(self):
+        """Test that a date before any snapshot is a 404."""
+        response = await self._get('user/alice/asof/?at=2023-01-01T00:00:00Z')
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_series_per_day(self):
+        """Test that each day keeps its last snapshot, within the range."""
+        response = await self._get(
+            'series/?logins=alice,ghost&since=2024-01-02T00:00:00Z'
+            '&until=2024-01-05T00:00:00Z'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        items = response.json()
+        self.assertEqual([i['login'] for i in items], ['alice'])
+        self.assertEqual(
+            items[0]['level'],
+            [
+                ['2024-01-02T18:00:00Z', 0.16],
+                ['2024-01-03T18:00:00Z', 0.26],
+                ['2024-01-04T18:00:00Z', 0.36],
+            ],
+        )
+        self.assertEqual([v for _, v in items[0]['correction_point']], [1, 2, 3])
+
+    async def test_series_downsampled(self):
+        """Test that series are downsampled, keeping days without a level out."""
+        response = await self._get('series/?logins=alice,bob&max_points=10')
+
+        items = {i['login']: i for i in response.json()}
+        self.assertEqual(len(items['alice']['level']), 10)
+        self.assertEqual(items['alice']['level'][-1][0], '2024-01-30T18:00:00Z')
+        self.assertEqual(items['bob']['level'][-1][0], '2024-01-30T18:00:00Z')
+        self.assertEqual(
+            items['bob']['correction_point'][-1], ['2024-01-31T12:00:00Z', 30]
+        )
+
+    async def test_series_logins_bounds(self):
+        """Test that the number of logins is bounded."""
+        logins = ','.join(f'l{i}' for i in range(MAX_SERIES_LOGINS + 1))
+        response = await self._get(f'series/?logins={logins}')
+
+        self.assertEqual(response.status_code, 400)
@@ -1,6 +1,9 @@
+from importlib import import_module
+
+from django.apps import apps
 from django.test import TestCase
 from django.db import IntegrityError
-from appdata.models.intras import IntraProfile, HistIntraProfileData
+from appdata.models.intras import CursusUser, IntraProfile, HistIntraProfileData
 from appdata.models.cadetmetas import CadetMeta
 
 
@@ -205,4 +208,52 @@ class CadetMetaModelTest(TestCase):
         meta.note = 'Updated note'
         meta.save()
         meta.refresh_from_db()
-        self.assertEqual(meta.note, 'Updated note')
\ No newline at end of file
+        self.assertEqual(meta.note, 'Updated note')
+
+
+class BackfillCursusUserIdentityTest(TestCase):
+    """Test cases for the CursusUser and identity backfill migration."""
+
+    def setUp(self):
+        self.migration = import_module(
+            'appdata.migrations.0011_backfill_cursususer_identity'
+        )
+        self.profile = IntraProfile.objects.create(login='alice', intra_id=1)
+        for level in (1.0, 4.2):
+            HistIntraProfileData.objects.create(
+                profile=self.profile,
+                data={
+                    'email': 'alice@student.42bangkok.com',
+                    'first_name': 'Alice',
+                    'last_name': 'Cadet',
+                    'cursus_users': [
+                        {
+                            'id': 10,
+                            'cursus_id': 21,
+                            'level': level,
+                            'grade': 'Learner',
+                            'begin_at': '2024-01-01T00:00:00.000Z',
+                            'end_at': None,
+                            'blackholed_at': '2025-01-01T00:00:00.000Z',
+                        }
+                    ],
+                },
+            )
+
+    def test_backfill_from_latest_snapshot(self):
+        """Test that the latest snapshot fills the extracted columns."""
+        self.migration.backfill_cursususer_identity(apps, None)
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.email, 'alice@student.42bangkok.com')
+        self.assertEqual(self.profile.first_name, 'Alice')
+        cursus_user = CursusUser.objects.get(profile=self.profile, cursus_id=21)
+        self.assertEqual(cursus_user.level, 4.2)
+        self.assertEqual(cursus_user.blackholed_at.year, 2025)
+
+    def test_backfill_keeps_synced_rows(self):
+        """Test that rows written by a sync are not overwritten."""
+        CursusUser.objects.create(profile=self.profile, cursus_id=21, level=5.5)
+        self.migration.backfill_cursususer_identity(apps, None)
+
+        self.assertEqual(CursusUser.objects.get().level, 5.5)
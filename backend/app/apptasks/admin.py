@@ -1,5 +1,7 @@
 from apptasks.models.configs import DiscordWebhook
+from apptasks.models.runs import TaskRun
 from django.contrib import admin
 
 # Register your models here.
 admin.site.register(DiscordWebhook)
+admin.site.register(TaskRun)
@@ -0,0 +1,15 @@
+from apptasks.services.refresh_scheduler import refresh_stale_intraprofiles
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the intra profile of the highest-priority cadets within an API budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget", type=int, default=300)
+
+    def handle(self, *args, **options):
+        count = refresh_stale_intraprofiles(budget=options["budget"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {count} profiles."))
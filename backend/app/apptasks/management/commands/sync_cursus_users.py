@@ -0,0 +1,13 @@
+from apptasks.services.sync_cursus_users import sync_cursus_users
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Refresh level, grade and blackhole fields of a cursus from the cursus_users listing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cursus-id", type=int, default=21)
+
+    def handle(self, *args, **options):
+        count = sync_cursus_users(cursus_id=options["cursus_id"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {count} cursus users."))
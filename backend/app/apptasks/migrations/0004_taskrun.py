@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:03
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apptasks", "0003_discordwebhook_description"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskRun",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("last_run_at", models.DateTimeField()),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
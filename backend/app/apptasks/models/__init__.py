@@ -1 +1,2 @@
 from .configs import *  # noqa
+from .runs import *  # noqa
@@ -0,0 +1,17 @@
+from appcore.models.commons import BaseAutoDate, BaseUUID
+from django.db import models
+
+
+class TaskRun(BaseAutoDate, BaseUUID):
+    """
+    The last completed run of a task, read to bound the freshness of the data
+    it maintains even when a run finds nothing new.
+    name: the task name, ex. ingest_scale_teams
+    last_run_at: when the last run completed
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    last_run_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.name
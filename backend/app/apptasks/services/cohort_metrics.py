@@ -0,0 +1,142 @@
+"""
+Vectorized cohort metrics for report tasks.
+Cadet records are flattened once into frames of cadets, cursus users and project users,
+and every report column is computed for the whole cohort with groupby / pivot,
+without a per-cadet loop.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+from django.utils import timezone
+
+from appcore.services.intra.records import CadetRecord
+
+NEVER_ACTIVE = pd.Timestamp("1970-01-01", tz="UTC")
+PROJECT_COLUMNS = ["final_mark", "status", "updated_at"]
+
+
+def cadets_frame(records: list[CadetRecord]) -> pd.DataFrame:
+    """
+    One row per cadet, indexed by intra id.
+    """
+    df = pd.DataFrame(
+        [
+            (r.id, r.email, r.login, r.first_name, r.last_name, r.correction_point)
+            for r in records
+        ],
+        columns=[
+            "id",
+            "email",
+            "login",
+            "first_name",
+            "last_name",
+            "correction_point",
+        ],
+    )
+
+    return df.set_index("id", drop=False)
+
+
+def cursus_users_frame(records: list[CadetRecord]) -> pd.DataFrame:
+    """
+    One row per cadet and cursus.
+    """
+    return pd.DataFrame(
+        [
+            (r.id, cu.cursus_id, cu.level)
+            for r in records
+            for cu in r.cursus_users.values()
+        ],
+        columns=["id", "cursus_id", "level"],
+    )
+
+
+def project_users_frame(records: list[CadetRecord]) -> pd.DataFrame:
+    """
+    One row per cadet, cursus and project.
+    """
+    df = pd.DataFrame(
+        [
+            (
+                r.id,
+                cursus_id,
+                slug,
+                pu.final_mark,
+                pu.status,
+                pu.occurrence,
+                pu.updated_at,
+            )
+            for r in records
+            for (cursus_id, slug), pu in r.projects_users.items()
+        ],
+        columns=[
+            "id",
+            "cursus_id",
+            "slug",
+            "final_mark",
+            "status",
+            "occurrence",
+            "updated_at",
+        ],
+    )
+    df["updated_at_dt"] = pd.to_datetime(df["updated_at"], utc=True, format="ISO8601")
+
+    return df
+
+
+def cohort_metrics(
+    records: list[CadetRecord],
+    cursus_id: int,
+    slugs: list[str],
+    now: datetime | None = None,
+) -> pd.DataFrame:
+    """
+    Builds the cohort report of the given cursus, one row per cadet.
+    Args:
+        records: the cadets
+        cursus_id: the cursus reported on
+        slugs: projects reported on, each gets <slug>, <slug>_status and <slug>_updated_at
+        now: reference for inactivity, defaults to now
+    Returns:
+        pd.DataFrame: indexed by intra id, with profile_url, inactive_for, level,
+            total_tries and the project columns
+    """
+    now = pd.Timestamp(now or timezone.now())
+    df = cadets_frame(records)
+    df["profile_url"] = "https://profile.intra.42.fr/users/" + df["login"]
+
+    df_projects = project_users_frame(records)
+    df_projects = df_projects[df_projects["cursus_id"] == cursus_id]
+    grouped = df_projects.groupby("id")
+    last_active = grouped["updated_at_dt"].max().reindex(df.index)
+    df["inactive_for"] = (now - last_active.fillna(NEVER_ACTIVE)).dt.days
+
+    df_cursus = cursus_users_frame(records)
+    levels = df_cursus[df_cursus["cursus_id"] == cursus_id].set_index("id")["level"]
+    df["level"] = levels.reindex(df.index).fillna(0)
+
+    tries = (df_projects["occurrence"] + 1).groupby(df_projects["id"]).sum()
+    df["total_tries"] = tries.reindex(df.index).fillna(0).astype(int)
+
+    # project score, status and updated date, <slug>, <slug>_status, <slug>_updated_at
+    pivot = (
+        df_projects[df_projects["slug"].isin(slugs)]
+        .pivot(index="id", columns="slug", values=PROJECT_COLUMNS)
+        .reindex(index=df.index)
+    )
+    project_columns = {}
+    for s in slugs:
+        for column in PROJECT_COLUMNS:
+            name = s if column == "final_mark" else f"{s}_{column}"
+            if (column, s) in pivot.columns:
+                values = pivot[(column, s)]
+            else:
+                values = pd.Series(None, index=df.index, dtype=object)
+            if column == "final_mark":
+                values = pd.to_numeric(values)
+            else:
+                values = values.astype(object).where(values.notna(), None)
+            project_columns[name] = values
+
+    return pd.concat([df, pd.DataFrame(project_columns, index=df.index)], axis=1)
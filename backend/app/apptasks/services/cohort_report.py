@@ -0,0 +1,162 @@
+"""
+Cohort report built from local data only: the latest HistIntraProfileData snapshots,
+the stored CorrectionPointEvent historics, the ingested ScaleTeam evaluations and the
+Project catalog, so building it never waits on the 42 API. Snapshots are kept fresh by
+the sync tasks, point historics by the sync_correction_points task, evaluations by the
+ingest_scale_teams task and the catalog by the refresh_project_catalog task.
+as_evaluator / as_evaluated: correction points gained / spent in evaluations
+evaluations_done / evaluations_received: filled evaluations counted from scale teams
+"""
+
+from datetime import timedelta
+
+import pandas as pd
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from appcore.services.console import console
+from appcore.services.intra.records import CadetRecord
+from appdata.querysets.cadetmeta import query_latest_hist_intra_profile_data
+from appdata.querysets.evaluations import query_evaluation_stats
+from apptasks.services.cohort_metrics import cohort_metrics
+from apptasks.services.correction_points import TASK_NAME as CORRECTION_POINTS_TASK_NAME
+from apptasks.services.correction_points import correction_point_gainloss
+from apptasks.services.ingest_scale_teams import TASK_NAME as INGEST_TASK_NAME
+from apptasks.services.project_catalog import catalog_slugs
+from apptasks.services.task_runs import last_task_run
+
+# share of cadets without a fresh snapshot a report is still built without
+MAX_STALE_RATIO = 0.1
+REPORT_COLUMNS = [
+    "email",
+    "login",
+    "id",
+    "first_name",
+    "last_name",
+    "profile_url",
+    "inactive_for",
+    "level",
+    "correction_point",
+    "as_evaluator",
+    "as_evaluated",
+    "evaluations_done",
+    "evaluations_received",
+    "total_tries",
+]
+
+
+class StaleSnapshotError(Exception):
+    """
+    Raised when the data of a report is older than its staleness bound.
+    """
+
+
+def snapshot_slugs(records: list[CadetRecord], cursus_id: int) -> list[str]:
+    """
+    Returns the slugs of the projects the cadets have in the given cursus.
+    """
+    return sorted(
+        {slug for r in records for (c, slug) in r.projects_users if c == cursus_id}
+    )
+
+
+def _fresh_records(
+    profiles: list, records: list[CadetRecord], max_staleness: timedelta
+) -> list[CadetRecord]:
+    """
+    Returns the records whose snapshot is within max_staleness, cadets without a
+    fresh snapshot are logged and left out of the report.
+    Raises:
+        StaleSnapshotError: if more than MAX_STALE_RATIO of the cadets are left out
+    """
+    now = timezone.now()
+    fresh = [r for r in records if now - r.snapshot_at <= max_staleness]
+    fresh_ids = {r.id for r in fresh}
+    stale = sorted(str(p.login) for p in profiles if p.intra_id not in fresh_ids)
+    if stale:
+        console.log(f"Left out {len(stale)} cadets without a fresh snapshot: {stale}")
+    if len(stale) > len(profiles) * MAX_STALE_RATIO:
+        raise StaleSnapshotError(
+            f"{len(stale)}/{len(profiles)} cadets have no snapshot within {max_staleness}"
+        )
+
+    return fresh
+
+
+def _check_task_runs(max_staleness: timedelta) -> None:
+    """
+    Raises:
+        StaleSnapshotError: if the evaluation ingestion or the correction point sync
+            did not complete a run within max_staleness
+    """
+    now = timezone.now()
+    for name in (INGEST_TASK_NAME, CORRECTION_POINTS_TASK_NAME):
+        last = last_task_run(name)
+        if last is None or now - last > max_staleness:
+            raise StaleSnapshotError(
+                f"Last {name} run {last} is older than {max_staleness}"
+            )
+
+
+def build_cohort_report(
+    profiles: QuerySet,
+    cursus_id: int,
+    slugs: list[str] | None = None,
+    max_staleness: timedelta = timedelta(hours=48),
+) -> pd.DataFrame:
+    """
+    Builds the wide cohort report of the given profiles from local data.
+    Args:
+        profiles: IntraProfile queryset of the cadets to report on
+        cursus_id: the cursus reported on
+        slugs: projects reported on, defaults to the catalog projects of the cursus,
+            or the projects found in the snapshots if the catalog is empty
+        max_staleness: how old the latest snapshot of a cadet, and the last run of
+            the evaluation and correction point tasks may be
+    Returns:
+        pd.DataFrame: one row per cadet with a fresh snapshot, REPORT_COLUMNS,
+            the project columns and the snapshot_at of each row
+    Raises:
+        StaleSnapshotError: if too many cadets have no fresh snapshot, or if the
+            evaluation or correction point tasks have not run within max_staleness
+    """
+    profiles = list(query_evaluation_stats(profiles))
+    profile_ids = [profile.id for profile in profiles]
+    snapshots = query_latest_hist_intra_profile_data().filter(profile__in=profile_ids)
+    records = [CadetRecord.from_snapshot(i) for i in snapshots.iterator()]
+    if profiles:
+        records = _fresh_records(profiles, records, max_staleness)
+        _check_task_runs(max_staleness)
+    if slugs is None:
+        slugs = catalog_slugs(cursus_id) or snapshot_slugs(records, cursus_id)
+
+    df = cohort_metrics(records, cursus_id=cursus_id, slugs=slugs)
+    df["snapshot_at"] = pd.Series(
+        {r.id: r.snapshot_at.isoformat() for r in records}, dtype=object
+    )
+    gainloss = correction_point_gainloss(profile_ids)
+    df_evaluations = pd.DataFrame(
+        [
+            (
+                i.intra_id,
+                *gainloss.get(i.id, (0, 0)),
+                i.evaluations_done,
+                i.evaluations_received,
+            )
+            for i in profiles
+        ],
+        columns=[
+            "id",
+            "as_evaluator",
+            "as_evaluated",
+            "evaluations_done",
+            "evaluations_received",
+        ],
+    ).set_index("id")
+    df = df.join(df_evaluations)
+
+    return df[
+        REPORT_COLUMNS
+        + [c for s in slugs for c in (s, f"{s}_status", f"{s}_updated_at")]
+        + ["snapshot_at"]
+    ].reset_index(drop=True)
@@ -0,0 +1,105 @@
+"""
+Persistent, incremental store of correction point historics.
+Historics are append-only on intra, so only entries newer than the last stored one
+are fetched, and gain/loss are computed by a SQL aggregate over the stored events.
+"""
+
+from dateutil.parser import isoparse
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from appcore.services.console import console
+from appcore.services.intra.lanes import Lane
+from appcore.services.intra.user import IntraUser
+from appdata.models.evaluations import CorrectionPointEvent
+from appdata.models.intras import IntraProfile
+from apptasks.services.task_runs import record_task_run
+
+REASONS = [IntraUser.EARNING_REASON, IntraUser.DEFENSE_REASON]
+TASK_NAME = "sync_correction_points"
+
+
+def sync_correction_point_events(user: IntraUser, profile: IntraProfile) -> int:
+    """
+    Stores the correction point historics of a user newer than the last stored one.
+    A single-entry probe of the newest historic id comes first, nothing more is fetched
+    when it is already stored.
+    Args:
+        user: the intra user
+        profile: the profile the events belong to
+    Returns:
+        int: the number of events stored
+    """
+    last = (
+        CorrectionPointEvent.objects.filter(profile=profile)
+        .order_by("-intra_id")
+        .values("intra_id")
+        .first()
+    )
+    newest_id = user.get_last_correction_point_hist_id(reasons=REASONS)
+    if newest_id is None or (last and last["intra_id"] >= newest_id):
+        return 0
+
+    hists = user.get_correction_point_hist(
+        after_id=last["intra_id"] if last else None,
+        reasons=REASONS,
+    )
+    events = [
+        CorrectionPointEvent(
+            profile=profile,
+            intra_id=hist["id"],
+            reason=hist["reason"],
+            sum=hist["sum"],
+            total=hist.get("total"),
+            scale_team_id=hist.get("scale_team_id"),
+            occurred_at=isoparse(hist["created_at"]),
+        )
+        for hist in hists
+    ]
+    CorrectionPointEvent.objects.bulk_create(events, ignore_conflicts=True)
+
+    return len(events)
+
+
+def sync_correction_points(cursus_id: int = 21) -> int:
+    """
+    Stores the new correction point historics of every cadet of the given cursus.
+    Cadets whose historics cannot be fetched are logged and skipped.
+    Args:
+        cursus_id: the cursus of the cadets, defaults to 21 (42cursus)
+    Returns:
+        int: the number of events stored
+    """
+    profiles = IntraProfile.objects.filter(
+        cursus_ids__contains=[cursus_id], login__isnull=False
+    )
+    count = 0
+    for profile in profiles.iterator():
+        user = IntraUser(profile.login, data={"login": profile.login}, lane=Lane.BULK)
+        try:
+            count += sync_correction_point_events(user, profile)
+        except Exception as e:
+            console.log(f"Syncing correction points of {profile.login} failed: {e}")
+    record_task_run(TASK_NAME)
+
+    return count
+
+
+def correction_point_gainloss(profile_ids: list) -> dict:
+    """
+    Sums the evaluation points gained and lost by each profile.
+    Args:
+        profile_ids: IntraProfile IDs
+    Returns:
+        dict: {profile_id: (pts_gain, pts_lost)}, missing profiles have no events
+    """
+    qs = (
+        CorrectionPointEvent.objects.filter(profile_id__in=profile_ids)
+        .values("profile_id")
+        .annotate(
+            pts_gain=Coalesce(Sum("sum", filter=Q(reason=IntraUser.EARNING_REASON)), 0),
+            pts_lost=Coalesce(Sum("sum", filter=Q(reason=IntraUser.DEFENSE_REASON)), 0),
+        )
+    )
+
+    return {i["profile_id"]: (i["pts_gain"], abs(i["pts_lost"])) for i in qs}
@@ -0,0 +1,50 @@
+"""
+Dashboard aggregates.
+Counts are computed in SQL with GROUP BY over the extracted IntraProfile and
+CursusUser columns and stored in the small DashboardAggregate table after each sync,
+so dashboards read them back with a single query.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from appdata.models.dashboards import DashboardAggregate
+from appdata.querysets.dashboards import (
+    query_blackhole_counts,
+    query_enrollment_counts,
+    query_level_histogram,
+    query_pool_counts,
+)
+
+
+def compute_dashboard_aggregates() -> dict[str, dict[str, int]]:
+    """
+    Computes the dashboard counts per metric and bucket, buckets in display order
+    """
+    return {
+        "enrollment": {i["enrollment"]: i["count"] for i in query_enrollment_counts()},
+        "blackhole": query_blackhole_counts(timezone.now()),
+        "level": {str(int(i["bucket"])): i["count"] for i in query_level_histogram()},
+        "pool": {
+            f"{i['pool_year']} {i['pool_month']}": i["count"]
+            for i in query_pool_counts()
+        },
+    }
+
+
+def refresh_dashboard_aggregates() -> int:
+    """
+    Replaces the stored dashboard aggregates with freshly computed ones
+    Returns:
+        int: the number of buckets stored
+    """
+    rows = [
+        DashboardAggregate(metric=metric, key=key, count=count, position=position)
+        for metric, buckets in compute_dashboard_aggregates().items()
+        for position, (key, count) in enumerate(buckets.items())
+    ]
+    with transaction.atomic():
+        DashboardAggregate.objects.all().delete()
+        DashboardAggregate.objects.bulk_create(rows)
+
+    return len(rows)
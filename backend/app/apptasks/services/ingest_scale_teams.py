@@ -0,0 +1,162 @@
+"""
+Campus-level evaluation ingestion.
+Scale teams of the campus are pulled in bulk into ScaleTeam, incrementally by their
+intra update date, so the API calls scale with evaluations in the window, not with cadets.
+The campus history is loaded once by backfill_scale_teams, in windows, and scale teams
+deleted on intra (ex. cancelled evaluations) are pruned around the current date.
+"""
+
+from datetime import datetime, timedelta
+
+from dateutil.parser import isoparse
+from django.db.models import Max
+from django.utils import timezone
+
+from appcore.services.console import console
+from appcore.services.intra.intra import Intra
+from appcore.services.intra.lanes import Lane
+from appdata.models.evaluations import ScaleTeam
+from apptasks.services.task_runs import record_task_run
+
+CAMPUS_ID = 33
+TASK_NAME = "ingest_scale_teams"
+# re-read a margin before the last ingested update, intra updates are not instant
+OVERLAP = timedelta(hours=1)
+# read by the first incremental ingestion, older history comes from backfill_scale_teams
+INITIAL_WINDOW = timedelta(days=1)
+BACKFILL_STEP = timedelta(days=30)
+# evaluations are cancelled around their date, deletions are looked for within it
+PRUNE_WINDOW = timedelta(days=14)
+FIELDS = [
+    "corrector_id",
+    "corrected_ids",
+    "project_id",
+    "final_mark",
+    "flag",
+    "begin_at",
+    "filled_at",
+    "intra_updated_at",
+]
+
+
+def _parse_dt(value: str | None):
+    return isoparse(value) if value else None
+
+
+def _user_id(user) -> int | None:
+    # supervisors and hidden users are returned as strings
+    return user.get("id") if isinstance(user, dict) else None
+
+
+def to_scale_team(scale_team: dict) -> ScaleTeam:
+    """
+    Maps a scale_team as returned by intra to an unsaved ScaleTeam.
+    """
+    correcteds = scale_team.get("correcteds")
+    team = scale_team.get("team") or {}
+    flag = scale_team.get("flag") or {}
+
+    return ScaleTeam(
+        intra_id=scale_team["id"],
+        corrector_id=_user_id(scale_team.get("corrector")),
+        corrected_ids=[i for i in map(_user_id, correcteds or []) if i is not None],
+        project_id=team.get("project_id"),
+        final_mark=scale_team.get("final_mark"),
+        flag=flag.get("name"),
+        begin_at=_parse_dt(scale_team.get("begin_at")),
+        filled_at=_parse_dt(scale_team.get("filled_at")),
+        intra_updated_at=isoparse(scale_team["updated_at"]),
+    )
+
+
+def ingest_scale_teams(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    campus_id: int = CAMPUS_ID,
+) -> int:
+    """
+    Upserts the campus scale teams updated within [since, until].
+    Args:
+        since: defaults to the last ingested update minus OVERLAP,
+            or INITIAL_WINDOW before until if nothing was ingested yet
+        until: defaults to now
+        campus_id: the campus to ingest
+    Returns:
+        int: the number of scale teams upserted
+    """
+    until = until or timezone.now()
+    if since is None:
+        last = ScaleTeam.objects.aggregate(last=Max("intra_updated_at"))["last"]
+        since = last - OVERLAP if last else until - INITIAL_WINDOW
+    filter = {
+        "filter[campus_id]": campus_id,
+        "range[updated_at]": f"{since.isoformat()},{until.isoformat()}",
+    }
+
+    scale_teams = Intra(lane=Lane.BULK).get_scale_teams(filter=filter)
+    console.log(f"Scale teams to ingest: {len(scale_teams)}")
+    ScaleTeam.objects.bulk_create(
+        [to_scale_team(i) for i in scale_teams],
+        update_conflicts=True,
+        unique_fields=["intra_id"],
+        update_fields=FIELDS + ["updated"],
+        batch_size=1000,
+    )
+    record_task_run(TASK_NAME)
+
+    return len(scale_teams)
+
+
+def backfill_scale_teams(
+    start: datetime,
+    until: datetime | None = None,
+    campus_id: int = CAMPUS_ID,
+) -> int:
+    """
+    Ingests the campus scale teams updated from start to until, BACKFILL_STEP at a time,
+    so a long history is not held in memory at once.
+    Args:
+        start: the oldest update to ingest
+        until: defaults to now
+        campus_id: the campus to ingest
+    Returns:
+        int: the number of scale teams upserted
+    """
+    until = until or timezone.now()
+    count = 0
+    while start < until:
+        end = min(start + BACKFILL_STEP, until)
+        count += ingest_scale_teams(since=start, until=end, campus_id=campus_id)
+        start = end
+
+    return count
+
+
+def prune_scale_teams(
+    window: timedelta = PRUNE_WINDOW,
+    campus_id: int = CAMPUS_ID,
+) -> int:
+    """
+    Deletes the scale teams beginning within window of now that intra no longer lists.
+    Args:
+        window: how far before and after now to look
+        campus_id: the campus to prune
+    Returns:
+        int: the number of scale teams deleted
+    """
+    now = timezone.now()
+    start, end = now - window, now + window
+    listed = Intra(lane=Lane.BULK).get_scale_teams(
+        filter={
+            "filter[campus_id]": campus_id,
+            "range[begin_at]": f"{start.isoformat()},{end.isoformat()}",
+        }
+    )
+    deleted, _ = (
+        ScaleTeam.objects.filter(begin_at__gte=start, begin_at__lte=end)
+        .exclude(intra_id__in=[i["id"] for i in listed])
+        .delete()
+    )
+    console.log(f"Scale teams pruned: {deleted}")
+
+    return deleted
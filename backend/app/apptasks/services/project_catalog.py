@@ -0,0 +1,129 @@
+"""
+Persisted project catalog.
+Projects of the tracked cursus are refreshed in the background into Project,
+reports read slugs locally through a small in-process TTL cache.
+"""
+
+import threading
+import time
+
+import httpx
+from django.db.models import F, Func, Value
+from django.utils import timezone
+
+from appcore.services.console import console
+from appcore.services.intra.breaker import CircuitOpenError
+from appcore.services.intra.intra import Intra
+from appcore.services.intra.lanes import Lane
+from appdata.models.projects import Project
+
+# cursus whose projects are kept in the catalog, see update_intraprofile
+CURSUS_IDS = [21, 9, 3, 74, 75, 69]
+SLUGS_TTL = 10 * 60
+
+_slugs_cache: dict[int, tuple[float, list[str]]] = {}
+_slugs_lock = threading.Lock()
+
+
+def to_project(project: dict, cursus_ids: list[int]) -> Project:
+    """
+    Maps a project as returned by intra to an unsaved Project.
+    """
+    parent = project.get("parent") or {}
+
+    return Project(
+        intra_id=project["id"],
+        slug=project["slug"],
+        name=project.get("name") or project["slug"],
+        cursus_ids=sorted(cursus_ids),
+        exam=bool(project.get("exam")),
+        solo=any(i.get("solo") for i in project.get("project_sessions") or []),
+        parent_id=parent.get("id"),
+    )
+
+
+def refresh_project_catalog(cursus_ids: list[int] = CURSUS_IDS) -> int:
+    """
+    Upserts the projects listed in the given cursus, and drops a listed cursus
+    from the projects that are no longer in its listing.
+    Args:
+        cursus_ids: cursus to list the projects of
+    Returns:
+        int: the number of projects upserted
+    """
+    intra = Intra(lane=Lane.BULK)
+    projects = {}
+    project_cursus_ids = {}
+    failed = set()
+    for cursus_id in cursus_ids:
+        try:
+            cursus_projects = intra.get_projects_by_cursus(cursus_id)
+        except (CircuitOpenError, httpx.HTTPError) as e:
+            console.log(f"Skipping cursus {cursus_id}: {e}")
+            failed.add(cursus_id)
+            continue
+        for project in cursus_projects:
+            projects[project["id"]] = project
+            project_cursus_ids.setdefault(project["id"], set()).add(cursus_id)
+    # keep the stored membership of cursus that could not be listed
+    stored = Project.objects.filter(intra_id__in=projects).values_list(
+        "intra_id", "cursus_ids"
+    )
+    for intra_id, stored_cursus_ids in stored:
+        project_cursus_ids[intra_id] |= failed.intersection(stored_cursus_ids)
+    console.log(f"Projects in catalog: {len(projects)}")
+
+    Project.objects.bulk_create(
+        [to_project(p, project_cursus_ids[i]) for i, p in projects.items()],
+        update_conflicts=True,
+        unique_fields=["intra_id"],
+        update_fields=[
+            "slug",
+            "name",
+            "cursus_ids",
+            "exam",
+            "solo",
+            "parent_id",
+            "updated",
+        ],
+    )
+    for cursus_id in set(cursus_ids) - failed:
+        Project.objects.filter(cursus_ids__contains=[cursus_id]).exclude(
+            intra_id__in=projects
+        ).update(
+            cursus_ids=Func(F("cursus_ids"), Value(cursus_id), function="array_remove"),
+            updated=timezone.now(),
+        )
+    clear_slugs_cache()
+
+    return len(projects)
+
+
+def catalog_slugs(cursus_id: int) -> list[str]:
+    """
+    Returns the slugs of the catalog projects of the given cursus, cached for SLUGS_TTL seconds.
+    """
+    now = time.monotonic()
+    with _slugs_lock:
+        cached = _slugs_cache.get(cursus_id)
+        if cached and cached[0] > now:
+            return list(cached[1])
+
+    slugs = list(
+        Project.objects.filter(cursus_ids__contains=[cursus_id]).values_list(
+            "slug", flat=True
+        )
+    )
+    if slugs:
+        with _slugs_lock:
+            _slugs_cache[cursus_id] = (now + SLUGS_TTL, slugs)
+
+    return list(slugs)
+
+
+def clear_slugs_cache() -> None:
+    """
+    Drops the in-process slugs cache, other processes catch up within SLUGS_TTL.
+    """
+    with _slugs_lock:
+        _slugs_cache.clear()
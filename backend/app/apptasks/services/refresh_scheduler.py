@@ -0,0 +1,159 @@
+"""
+Staleness-driven refresh of intra profiles.
+Instead of refetching every cadet on every cycle, each IntraProfile is scored from its
+latest snapshot and only the highest-priority cadets are refreshed within a fixed
+API budget (one /users/{id} call per cadet).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from dateutil.parser import isoparse
+from django.utils import timezone
+
+from appcore.services.console import console
+from appcore.services.intra.intra import Intra
+from appcore.services.intra.lanes import Lane
+from appdata.querysets.cadetmeta import query_latest_hist_intra_profile_data
+from apptasks.services.update_intraprofile import (
+    check_circuit_skipped,
+    save_user_infos,
+)
+
+BLACKHOLE_CURSUS_ID = 21
+# cadets with a blackhole closer than this are boosted
+DEADLINE_HORIZON_DAYS = 60
+# cadets inactive for this long weigh half as much as an active one
+INACTIVITY_HALF_LIFE_DAYS = 30
+
+
+@dataclass
+class RefreshCandidate:
+    """
+    A profile eligible for refresh with its priority score.
+    """
+
+    login: str
+    score: float
+    staleness_hours: float
+
+
+def _days_since_last_project_update(data: dict, now: datetime) -> int | None:
+    """
+    Days since the most recent projects_users update, None if the cadet has no projects.
+    Same signal as IntraUser.get_days_since_last_active_date_by_project_update,
+    but across all cursus and without building a DataFrame.
+    """
+    updated_ats = [
+        pu["updated_at"] for pu in data.get("projects_users", []) if pu["updated_at"]
+    ]
+    if not updated_ats:
+        return None
+
+    return (now - max(isoparse(i) for i in updated_ats)).days
+
+
+def _days_to_blackhole(data: dict, now: datetime) -> int | None:
+    """
+    Days until the 42cursus blackhole, None if the cadet has no blackhole.
+    """
+    for cursus_user in data.get("cursus_users", []):
+        if cursus_user["cursus_id"] == BLACKHOLE_CURSUS_ID:
+            if cursus_user["blackholed_at"] is None:
+                return None
+            return (isoparse(cursus_user["blackholed_at"]) - now).days
+
+    return None
+
+
+def score_profile(data: dict, snapshot_at: datetime, now: datetime) -> float:
+    """
+    Scores a profile by how much it needs a refresh, higher is more urgent.
+    score = staleness (hours since snapshot) * activity weight * deadline weight
+    - activity weight: 1 for a cadet active today, decays with days of inactivity
+    - deadline weight: up to 3 for a blackhole within DEADLINE_HORIZON_DAYS,
+      0.5 once already blackholed, 1 otherwise
+    Args:
+        data: latest snapshot data of the profile
+        snapshot_at: when the snapshot was taken
+        now: reference time
+    Returns:
+        float: the priority score
+    """
+    staleness_hours = max((now - snapshot_at).total_seconds() / 3600, 0)
+
+    inactive_days = _days_since_last_project_update(data, now)
+    if inactive_days is None:
+        activity = 0.5
+    else:
+        activity = 1 / (1 + max(inactive_days, 0) / INACTIVITY_HALF_LIFE_DAYS)
+
+    days_to_blackhole = _days_to_blackhole(data, now)
+    if days_to_blackhole is None or days_to_blackhole > DEADLINE_HORIZON_DAYS:
+        deadline = 1
+    elif days_to_blackhole < 0:
+        deadline = 0.5
+    else:
+        deadline = (
+            1 + 2 * (DEADLINE_HORIZON_DAYS - days_to_blackhole) / DEADLINE_HORIZON_DAYS
+        )
+
+    return staleness_hours * activity * deadline
+
+
+def select_profiles_to_refresh(
+    budget: int,
+    min_staleness_hours: float = 6,
+    now: datetime | None = None,
+) -> list[RefreshCandidate]:
+    """
+    Ranks every IntraProfile by score_profile and returns the top `budget` candidates.
+    Profiles refreshed less than `min_staleness_hours` ago are skipped.
+    Args:
+        budget: maximum number of profiles to return
+        min_staleness_hours: minimum age of the latest snapshot to be eligible
+        now: reference time, defaults to timezone.now()
+    Returns:
+        list[RefreshCandidate]: candidates sorted by descending score
+    """
+    now = now or timezone.now()
+    candidates = []
+    for snapshot in query_latest_hist_intra_profile_data().select_related("profile"):
+        staleness_hours = (now - snapshot.created).total_seconds() / 3600
+        if staleness_hours < min_staleness_hours or snapshot.profile.login is None:
+            continue
+        candidates.append(
+            RefreshCandidate(
+                login=snapshot.profile.login,
+                score=score_profile(snapshot.data, snapshot.created, now),
+                staleness_hours=staleness_hours,
+            )
+        )
+    candidates.sort(key=lambda c: c.score, reverse=True)
+
+    return candidates[:budget]
+
+
+def refresh_stale_intraprofiles(
+    budget: int = 300, min_staleness_hours: float = 6
+) -> int:
+    """
+    Refreshes the highest-priority cadets within the given API budget.
+    New cadets are only discovered by the full update_intraprofile sync.
+    Args:
+        budget: maximum number of /users/{id} calls for this run
+        min_staleness_hours: minimum age of the latest snapshot to be eligible
+    Returns:
+        int: the number of profiles refreshed
+    """
+    candidates = select_profiles_to_refresh(budget, min_staleness_hours)
+    console.log(f"Profiles to refresh: {len(candidates)}")
+    if not candidates:
+        return 0
+
+    intra = Intra(lane=Lane.BULK)
+    user_infos, skipped = intra.get_user_infos_thr([c.login for c in candidates])
+    count = save_user_infos(user_infos)
+    check_circuit_skipped(skipped, len(candidates))
+
+    return count
@@ -0,0 +1,109 @@
+"""
+Columnar export of reports to object storage.
+Each export writes the report as Parquet and/or CSV under a dated prefix of the
+DEFAULT_FILE_STORAGE, with a manifest describing the files:
+    reports/<name>/<YYYY>/<MM>/<DD>/<HHMMSS>/<name>.parquet
+    reports/<name>/<YYYY>/<MM>/<DD>/<HHMMSS>/manifest.json
+    reports/<name>/latest.json, a copy of the last manifest
+"""
+
+import io
+import json
+from datetime import datetime
+
+import pandas as pd
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils import timezone
+
+from appcore.services.bucket_utils import file_storage, gen_url
+
+FORMATS = ("parquet", "csv")
+
+
+def _serialize(df: pd.DataFrame, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "parquet":
+        df.to_parquet(buffer, index=False)
+    elif fmt == "csv":
+        df.to_csv(buffer, index=False)
+    else:
+        raise ValueError(f"Unsupported report format {fmt}")
+
+    return buffer.getvalue()
+
+
+def _save(storage: Storage, name: str, content: bytes) -> str:
+    """
+    Saves content at name, replacing any previous file.
+    """
+    if storage.exists(name):
+        storage.delete(name)
+
+    return storage.save(name, ContentFile(content))
+
+
+def export_report(
+    df: pd.DataFrame,
+    name: str,
+    formats: tuple[str, ...] = FORMATS,
+    at: datetime | None = None,
+    storage: Storage | None = None,
+) -> str:
+    """
+    Writes a report to storage under a dated prefix, with a manifest.
+    Args:
+        df: the report
+        name: the report name, used as prefix ex. cursus-21
+        formats: parquet and/or csv
+        at: the report date, defaults to now
+        storage: defaults to DEFAULT_FILE_STORAGE
+    Returns:
+        str: the URL of the manifest
+    """
+    at = at or timezone.now()
+    storage = storage or file_storage()
+    prefix = f"reports/{name}/{at:%Y/%m/%d/%H%M%S}"
+
+    files = []
+    for fmt in formats:
+        content = _serialize(df, fmt)
+        path = _save(storage, f"{prefix}/{name}.{fmt}", content)
+        files.append(
+            {"path": path, "format": fmt, "bytes": len(content), "url": gen_url(path)}
+        )
+    manifest = {
+        "name": name,
+        "created_at": at.isoformat(),
+        "rows": len(df),
+        "columns": [str(i) for i in df.columns],
+        "files": files,
+    }
+    content = json.dumps(manifest, indent=2).encode()
+    manifest_path = _save(storage, f"{prefix}/manifest.json", content)
+    _save(storage, f"reports/{name}/latest.json", content)
+
+    return gen_url(manifest_path)
+
+
+def read_report(
+    name: str,
+    manifest_path: str | None = None,
+    storage: Storage | None = None,
+) -> pd.DataFrame:
+    """
+    Reads an exported report back, preferring Parquet.
+    Args:
+        name: the report name
+        manifest_path: the manifest of the export, defaults to the latest
+        storage: defaults to DEFAULT_FILE_STORAGE
+    """
+    storage = storage or file_storage()
+    with storage.open(manifest_path or f"reports/{name}/latest.json") as f:
+        manifest = json.load(f)
+    files = {i["format"]: i["path"] for i in manifest["files"]}
+
+    with storage.open(files.get("parquet") or files["csv"]) as f:
+        if "parquet" in files:
+            return pd.read_parquet(io.BytesIO(f.read()))
+        return pd.read_csv(f)
@@ -0,0 +1,185 @@
+"""
+Columnar archive of snapshot history.
+Snapshots of a day are flattened into Parquet datasets partitioned by snapshot date
+in the file storage, so progress over time can be analysed without scanning JSONB
+rows in Postgres:
+    archive/profiles/snapshot_date=YYYY-MM-DD/part-00000.parquet
+    archive/cursus_users/snapshot_date=YYYY-MM-DD/part-00000.parquet
+    archive/projects_users/snapshot_date=YYYY-MM-DD/part-00000.parquet
+
+Usage:
+    from apptasks.services.snapshot_archive import load_archive
+    df = load_archive("cursus_users", date(2024, 1, 1), date(2024, 6, 30),
+                      columns=["id", "level"], filters={"cursus_id": 21})
+"""
+
+import io
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils import timezone
+
+from appcore.services.bucket_utils import file_storage
+from appcore.services.console import console
+from appcore.services.intra.records import CadetRecord
+from appdata.models.intras import HistIntraProfileData
+from apptasks.services.cohort_metrics import (
+    cadets_frame,
+    cursus_users_frame,
+    project_users_frame,
+)
+
+PREFIX = "archive"
+DATASETS = ("profiles", "cursus_users", "projects_users")
+# snapshots per Parquet part, bounds the memory of an archive run
+PART_SIZE = 2000
+
+
+def flatten_snapshots(records: list[CadetRecord]) -> dict[str, pd.DataFrame]:
+    """
+    Flattens cadet records into one frame per dataset, each row tagged with snapshot_at.
+    """
+    snapshot_ats = [r.snapshot_at for r in records]
+    profiles = cadets_frame(records).reset_index(drop=True)
+    profiles["pool_month"] = [r.pool_month for r in records]
+    profiles["pool_year"] = [r.pool_year for r in records]
+    profiles["snapshot_at"] = snapshot_ats
+    # rows of the other frames follow the records order, a cadet may have several
+    # snapshots a day so rows are tagged by position rather than by id
+    cursus_users = cursus_users_frame(records)
+    cursus_users["snapshot_at"] = np.repeat(
+        snapshot_ats, [len(r.cursus_users) for r in records]
+    )
+    projects_users = project_users_frame(records).drop(columns="updated_at_dt")
+    projects_users["snapshot_at"] = np.repeat(
+        snapshot_ats, [len(r.projects_users) for r in records]
+    )
+
+    frames = {
+        "profiles": profiles,
+        "cursus_users": cursus_users,
+        "projects_users": projects_users,
+    }
+    for df in frames.values():
+        df["snapshot_at"] = pd.to_datetime(df["snapshot_at"], utc=True)
+
+    return frames
+
+
+def _partition(dataset: str, day: date) -> str:
+    return f"{PREFIX}/{dataset}/snapshot_date={day.isoformat()}"
+
+
+def _list_partition(storage: Storage, partition: str) -> list[str]:
+    try:
+        _, names = storage.listdir(partition)
+    except FileNotFoundError:
+        return []
+
+    return sorted(names)
+
+
+def _write_part(storage: Storage, name: str, df: pd.DataFrame) -> str:
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    if storage.exists(name):
+        storage.delete(name)
+
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def archive_snapshots(day: date | None = None, storage: Storage | None = None) -> int:
+    """
+    Archives the snapshots taken on a given day, replacing any previous archive of the day.
+    Args:
+        day: defaults to yesterday
+        storage: defaults to DEFAULT_FILE_STORAGE
+    Returns:
+        int: the number of snapshots archived
+    """
+    day = day or timezone.localdate() - timedelta(days=1)
+    storage = storage or file_storage()
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    snapshots = HistIntraProfileData.objects.filter(
+        created__gte=start, created__lt=start + timedelta(days=1)
+    ).order_by("created")
+
+    for dataset in DATASETS:
+        partition = _partition(dataset, day)
+        for name in _list_partition(storage, partition):
+            storage.delete(f"{partition}/{name}")
+
+    count = 0
+    part = 0
+    records = []
+
+    def _flush():
+        nonlocal part
+        for dataset, df in flatten_snapshots(records).items():
+            _write_part(
+                storage, f"{_partition(dataset, day)}/part-{part:05d}.parquet", df
+            )
+        part += 1
+        records.clear()
+
+    for snapshot in snapshots.iterator(chunk_size=PART_SIZE):
+        records.append(CadetRecord.from_snapshot(snapshot))
+        count += 1
+        if len(records) >= PART_SIZE:
+            _flush()
+    if records:
+        _flush()
+    console.log(f"Archived {count} snapshots of {day} in {part} parts")
+
+    return count
+
+
+def load_archive(
+    dataset: str,
+    start: date,
+    end: date,
+    columns: list[str] | None = None,
+    filters: dict | None = None,
+    storage: Storage | None = None,
+) -> pd.DataFrame:
+    """
+    Loads a column subset of an archived dataset between two snapshot dates, inclusive.
+    Args:
+        dataset: one of DATASETS
+        start, end: snapshot dates
+        columns: columns to read, all if None
+        filters: column -> value equality filters, ex. {"cursus_id": 21}
+        storage: defaults to DEFAULT_FILE_STORAGE
+    Returns:
+        pd.DataFrame: the rows, with a snapshot_date column
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown archive dataset {dataset}")
+    storage = storage or file_storage()
+    filters = filters or {}
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys([*columns, *filters]))
+
+    frames = []
+    day = start
+    while day <= end:
+        partition = _partition(dataset, day)
+        for name in _list_partition(storage, partition):
+            with storage.open(f"{partition}/{name}") as f:
+                df = pd.read_parquet(io.BytesIO(f.read()), columns=read_columns)
+            for column, value in filters.items():
+                df = df[df[column] == value]
+            frames.append(df.assign(snapshot_date=day))
+        day += timedelta(days=1)
+
+    if not frames:
+        return pd.DataFrame(columns=[*(columns or []), "snapshot_date"])
+    df = pd.concat(frames, ignore_index=True)
+    if columns is not None:
+        df = df[[*columns, "snapshot_date"]]
+
+    return df
@@ -5,6 +5,7 @@ Eval Pts Socialism manual script
 import pandas as pd
 from appcore.services.console import console
 from appcore.services.intra.intra import Intra
+from appcore.services.intra.lanes import Lane
 from appcore.services.intra.user import IntraUser
 from apptasks.models.configs import DiscordWebhook
 from apptasks.services.discohook import announce
@@ -54,7 +55,7 @@ def socialism(target=10, dry_run=False):
     if webhook is None:
         raise Exception("No webhook URL fo socialism found. Set one using Django Admin")
     webhook_url = webhook.url
-    api = Intra()
+    api = Intra(lane=Lane.BULK)
     filter_params = {
         "filter[primary_campus_id]": 33,
     }
@@ -70,7 +71,7 @@ def socialism(target=10, dry_run=False):
 
     pool_fill = 0
     for login in logins:
-        user = IntraUser(login)
+        user = IntraUser(login, lane=Lane.BULK)
         is_blackholed = user.is_blackholed(cursus_id=21)
         correction_point = user.correction_point
 
@@ -0,0 +1,123 @@
+"""
+Lightweight cursus-level sync.
+Refreshes level, grade and blackhole fields of a cursus in bulk from the
+/cursus/:id/cursus_users listing (100 records per page) without any per-user call,
+separately from the full profile sync in update_intraprofile.
+"""
+
+from dateutil.parser import isoparse
+from django.db.models import F, Func, Value
+
+from appcore.services.console import console
+from appcore.services.intra.intra import Intra
+from appcore.services.intra.lanes import Lane
+from appdata.models.intras import CursusUser, IntraProfile
+from apptasks.services.dashboard_aggregates import refresh_dashboard_aggregates
+
+CAMPUS_ID = 33
+# nullable on IntraProfile, kept None when missing like save_user_infos does
+NULLABLE_PROFILE_FIELDS = ["login", "pool_month", "pool_year"]
+STRING_PROFILE_FIELDS = ["email", "first_name", "last_name"]
+PROFILE_FIELDS = NULLABLE_PROFILE_FIELDS + STRING_PROFILE_FIELDS
+CURSUS_USER_FIELDS = [
+    "intra_id",
+    "level",
+    "grade",
+    "begin_at",
+    "end_at",
+    "blackholed_at",
+]
+
+
+def _parse_dt(value: str | None):
+    return isoparse(value) if value else None
+
+
+def save_cursus_users(rows: list[tuple]) -> int:
+    """
+    Upserts CursusUser rows.
+    Args:
+        rows: (profile_id, cursus_user) pairs, cursus_user as returned by intra,
+            either from a cursus_users listing or from a user's cursus_users
+    Returns:
+        int: the number of rows upserted
+    """
+    cursus_users = [
+        CursusUser(
+            profile_id=profile_id,
+            cursus_id=cursus_user["cursus_id"],
+            intra_id=cursus_user.get("id"),
+            level=cursus_user.get("level") or 0,
+            grade=cursus_user.get("grade"),
+            begin_at=_parse_dt(cursus_user.get("begin_at")),
+            end_at=_parse_dt(cursus_user.get("end_at")),
+            blackholed_at=_parse_dt(cursus_user.get("blackholed_at")),
+        )
+        for profile_id, cursus_user in rows
+    ]
+    CursusUser.objects.bulk_create(
+        cursus_users,
+        update_conflicts=True,
+        unique_fields=["profile", "cursus_id"],
+        update_fields=CURSUS_USER_FIELDS + ["updated"],
+    )
+
+    return len(cursus_users)
+
+
+def sync_cursus_users(cursus_id: int = 21) -> int:
+    """
+    Refreshes the cursus fields of every campus cadet in the given cursus.
+    Profiles missing locally are created from the listing's short user.
+    Args:
+        cursus_id: the cursus to refresh, defaults to 21 (42cursus)
+    Returns:
+        int: the number of cursus users refreshed
+    """
+    intra = Intra(lane=Lane.BULK)
+    # same population as the full sync, so every profile created here gets snapshots
+    cursus_users = intra.get_cursus_users_by_cursus_id(
+        cursus_id, filter={"filter[primary_campus_id]": CAMPUS_ID}
+    )
+    # a user listed twice would make the upserts touch a row twice and fail
+    cursus_users = list(
+        {
+            i["user"]["id"]: i for i in cursus_users if not i["user"].get("staff?")
+        }.values()
+    )
+    console.log(f"Cursus users to refresh: {len(cursus_users)}")
+    if not cursus_users:
+        return 0
+
+    IntraProfile.objects.bulk_create(
+        [
+            IntraProfile(
+                intra_id=i["user"]["id"],
+                cursus_ids=[cursus_id],
+                **{field: i["user"].get(field) for field in NULLABLE_PROFILE_FIELDS},
+                **{
+                    field: i["user"].get(field) or "" for field in STRING_PROFILE_FIELDS
+                },
+            )
+            for i in cursus_users
+        ],
+        update_conflicts=True,
+        unique_fields=["intra_id"],
+        update_fields=PROFILE_FIELDS + ["updated"],
+    )
+    intra_ids = [i["user"]["id"] for i in cursus_users]
+    IntraProfile.objects.filter(intra_id__in=intra_ids).exclude(
+        cursus_ids__contains=[cursus_id]
+    ).update(
+        cursus_ids=Func(F("cursus_ids"), Value(cursus_id), function="array_append")
+    )
+    profile_ids = dict(
+        IntraProfile.objects.filter(intra_id__in=intra_ids).values_list(
+            "intra_id", "id"
+        )
+    )
+
+    count = save_cursus_users([(profile_ids[i["user"]["id"]], i) for i in cursus_users])
+    refresh_dashboard_aggregates()
+
+    return count
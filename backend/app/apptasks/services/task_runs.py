@@ -0,0 +1,27 @@
+"""
+Last completed run of the tasks that keep local data fresh.
+"""
+
+from datetime import datetime
+
+from django.utils import timezone
+
+from apptasks.models.runs import TaskRun
+
+
+def record_task_run(name: str, at: datetime | None = None) -> None:
+    """
+    Records that the given task completed a run, at defaults to now
+    """
+    TaskRun.objects.update_or_create(
+        name=name, defaults={"last_run_at": at or timezone.now()}
+    )
+
+
+def last_task_run(name: str) -> datetime | None:
+    """
+    Returns when the given task last completed a run, None if it never did
+    """
+    return (
+        TaskRun.objects.filter(name=name).values_list("last_run_at", flat=True).first()
+    )
@@ -1,9 +1,36 @@
 from datetime import datetime
 
+import httpx
+
 from appcore.services.date_utils import month_range_from_now
 from appcore.services.intra.intra import Intra
+from appcore.services.intra.lanes import Lane
 from appcore.services.console import console
+from appcore.services.response_cache import bump_data_version
+from appcore.services.intra.breaker import CircuitOpenError
 from appdata.models.intras import HistIntraProfileData, IntraProfile
+from apptasks.services.dashboard_aggregates import refresh_dashboard_aggregates
+from apptasks.services.sync_cursus_users import save_cursus_users
+
+# share of the requested users that may be skipped on an open circuit before a sync fails
+MAX_CIRCUIT_SKIPPED_RATIO = 0.1
+
+
+class IncompleteSyncError(Exception):
+    """
+    Raised when too many users of a sync were skipped because an intra circuit was open.
+    """
+
+
+def check_circuit_skipped(skipped: list, total: int) -> None:
+    """
+    Raises:
+        IncompleteSyncError: if more than MAX_CIRCUIT_SKIPPED_RATIO of the users were skipped
+    """
+    if total and len(skipped) / total > MAX_CIRCUIT_SKIPPED_RATIO:
+        raise IncompleteSyncError(
+            f"{len(skipped)} of {total} users skipped, intra circuit open"
+        )
 
 
 def update_intraprofile() -> bool:
@@ -20,7 +47,7 @@ def update_intraprofile() -> bool:
     """
     CURSUS_IDS = [
         9,
-        3, # disabled due to possbly be the cause of 500s
+        3,  # listing may return 500s, skipped while its circuit is open
         21,
         74,
         75,
@@ -30,11 +57,15 @@ def update_intraprofile() -> bool:
         "filter[primary_campus_id]": 33,
     }
 
-    intra = Intra()
+    intra = Intra(lane=Lane.BULK)
     curr_year = datetime.now().year
     logins = []
     for cursus_id in CURSUS_IDS:
-        users = intra.get_users_by_cursus_id(cursus_id, filter=FILTER)
+        try:
+            users = intra.get_users_by_cursus_id(cursus_id, filter=FILTER)
+        except (CircuitOpenError, httpx.HTTPError) as e:
+            console.log(f"Skipping cursus {cursus_id}: {e}")
+            continue
         if cursus_id == 9 or cursus_id == 3:
             for user in users:
                 if user["pool_year"] is None or user["pool_month"] is None:
@@ -47,8 +78,25 @@ def update_intraprofile() -> bool:
             logins += [i["login"] for i in users]
     logins = list(set(logins))
     console.log(f"Logins to fetch: {len(logins)}")
-    user_infos = intra.get_user_infos_thr(logins)
+    user_infos, skipped = intra.get_user_infos_thr(logins)
+    save_user_infos(user_infos)
+    refresh_dashboard_aggregates()
+    check_circuit_skipped(skipped, len(logins))
+
+    return True
+
+
+def save_user_infos(user_infos: list[dict]) -> int:
+    """
+    Upserts the IntraProfile and CursusUser rows of each user and stores a new
+    HistIntraProfileData snapshot
+    Args:
+        user_infos: user data as returned by the intra API /users/{id}
+    Returns:
+        the number of snapshots stored
+    """
     hist_intra_profile_data_s = []
+    cursus_user_rows = []
     for user_info in user_infos:
         intra_profile, _ = IntraProfile.objects.get_or_create(
             intra_id=user_info["id"],
@@ -57,10 +105,16 @@ def update_intraprofile() -> bool:
             intra_profile.login = user_info["login"]
         intra_profile.pool_month = user_info["pool_month"]
         intra_profile.pool_year = user_info["pool_year"]
+        intra_profile.email = user_info.get("email") or ""
+        intra_profile.first_name = user_info.get("first_name") or ""
+        intra_profile.last_name = user_info.get("last_name") or ""
         intra_profile.cursus_ids = [
             cursus["cursus_id"] for cursus in user_info["cursus_users"]
         ]
         intra_profile.save()
+        cursus_user_rows += [
+            (intra_profile.id, cursus_user) for cursus_user in user_info["cursus_users"]
+        ]
         hist_intra_profile_data_s.append(
             HistIntraProfileData(
                 profile=intra_profile,
@@ -70,5 +124,7 @@ def update_intraprofile() -> bool:
     HistIntraProfileData.objects.bulk_create(
         hist_intra_profile_data_s, ignore_conflicts=True
     )
+    save_cursus_users(cursus_user_rows)
+    bump_data_version()
 
-    return True
+    return len(hist_intra_profile_data_s)
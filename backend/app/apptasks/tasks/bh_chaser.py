@@ -1,13 +1,23 @@
 import io
 from celery import shared_task
 import pandas as pd
-from dateutil.parser import parser
 from django.utils import timezone
 from discord_webhook import DiscordEmbed, DiscordWebhook
 
-from appdata.models.intras import HistIntraProfileData
+from appdata.models.intras import CursusUser
 from apptasks.models.configs import DiscordWebhook as DiscordWebhookModel
 
+BH_COLUMNS = [
+    "login",
+    "level",
+    "pool_month",
+    "pool_year",
+    "email",
+    "first_name",
+    "last_name",
+    "blackholed_at",
+]
+
 
 @shared_task
 def bh_chaser() -> bool:
@@ -21,45 +31,28 @@ def bh_chaser() -> bool:
             "Discord webhook: notifications not found, add it in DjangoAdmin"
         )
 
-    filters = {
-        "profile__cursus_ids__contains": [21],
-    }
-    qs = (
-        HistIntraProfileData.objects.filter(**filters)
-        .order_by("profile", "-created")
-        .distinct("profile")
-    )
+    qs = CursusUser.objects.filter(
+        cursus_id=21, blackholed_at__isnull=False
+    ).select_related("profile")
 
     # get users with bh not None
-    bh_data = []
-    for profile in qs:
-        for cursus_user in profile.data["cursus_users"]:
-            if cursus_user["cursus_id"] == 21:
-                blackholed_at = cursus_user["blackholed_at"]
-                level = cursus_user["level"]
-        if blackholed_at is not None:
-            login = profile.data["login"]
-            pool_month = profile.data["pool_month"]
-            pool_year = profile.data["pool_year"]
-            email = profile.data["email"]
-            first_name = profile.data["first_name"]
-            last_name = profile.data["last_name"]
-            bh_data.append(
-                {
-                    "login": login,
-                    "level": level,
-                    "pool_month": pool_month,
-                    "pool_year": pool_year,
-                    "email": email,
-                    "first_name": first_name,
-                    "last_name": last_name,
-                    "blackholed_at": parser().parse(blackholed_at),
-                }
-            )
+    bh_data = [
+        {
+            "login": cursus_user.profile.login,
+            "level": cursus_user.level,
+            "pool_month": cursus_user.profile.pool_month,
+            "pool_year": cursus_user.profile.pool_year,
+            "email": cursus_user.profile.email,
+            "first_name": cursus_user.profile.first_name,
+            "last_name": cursus_user.profile.last_name,
+            "blackholed_at": cursus_user.blackholed_at,
+        }
+        for cursus_user in qs
+    ]
 
-    # filter bh_data
-    df = pd.DataFrame(bh_data).sort_values("blackholed_at")
-    df["bh_in"] = df["blackholed_at"] - timezone.now()
+    # filter bh_data, columns are given so an empty report still has them
+    df = pd.DataFrame(bh_data, columns=BH_COLUMNS).sort_values("blackholed_at")
+    df["bh_in"] = pd.to_datetime(df["blackholed_at"], utc=True) - timezone.now()
     df["bh_in"] = df["bh_in"].dt.days
     df = df[df["bh_in"] >= -1]
     df_14 = df[df["bh_in"] <= 14]
@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from apptasks.services.correction_points import (
+    sync_correction_points as _sync_correction_points,
+)
+
+
+@shared_task
+def sync_correction_points(cursus_id: int = 21) -> int:
+    """
+    Stores the new correction point historics of every cadet of a cursus
+    """
+    return _sync_correction_points(cursus_id=cursus_id)
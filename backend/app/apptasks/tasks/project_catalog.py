@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from apptasks.services.project_catalog import (
+    refresh_project_catalog as _refresh_project_catalog,
+)
+
+
+@shared_task
+def refresh_project_catalog() -> int:
+    """
+    Refreshes the project catalog of the tracked cursus
+    """
+    return _refresh_project_catalog()
@@ -0,0 +1,29 @@
+from celery import shared_task
+from dateutil.parser import isoparse
+
+from apptasks.services.ingest_scale_teams import (
+    backfill_scale_teams as _backfill_scale_teams,
+    ingest_scale_teams as _ingest_scale_teams,
+    prune_scale_teams as _prune_scale_teams,
+)
+
+
+@shared_task
+def ingest_scale_teams() -> int:
+    """
+    Ingests the campus scale teams updated since the last ingestion,
+    and prunes the ones deleted on intra around the current date
+    """
+    count = _ingest_scale_teams()
+    _prune_scale_teams()
+
+    return count
+
+
+@shared_task
+def backfill_scale_teams(start: str) -> int:
+    """
+    Ingests the campus scale teams updated since start, an ISO date ex. 2021-01-01,
+    run once before scheduling ingest_scale_teams
+    """
+    return _backfill_scale_teams(isoparse(start))
@@ -1,15 +1,14 @@
 import logging
-import threading
-from time import sleep
+from datetime import timedelta
 
-import pandas as pd
 from celery import shared_task
+from django.utils.text import slugify
 from pydantic import validate_call
 
-from appcore.services.intra.intra import Intra
-from appcore.services.intra.user import IntraUser
 from appdata.models.intras import IntraProfile
-from apptasks.tasks.utils import human_time, upload2gsheet, upload2gsheet_static
+from apptasks.services.cohort_report import build_cohort_report
+from apptasks.services.report_export import export_report
+from apptasks.tasks.utils import human_time, upload2gsheet, upload2gsheet_diff
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,6 +24,8 @@ def snap_to_gsheet(
     pool_year: int | None = None,
     only_id_after: int | None = None,
     skip_logins: list[str] | None = None,
+    max_staleness_hours: float = 48,
+    export: bool = True,
 ) -> bool:
     """
     Snapshots the data of all cadets in a given cursus to a Google Sheet.
@@ -32,14 +33,17 @@ def snap_to_gsheet(
     - Inactive for
     - Level
     - Correction point
-    - As evaluator
-    - As evaluated
+    - As evaluator, As evaluated (correction points)
+    - Evaluations done, Evaluations received
     - Total tries
     - Project score
     ... and more
+    Built from stored snapshots, correction point historics and evaluations only,
+    cadets without a snapshot within max_staleness_hours are logged and left out,
+    fails with StaleSnapshotError if more than MAX_STALE_RATIO of them are, or if the
+    evaluation or correction point tasks have not run within max_staleness_hours.
+    With export, the report is also written as Parquet/CSV to the file storage.
     """
-    api = Intra()
-
     # Get cadets
     logger.info("Getting cadets...")
     intra_profiles = IntraProfile.objects.filter(
@@ -53,67 +57,18 @@ def snap_to_gsheet(
         intra_profiles = intra_profiles.exclude(login__in=skip_logins)
     if only_id_after:
         intra_profiles = intra_profiles.exclude(intra_id__gte=only_id_after)
-    intra_users = [
-        IntraUser(profile.login, profile.histintraprofiledata_set.last().data)
-        for profile in intra_profiles
-    ]
-
-    # Hydrate pts_gain and pts_lost for each intra user
-    logger.info("Hydrating pts_gain and pts_lost for each intra user...")
-
-    def _hydrate_pts_gain_loss(user):
-        user.calc_eval_pts_gainloss()
-
-    thrs = []
-    for user in intra_users:
-        thr = threading.Thread(target=_hydrate_pts_gain_loss, args=(user,))
-        thrs.append(thr)
-
-    for thr in thrs:
-        thr.start()
-        sleep(0.5)  # prevents rate limit
 
-    for thr in thrs:
-        thr.join()
-
-    # Get project slugs
-    logger.info("Getting project slugs...")
-    projects = api.get_projects_by_cursus(cursus_id)
-    slugs = []
-    for p in projects:
-        slugs.append(p["slug"])
-
-    # prep df payload
-    df_data = []
-    for user in intra_users:
-        d = {
-            "email": user.data["email"],
-            "login": user.data["login"],
-            "id": user.data["id"],
-            "first_name": user.data["first_name"],
-            "last_name": user.data["last_name"],
-            "profile_url": f'https://profile.intra.42.fr/users/{user.data["login"]}',
-            "inactive_for": user.get_days_since_last_active_date_by_project_update(
-                cursus_id=cursus_id
-            ),
-            "level": user.level(cursus_id=cursus_id),
-            "correction_point": user.data["correction_point"],
-            "as_evaluator": user.pts_gain,
-            "as_evaluated": user.pts_lost,
-            "total_tries": user.calc_total_tries(cursus_id=cursus_id),
-        }
-        # project score, completed date
-        for s in slugs:
-            d[s] = user.project_final_mark(cursus_id=cursus_id, project_slug=s)
-            d_project = user.project(cursus_id=cursus_id, project_slug=s)
-            # get project status
-            d[f"{s}_status"] = d_project.get("status", None)
-            d[f"{s}_updated_at"] = d_project.get("updated_at", None)
-        df_data.append(d)
-    df = pd.DataFrame(df_data)
+    # Build the report from snapshots and ingested evaluations, no API call
+    logger.info("Building report...")
+    df = build_cohort_report(
+        intra_profiles,
+        cursus_id=cursus_id,
+        max_staleness=timedelta(hours=max_staleness_hours),
+    )
 
     # upload payload to gsheet
-    upload2gsheet_static(
+    # only changed cells are written to the static sheet
+    upload2gsheet_diff(
         df,
         sheet_name_static,
         oauth=False,
@@ -126,4 +81,12 @@ def snap_to_gsheet(
         oauth=False,
         service_account_file="service_account.json",
     )
+
+    # export payload to storage, a failing export never costs the Sheets upload
+    if export:
+        try:
+            url = export_report(df, slugify(sheet_name_static))
+            logger.info(f"Report exported: {url}")
+        except Exception as e:
+            logger.error(f"Report export failed: {e}")
     return True
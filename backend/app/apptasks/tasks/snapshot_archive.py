@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from apptasks.services.snapshot_archive import (
+    archive_snapshots as _archive_snapshots,
+)
+
+
+@shared_task
+def archive_snapshots() -> int:
+    """
+    Archives yesterday's snapshots as partitioned Parquet, meant to run nightly
+    """
+    return _archive_snapshots()
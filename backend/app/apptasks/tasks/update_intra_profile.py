@@ -1,5 +1,11 @@
 from celery import shared_task
 
+from apptasks.services.refresh_scheduler import (
+    refresh_stale_intraprofiles as _refresh_stale_intraprofiles,
+)
+from apptasks.services.sync_cursus_users import (
+    sync_cursus_users as _sync_cursus_users,
+)
 from apptasks.services.update_intraprofile import (
     update_intraprofile as _update_intraprofile,
 )
@@ -29,3 +35,23 @@ def update_intraprofile() -> bool:
         return False
 
     return True
+
+
+@shared_task
+def refresh_stale_intraprofiles(
+    budget: int = 300, min_staleness_hours: float = 6
+) -> int:
+    """
+    Refreshes the intra profile of the highest-priority cadets within an API budget
+    """
+    return _refresh_stale_intraprofiles(
+        budget=budget, min_staleness_hours=min_staleness_hours
+    )
+
+
+@shared_task
+def sync_cursus_users(cursus_id: int = 21) -> int:
+    """
+    Refreshes level, grade and blackhole fields of a cursus from the cursus_users listing
+    """
+    return _sync_cursus_users(cursus_id=cursus_id)
@@ -4,29 +4,48 @@ NOTE:
 service_account_from_dict
 """
 
+import json
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
 import gspread
 import gspread_dataframe as gd
+from gspread.utils import rowcol_to_a1
 from rich.console import Console
 from datetime import datetime
 
 console = Console()
 
+# previous uploads of upload2gsheet_diff, by spreadsheet id
+GSHEET_CACHE_DIR = Path(tempfile.gettempdir()) / "gsheet_frames"
+# ranges per batch_update request, keeps requests under the Sheets API payload quotas
+GSHEET_BATCH_SIZE = 200
+# changed cells separated by at most this many unchanged cells are written as one range
+GSHEET_MERGE_GAP = 3
+
 
 def human_time() -> str:
 
     return datetime.today().strftime("%Y-%m-%dT%H:%M")
 
 
+@lru_cache
+def gspread_client(oauth=False, service_account_file=None) -> gspread.Client:
+    """
+    Returns a gspread client, authenticated once per process.
+    """
+    if oauth is True:
+        return gspread.oauth()  # use OAuth
+    # user service_account, folder/file must be shared to this service account
+    return gspread.service_account(filename=service_account_file)
+
+
 def upload2gsheet(
     df, sheet_name, worksheet_name, oauth=False, service_account_file=None
 ):
     console.log(f"Uploading to Google Sheet {sheet_name}...")
-    if oauth is False:
-        gc = gspread.service_account(
-            filename=service_account_file
-        )  # user service_account, folder/file must be shared to this service account
-    elif oauth is True:
-        gc = gspread.oauth()  # use OAuth
+    gc = gspread_client(oauth, service_account_file)
     try:
         sheet = gc.open(sheet_name)
     except gspread.SpreadsheetNotFound:
@@ -40,12 +59,7 @@ def upload2gsheet(
 
 def upload2gsheet_static(df, sheet_name, oauth=False, service_account_file=None):
     console.log(f"Uploading to Google Sheet {sheet_name}...")
-    if oauth is False:
-        gc = gspread.service_account(
-            filename=service_account_file
-        )  # user service_account, folder/file must be shared to this service account
-    elif oauth is True:
-        gc = gspread.oauth()  # use OAuth
+    gc = gspread_client(oauth, service_account_file)
     try:
         sheet = gc.open(sheet_name)
     except gspread.SpreadsheetNotFound:
@@ -56,3 +70,134 @@ def upload2gsheet_static(df, sheet_name, oauth=False, service_account_file=None)
     worksheet.update_title(human_time())
     gd.set_with_dataframe(worksheet, df.astype(str))
     console.log("Done!")
+
+
+def frame_to_values(df) -> list[list[str]]:
+    """
+    Returns the header and rows of a DataFrame as sheet values, cast to str.
+    """
+    return [[str(i) for i in df.columns]] + df.astype(str).values.tolist()
+
+
+def _runs(cols: list[int], merge_gap: int) -> list[tuple[int, int]]:
+    """
+    Groups sorted column indexes into (first, last) runs, bridging small gaps.
+    """
+    runs = []
+    for col in cols:
+        if runs and col - runs[-1][1] <= merge_gap + 1:
+            runs[-1] = (runs[-1][0], col)
+        else:
+            runs.append((col, col))
+
+    return runs
+
+
+def diff_ranges(
+    old: list[list[str]] | None,
+    new: list[list[str]],
+    merge_gap: int = GSHEET_MERGE_GAP,
+) -> list[dict]:
+    """
+    Returns the ranges to write for the sheet to go from old to new values.
+    Everything is rewritten when the header changed, rows past the old ones are
+    written as one block, other rows only where cells changed.
+    Args:
+        old: values of the previous upload, header first, None if unknown
+        new: values to upload, header first
+        merge_gap: see GSHEET_MERGE_GAP
+    Returns:
+        list[dict]: batch_update data, [{"range": "A1:C1", "values": [[...]]}]
+    """
+    if not new:
+        return []
+    if not old or old[0] != new[0]:
+        old = []
+    ncols = len(new[0])
+
+    ranges = []
+    for i, row in enumerate(new[: len(old)]):
+        prev = old[i]
+        if prev == row:
+            continue
+        changed = [j for j in range(ncols) if j >= len(prev) or prev[j] != row[j]]
+        for first, last in _runs(changed, merge_gap):
+            ranges.append(
+                {
+                    "range": f"{rowcol_to_a1(i + 1, first + 1)}:{rowcol_to_a1(i + 1, last + 1)}",
+                    "values": [row[first : last + 1]],
+                }
+            )
+    if len(new) > len(old):
+        ranges.append(
+            {
+                "range": f"{rowcol_to_a1(len(old) + 1, 1)}:{rowcol_to_a1(len(new), ncols)}",
+                "values": new[len(old) :],
+            }
+        )
+
+    return ranges
+
+
+def _load_values(path: Path, title: str) -> list[list[str]] | None:
+    """
+    Returns the locally cached values of the previous upload if the sheet still has them.
+    """
+    try:
+        cached = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    # another process uploaded since
+    if cached.get("title") != title:
+        return None
+
+    return cached["values"]
+
+
+def _save_values(path: Path, title: str, values: list[list[str]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"title": title, "values": values}))
+
+
+def upload2gsheet_diff(
+    df,
+    sheet_name,
+    oauth=False,
+    service_account_file=None,
+    batch_size=GSHEET_BATCH_SIZE,
+) -> int:
+    """
+    Uploads a DataFrame to the first worksheet of a sheet, writing only what changed
+    since the previous upload, in chunked batch_update requests.
+    The previous upload is cached locally, the worksheet is read instead when the cache
+    is missing or another process uploaded since.
+    Returns:
+        int: the number of ranges written
+    """
+    console.log(f"Uploading changes to Google Sheet {sheet_name}...")
+    gc = gspread_client(oauth, service_account_file)
+    try:
+        sheet = gc.open(sheet_name)
+    except gspread.SpreadsheetNotFound:
+        sheet = gc.create(sheet_name)
+    worksheet = sheet.get_worksheet(0)
+
+    values = frame_to_values(df)
+    cache_path = GSHEET_CACHE_DIR / f"{sheet.id}.json"
+    old = _load_values(cache_path, worksheet.title)
+    if old is None:
+        old = worksheet.get_all_values()
+
+    nrows, ncols = len(values), len(values[0])
+    if (worksheet.row_count, worksheet.col_count) != (nrows, ncols):
+        worksheet.resize(rows=nrows, cols=ncols)
+    ranges = diff_ranges(old, values)
+    for i in range(0, len(ranges), batch_size):
+        worksheet.batch_update(ranges[i : i + batch_size])
+
+    title = human_time()
+    worksheet.update_title(title)
+    _save_values(cache_path, title, values)
+    console.log(f"Done! {len(ranges)} ranges written")
+
+    return len(ranges)
@@ -0,0 +1,983 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from appcore.services.intra.intra import Intra
+from appcore.services.intra.records import CadetRecord
+from appcore.services.intra.user import IntraUser
+from appcore.tests.utils import LOCMEM_CACHES
+from appdata.models.dashboards import DashboardAggregate
+from appdata.models.evaluations import CorrectionPointEvent, ScaleTeam
+from appdata.models.projects import Project
+from appdata.models.intras import CursusUser, HistIntraProfileData, IntraProfile
+from appdata.querysets.evaluations import query_evaluation_stats
+from apptasks.services.cohort_metrics import cohort_metrics
+from apptasks.services.cohort_report import StaleSnapshotError, build_cohort_report
+from apptasks.services.dashboard_aggregates import refresh_dashboard_aggregates
+from apptasks.services.correction_points import (
+    correction_point_gainloss,
+    sync_correction_point_events,
+    sync_correction_points,
+)
+from apptasks.services.ingest_scale_teams import (
+    backfill_scale_teams,
+    ingest_scale_teams,
+    prune_scale_teams,
+)
+from apptasks.services.project_catalog import (
+    catalog_slugs,
+    clear_slugs_cache,
+    refresh_project_catalog,
+)
+from apptasks.services.report_export import export_report, read_report
+from apptasks.services.snapshot_archive import (
+    archive_snapshots,
+    flatten_snapshots,
+    load_archive,
+)
+from apptasks.services.refresh_scheduler import (
+    refresh_stale_intraprofiles,
+    score_profile,
+    select_profiles_to_refresh,
+)
+from apptasks.services.sync_cursus_users import sync_cursus_users
+from apptasks.services.task_runs import last_task_run, record_task_run
+from apptasks.services.update_intraprofile import (
+    IncompleteSyncError,
+    save_user_infos,
+    update_intraprofile,
+)
+from apptasks.models.configs import DiscordWebhook as DiscordWebhookModel
+from apptasks.tasks import utils as gsheet_utils
+from apptasks.tasks.bh_chaser import bh_chaser
+from apptasks.tasks.snappy import snap_to_gsheet
+from apptasks.tasks.utils import diff_ranges, upload2gsheet_diff
+
+
+def _snapshot_data(login, last_update=None, blackholed_at=None):
+    return {
+        "login": login,
+        "projects_users": (
+            [{"updated_at": last_update.isoformat()}] if last_update else []
+        ),
+        "cursus_users": [
+            {
+                "cursus_id": 21,
+                "blackholed_at": blackholed_at.isoformat() if blackholed_at else None,
+            }
+        ],
+    }
+
+
+class RefreshSchedulerTest(TestCase):
+    """Test cases for the staleness-driven refresh scheduler."""
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_active_cadet_scores_higher_than_inactive(self):
+        """Test that recent project activity raises the score."""
+        snapshot_at = self.now - timedelta(hours=24)
+        active = _snapshot_data("active", last_update=self.now - timedelta(days=1))
+        inactive = _snapshot_data(
+            "inactive", last_update=self.now - timedelta(days=200)
+        )
+
+        self.assertGreater(
+            score_profile(active, snapshot_at, self.now),
+            score_profile(inactive, snapshot_at, self.now),
+        )
+
+    def test_near_blackhole_scores_higher(self):
+        """Test that an upcoming blackhole raises the score."""
+        snapshot_at = self.now - timedelta(hours=24)
+        last_update = self.now - timedelta(days=10)
+        near = _snapshot_data(
+            "near", last_update, blackholed_at=self.now + timedelta(days=5)
+        )
+        far = _snapshot_data(
+            "far", last_update, blackholed_at=self.now + timedelta(days=300)
+        )
+
+        self.assertGreater(
+            score_profile(near, snapshot_at, self.now),
+            score_profile(far, snapshot_at, self.now),
+        )
+
+    def test_fresh_snapshot_scores_zero(self):
+        """Test that a snapshot taken now has no staleness."""
+        data = _snapshot_data("fresh", last_update=self.now)
+        self.assertEqual(score_profile(data, self.now, self.now), 0)
+
+    def test_select_profiles_respects_budget_and_staleness(self):
+        """Test that selection is ranked, capped and skips fresh snapshots."""
+        for i, days in enumerate([1, 100, 300]):
+            profile = IntraProfile.objects.create(login=f"cadet{i}", intra_id=i)
+            HistIntraProfileData.objects.create(
+                profile=profile,
+                data=_snapshot_data(
+                    profile.login, last_update=self.now - timedelta(days=days)
+                ),
+            )
+        later = self.now + timedelta(hours=12)
+
+        candidates = select_profiles_to_refresh(budget=2, now=later)
+        self.assertEqual([c.login for c in candidates], ["cadet0", "cadet1"])
+
+        self.assertEqual(select_profiles_to_refresh(budget=2, now=self.now), [])
+
+    @patch("apptasks.services.refresh_scheduler.save_user_infos", return_value=0)
+    @patch.object(Intra, "get_user_infos_thr")
+    def test_refresh_fails_when_circuit_skipped_many(self, mock_get, mock_save):
+        """Test that a refresh fails once too many users were skipped on an open circuit."""
+        for i in range(10):
+            profile = IntraProfile.objects.create(login=f"cadet{i}", intra_id=i)
+            q = HistIntraProfileData.objects.create(
+                profile=profile, data=_snapshot_data(profile.login)
+            )
+            HistIntraProfileData.objects.filter(pk=q.pk).update(
+                created=self.now - timedelta(days=1)
+            )
+        mock_get.return_value = ([], ["cadet0"])
+        self.assertEqual(refresh_stale_intraprofiles(), 0)
+
+        mock_get.return_value = ([], ["cadet0", "cadet1"])
+        with self.assertRaises(IncompleteSyncError):
+            refresh_stale_intraprofiles()
+        # what was fetched is saved before failing
+        self.assertEqual(mock_save.call_count, 2)
+
+
+def _cursus_user(intra_id, login, level, blackholed_at=None, staff=False):
+    return {
+        "id": intra_id + 1000,
+        "cursus_id": 21,
+        "level": level,
+        "grade": "Learner",
+        "begin_at": "2024-01-01T00:00:00.000Z",
+        "end_at": None,
+        "blackholed_at": blackholed_at,
+        "user": {
+            "id": intra_id,
+            "login": login,
+            "email": f"{login}@student.42bangkok.com",
+            "first_name": login.title(),
+            "last_name": "Cadet",
+            "pool_month": "july",
+            "pool_year": "2023",
+            "staff?": staff,
+        },
+    }
+
+
+class SyncCursusUsersTest(TestCase):
+    """Test cases for the lightweight cursus_users sync."""
+
+    @patch.object(Intra, "get_cursus_users_by_cursus_id")
+    def test_sync_creates_profiles_and_cursus_users(self, mock_get):
+        """Test that the listing upserts profiles and their cursus fields."""
+        mock_get.return_value = [
+            _cursus_user(1, "alice", 4.2, "2025-01-01T00:00:00.000Z"),
+            _cursus_user(2, "staffer", 0, staff=True),
+        ]
+
+        self.assertEqual(sync_cursus_users(), 1)
+
+        profile = IntraProfile.objects.get(intra_id=1)
+        self.assertEqual(profile.email, "alice@student.42bangkok.com")
+        self.assertEqual(profile.cursus_ids, [21])
+        cursus_user = CursusUser.objects.get(profile=profile, cursus_id=21)
+        self.assertEqual(cursus_user.level, 4.2)
+        self.assertEqual(cursus_user.blackholed_at.year, 2025)
+        self.assertFalse(IntraProfile.objects.filter(intra_id=2).exists())
+
+    @patch.object(Intra, "get_cursus_users_by_cursus_id")
+    def test_sync_updates_existing_rows(self, mock_get):
+        """Test that a second sync updates in place and keeps other cursus ids."""
+        IntraProfile.objects.create(login="alice", intra_id=1, cursus_ids=[9])
+        mock_get.return_value = [_cursus_user(1, "alice", 4.2)]
+        sync_cursus_users()
+        mock_get.return_value = [_cursus_user(1, "alice", 5.5)]
+        sync_cursus_users()
+
+        profile = IntraProfile.objects.get(intra_id=1)
+        self.assertEqual(sorted(profile.cursus_ids), [9, 21])
+        self.assertEqual(CursusUser.objects.count(), 1)
+        self.assertEqual(CursusUser.objects.get().level, 5.5)
+
+    @patch.object(Intra, "get_cursus_users_by_cursus_id")
+    def test_sync_dedupes_and_keeps_null_pool(self, mock_get):
+        """Test that a user listed twice is upserted once, with no pool kept None."""
+        cursus_user = _cursus_user(1, "alice", 4.2)
+        cursus_user["user"].update(pool_month=None, pool_year=None)
+        mock_get.return_value = [cursus_user, _cursus_user(1, "alice", 4.5)]
+        mock_get.return_value[1]["user"].update(pool_month=None, pool_year=None)
+
+        self.assertEqual(sync_cursus_users(), 1)
+        profile = IntraProfile.objects.get(intra_id=1)
+        self.assertIsNone(profile.pool_month)
+        self.assertIsNone(profile.pool_year)
+        self.assertEqual(CursusUser.objects.get().level, 4.5)
+        self.assertEqual(
+            mock_get.call_args.kwargs["filter"], {"filter[primary_campus_id]": 33}
+        )
+
+
+def _correction_point_hist(intra_id, reason, sum, total):
+    return {
+        "id": intra_id,
+        "reason": reason,
+        "sum": sum,
+        "total": total,
+        "scale_team_id": None,
+        "created_at": "2024-01-01T00:00:00.000Z",
+    }
+
+
+class CorrectionPointStoreTest(TestCase):
+    """Test cases for the incremental correction point history store."""
+
+    def setUp(self):
+        self.profile = IntraProfile.objects.create(login="alice", intra_id=1)
+
+    def _user(self, correction_point):
+        return IntraUser("alice", {"id": 1, "correction_point": correction_point})
+
+    @patch.object(IntraUser, "get_last_correction_point_hist_id")
+    @patch.object(IntraUser, "get_correction_point_hist")
+    def test_sync_fetches_only_new_events(self, mock_get, mock_last_id):
+        """Test that a second sync asks only for entries after the last stored id."""
+        mock_last_id.return_value = 2
+        mock_get.return_value = [
+            _correction_point_hist(2, IntraUser.DEFENSE_REASON, -1, 4),
+            _correction_point_hist(1, IntraUser.EARNING_REASON, 1, 5),
+        ]
+        self.assertEqual(sync_correction_point_events(self._user(4), self.profile), 2)
+        self.assertIsNone(mock_get.call_args.kwargs["after_id"])
+
+        mock_last_id.return_value = 3
+        mock_get.return_value = [
+            _correction_point_hist(3, IntraUser.EARNING_REASON, 1, 5)
+        ]
+        self.assertEqual(sync_correction_point_events(self._user(5), self.profile), 1)
+        self.assertEqual(mock_get.call_args.kwargs["after_id"], 2)
+        self.assertEqual(CorrectionPointEvent.objects.count(), 3)
+
+    @patch.object(IntraUser, "get_last_correction_point_hist_id")
+    @patch.object(IntraUser, "get_correction_point_hist")
+    def test_sync_skips_when_newest_is_stored(self, mock_get, mock_last_id):
+        """Test that only the probe is sent when the newest event is stored."""
+        mock_last_id.return_value = 1
+        mock_get.return_value = [
+            _correction_point_hist(1, IntraUser.EARNING_REASON, 1, 5)
+        ]
+        sync_correction_point_events(self._user(5), self.profile)
+        mock_get.reset_mock()
+
+        # the total moved with a pool donation, not an evaluation
+        self.assertEqual(sync_correction_point_events(self._user(2), self.profile), 0)
+        mock_get.assert_not_called()
+
+    @patch.object(IntraUser, "get_last_correction_point_hist_id", return_value=4)
+    @patch.object(IntraUser, "get_correction_point_hist")
+    def test_sync_fetches_on_unchanged_total(self, mock_get, _):
+        """Test that new evaluation events are fetched even if the total is the same."""
+        mock_get.return_value = [
+            _correction_point_hist(1, IntraUser.EARNING_REASON, 1, 5)
+        ]
+        sync_correction_point_events(self._user(5), self.profile)
+        mock_get.return_value = [
+            _correction_point_hist(4, IntraUser.DEFENSE_REASON, -1, 5)
+        ]
+
+        self.assertEqual(sync_correction_point_events(self._user(5), self.profile), 1)
+
+    @patch.object(IntraUser, "get_last_correction_point_hist_id", return_value=1)
+    @patch.object(IntraUser, "get_correction_point_hist")
+    def test_sync_cursus(self, mock_get, _):
+        """Test that the cadets of the cursus are synced, failures skipped."""
+        self.profile.cursus_ids = [21]
+        self.profile.save()
+        IntraProfile.objects.create(login="bob", intra_id=2, cursus_ids=[21])
+        IntraProfile.objects.create(login="pisciner", intra_id=3, cursus_ids=[9])
+        mock_get.side_effect = [
+            [_correction_point_hist(1, IntraUser.EARNING_REASON, 1, 5)],
+            Exception("Failed"),
+        ]
+
+        self.assertEqual(sync_correction_points(), 1)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertIsNotNone(last_task_run("sync_correction_points"))
+
+    def test_gainloss_aggregate(self):
+        """Test that gain and loss are summed per profile from stored events."""
+        for intra_id, reason, sum in [
+            (1, IntraUser.EARNING_REASON, 1),
+            (2, IntraUser.EARNING_REASON, 1),
+            (3, IntraUser.DEFENSE_REASON, -1),
+            (4, "Provided points to the pool.", -3),
+        ]:
+            CorrectionPointEvent.objects.create(
+                profile=self.profile,
+                intra_id=intra_id,
+                reason=reason,
+                sum=sum,
+                occurred_at=timezone.now(),
+            )
+
+        self.assertEqual(
+            correction_point_gainloss([self.profile.id]), {self.profile.id: (2, 1)}
+        )
+
+
+def _scale_team(intra_id, corrector, correcteds, filled=True):
+    return {
+        "id": intra_id,
+        "corrector": corrector,
+        "correcteds": correcteds,
+        "team": {"project_id": 1314},
+        "final_mark": 100 if filled else None,
+        "flag": {"name": "Ok"} if filled else None,
+        "begin_at": "2024-01-01T10:00:00.000Z",
+        "filled_at": "2024-01-01T11:00:00.000Z" if filled else None,
+        "updated_at": "2024-01-01T11:00:00.000Z",
+    }
+
+
+class ScaleTeamIngestionTest(TestCase):
+    """Test cases for the campus-level evaluation ingestion."""
+
+    @patch.object(Intra, "get_scale_teams")
+    def test_ingest_is_incremental(self, mock_get):
+        """Test that a second ingestion only asks for updates since the last one."""
+        mock_get.return_value = [
+            _scale_team(1, {"id": 1, "login": "alice"}, [{"id": 2, "login": "bob"}]),
+            _scale_team(2, "supervisor", [{"id": 1, "login": "alice"}], filled=False),
+        ]
+        self.assertEqual(ingest_scale_teams(), 2)
+        # the first ingestion only reads a recent window, history is backfilled apart
+        since = mock_get.call_args.kwargs["filter"]["range[updated_at]"].split(",")[0]
+        self.assertGreater(
+            datetime.fromisoformat(since), timezone.now() - timedelta(days=2)
+        )
+        self.assertIsNone(ScaleTeam.objects.get(intra_id=2).corrector_id)
+
+        ingest_scale_teams()
+        since = mock_get.call_args.kwargs["filter"]["range[updated_at]"].split(",")[0]
+        self.assertTrue(since.startswith("2024-01-01T10:00:00"))
+        self.assertEqual(ScaleTeam.objects.count(), 2)
+
+    @patch.object(Intra, "get_scale_teams", return_value=[])
+    def test_quiet_ingestion_records_its_run(self, _):
+        """Test that an ingestion finding nothing new still records its run."""
+        ingest_scale_teams()
+
+        self.assertIsNotNone(last_task_run("ingest_scale_teams"))
+
+    @patch.object(Intra, "get_scale_teams", return_value=[])
+    def test_backfill_in_windows(self, mock_get):
+        """Test that the history is read one window at a time."""
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        backfill_scale_teams(start, until=start + timedelta(days=70))
+
+        ranges = [
+            i.kwargs["filter"]["range[updated_at]"] for i in mock_get.call_args_list
+        ]
+        self.assertEqual(len(ranges), 3)
+        self.assertTrue(ranges[0].startswith("2024-01-01T00:00:00"))
+        self.assertTrue(ranges[-1].endswith("2024-03-11T00:00:00+00:00"))
+
+    @patch.object(Intra, "get_scale_teams")
+    def test_prune_deleted(self, mock_get):
+        """Test that scale teams no longer listed around now are deleted."""
+        now = timezone.now()
+        for intra_id, begin_at in [(1, now), (2, now), (3, now - timedelta(days=60))]:
+            ScaleTeam.objects.create(
+                intra_id=intra_id, begin_at=begin_at, intra_updated_at=now
+            )
+        mock_get.return_value = [_scale_team(1, {"id": 1}, [{"id": 2}])]
+
+        self.assertEqual(prune_scale_teams(), 1)
+        self.assertEqual(
+            sorted(ScaleTeam.objects.values_list("intra_id", flat=True)), [1, 3]
+        )
+        self.assertIn("range[begin_at]", mock_get.call_args.kwargs["filter"])
+
+    @patch.object(Intra, "get_scale_teams")
+    def test_evaluation_stats(self, mock_get):
+        """Test that filled evaluations are counted per profile in one query."""
+        alice = IntraProfile.objects.create(login="alice", intra_id=1)
+        IntraProfile.objects.create(login="bob", intra_id=2)
+        mock_get.return_value = [
+            _scale_team(1, {"id": 1}, [{"id": 2}]),
+            _scale_team(2, {"id": 1}, [{"id": 2}], filled=False),
+            _scale_team(3, {"id": 2}, [{"id": 1}, {"id": 3}]),
+        ]
+        ingest_scale_teams()
+
+        with self.assertNumQueries(1):
+            stats = {
+                i.login: (i.evaluations_done, i.evaluations_received)
+                for i in query_evaluation_stats(IntraProfile.objects.all())
+            }
+        self.assertEqual(stats, {"alice": (1, 1), "bob": (1, 1)})
+        self.assertEqual(
+            query_evaluation_stats(
+                IntraProfile.objects.filter(id=alice.id),
+                since=timezone.now(),
+            )
+            .get()
+            .evaluations_received,
+            0,
+        )
+
+
+def _cadet_record(intra_id, login, level=None, projects=()):
+    return CadetRecord.from_api(
+        {
+            "id": intra_id,
+            "login": login,
+            "correction_point": 3,
+            "cursus_users": (
+                [{"cursus_id": 21, "level": level}] if level is not None else []
+            ),
+            "projects_users": [
+                {
+                    "cursus_ids": [21],
+                    "project": {"slug": slug},
+                    "final_mark": mark,
+                    "status": "finished",
+                    "occurrence": occurrence,
+                    "updated_at": updated_at,
+                }
+                for slug, mark, occurrence, updated_at in projects
+            ],
+        }
+    )
+
+
+class CohortMetricsTest(TestCase):
+    """Test cases for the vectorized cohort metrics."""
+
+    def test_cohort_metrics(self):
+        """Test that every column is computed for the whole cohort."""
+        records = [
+            _cadet_record(
+                1,
+                "alice",
+                level=4.2,
+                projects=[
+                    ("libft", 100, 0, "2024-01-01T00:00:00Z"),
+                    ("get_next_line", 80, 2, "2024-01-06T00:00:00Z"),
+                ],
+            ),
+            _cadet_record(2, "bob"),
+        ]
+        now = datetime(2024, 1, 11, tzinfo=dt_timezone.utc)
+
+        df = cohort_metrics(
+            records, cursus_id=21, slugs=["libft", "ft_printf"], now=now
+        )
+
+        alice, bob = df.loc[1], df.loc[2]
+        self.assertEqual(alice["inactive_for"], 5)
+        self.assertEqual(alice["level"], 4.2)
+        self.assertEqual(alice["total_tries"], 4)
+        self.assertEqual(alice["libft"], 100)
+        self.assertEqual(alice["libft_status"], "finished")
+        self.assertIsNone(alice["ft_printf_status"])
+        self.assertEqual(
+            alice["profile_url"], "https://profile.intra.42.fr/users/alice"
+        )
+        self.assertEqual(bob["level"], 0)
+        self.assertEqual(bob["total_tries"], 0)
+        self.assertGreater(bob["inactive_for"], 19000)
+        self.assertIsNone(bob["libft_updated_at"])
+        self.assertNotIn("get_next_line", df.columns)
+
+
+class CohortReportTest(TestCase):
+    """Test cases for the snapshot-only cohort report."""
+
+    def setUp(self):
+        clear_slugs_cache()
+        self.alice = IntraProfile.objects.create(login="alice", intra_id=1)
+        HistIntraProfileData.objects.create(
+            profile=self.alice,
+            data={
+                "id": 1,
+                "login": "alice",
+                "correction_point": 3,
+                "cursus_users": [{"cursus_id": 21, "level": 4.2}],
+                "projects_users": [
+                    {
+                        "cursus_ids": [21],
+                        "project": {"slug": "libft"},
+                        "final_mark": 100,
+                        "status": "finished",
+                        "occurrence": 0,
+                        "updated_at": "2024-01-01T00:00:00Z",
+                    }
+                ],
+            },
+        )
+        ScaleTeam.objects.create(
+            intra_id=1,
+            corrector_id=1,
+            corrected_ids=[2],
+            filled_at=timezone.now(),
+            intra_updated_at=timezone.now(),
+        )
+        for intra_id, reason, sum in [
+            (1, IntraUser.EARNING_REASON, 1),
+            (2, IntraUser.EARNING_REASON, 1),
+            (3, IntraUser.DEFENSE_REASON, -1),
+        ]:
+            CorrectionPointEvent.objects.create(
+                profile=self.alice,
+                intra_id=intra_id,
+                reason=reason,
+                sum=sum,
+                occurred_at=timezone.now(),
+            )
+        record_task_run("ingest_scale_teams")
+        record_task_run("sync_correction_points")
+
+    def test_build_from_local_data(self):
+        """Test that the report is built from snapshots and evaluations."""
+        df = build_cohort_report(IntraProfile.objects.all(), cursus_id=21)
+
+        self.assertEqual(len(df), 1)
+        row = df.iloc[0]
+        self.assertEqual(row["login"], "alice")
+        self.assertEqual(row["libft"], 100)
+        self.assertEqual(row["as_evaluator"], 2)
+        self.assertEqual(row["as_evaluated"], 1)
+        self.assertEqual(row["evaluations_done"], 1)
+        self.assertEqual(row["evaluations_received"], 0)
+        self.assertEqual(list(df.columns)[-1], "snapshot_at")
+
+    def test_slugs_from_catalog(self):
+        """Test that catalog projects are reported even if no cadet has them."""
+        Project.objects.create(intra_id=1, slug="libft", name="Libft", cursus_ids=[21])
+        Project.objects.create(
+            intra_id=2, slug="ft_printf", name="ft_printf", cursus_ids=[21]
+        )
+
+        df = build_cohort_report(IntraProfile.objects.all(), cursus_id=21)
+
+        self.assertIn("ft_printf_status", df.columns)
+
+    def test_stale_snapshots_raise(self):
+        """Test that a report over stale snapshots is refused."""
+        HistIntraProfileData.objects.update(created=timezone.now() - timedelta(days=3))
+
+        with self.assertRaises(StaleSnapshotError):
+            build_cohort_report(IntraProfile.objects.all(), cursus_id=21)
+
+    @patch("apptasks.services.cohort_report.MAX_STALE_RATIO", 0.5)
+    def test_stale_cadets_are_left_out(self):
+        """Test that cadets without a fresh snapshot are left out of the report."""
+        bob = IntraProfile.objects.create(login="bob", intra_id=2)
+        HistIntraProfileData.objects.create(profile=bob, data={"id": 2, "login": "bob"})
+        HistIntraProfileData.objects.filter(profile=self.alice).update(
+            created=timezone.now() - timedelta(days=3)
+        )
+        IntraProfile.objects.create(login="carol", intra_id=3)
+
+        with self.assertRaises(StaleSnapshotError):
+            build_cohort_report(IntraProfile.objects.all(), cursus_id=21)
+        df = build_cohort_report(IntraProfile.objects.exclude(login="carol"), 21)
+        self.assertEqual(list(df["login"]), ["bob"])
+
+    def test_quiet_evaluations_are_fresh(self):
+        """Test that evaluations unchanged since long are fine if ingestion ran."""
+        ScaleTeam.objects.update(updated=timezone.now() - timedelta(days=3))
+
+        self.assertEqual(
+            len(build_cohort_report(IntraProfile.objects.all(), cursus_id=21)), 1
+        )
+
+    def test_stale_task_runs_raise(self):
+        """Test that a report is refused if a data task has not run lately."""
+        for name in ["ingest_scale_teams", "sync_correction_points"]:
+            with self.subTest(name=name):
+                record_task_run(name, at=timezone.now() - timedelta(days=3))
+
+                with self.assertRaises(StaleSnapshotError):
+                    build_cohort_report(IntraProfile.objects.all(), cursus_id=21)
+                record_task_run(name)
+
+
+class ProjectCatalogTest(TestCase):
+    """Test cases for the persisted project catalog."""
+
+    def setUp(self):
+        clear_slugs_cache()
+
+    @patch.object(Intra, "get_projects_by_cursus")
+    def test_refresh_merges_cursus(self, mock_get):
+        """Test that a project listed in several cursus is stored once."""
+        libft = {"id": 1, "slug": "libft", "name": "Libft", "exam": False}
+        exam = {
+            "id": 2,
+            "slug": "exam-rank-02",
+            "name": "Exam Rank 02",
+            "exam": True,
+            "project_sessions": [{"solo": True}],
+        }
+        mock_get.side_effect = lambda cursus_id: (
+            [libft, exam] if cursus_id == 21 else [libft]
+        )
+
+        self.assertEqual(refresh_project_catalog(cursus_ids=[21, 9]), 2)
+        self.assertEqual(Project.objects.get(slug="libft").cursus_ids, [9, 21])
+        project = Project.objects.get(slug="exam-rank-02")
+        self.assertTrue(project.exam and project.solo)
+        self.assertEqual(catalog_slugs(21), ["libft", "exam-rank-02"])
+        self.assertEqual(catalog_slugs(9), ["libft"])
+
+    @patch.object(Intra, "get_projects_by_cursus")
+    def test_refresh_drops_unlisted_cursus(self, mock_get):
+        """Test that a project is removed from the cursus that no longer list it."""
+        Project.objects.create(
+            intra_id=1, slug="libft", name="Libft", cursus_ids=[9, 21]
+        )
+        Project.objects.create(
+            intra_id=2, slug="old-shell", name="Old Shell", cursus_ids=[3, 21]
+        )
+        mock_get.side_effect = lambda cursus_id: (
+            [{"id": 1, "slug": "libft", "name": "Libft"}] if cursus_id == 21 else []
+        )
+
+        refresh_project_catalog(cursus_ids=[21, 9])
+        self.assertEqual(Project.objects.get(intra_id=1).cursus_ids, [21])
+        self.assertEqual(Project.objects.get(intra_id=2).cursus_ids, [3])
+        self.assertEqual(catalog_slugs(21), ["libft"])
+
+    def test_slugs_are_cached(self):
+        """Test that catalog slugs are served from the in-process cache."""
+        Project.objects.create(intra_id=1, slug="libft", name="Libft", cursus_ids=[21])
+        catalog_slugs(21)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(catalog_slugs(21), ["libft"])
+
+
+class GsheetDiffTest(TestCase):
+    """Test cases for the diff-based Google Sheets upload."""
+
+    def test_diff_ranges(self):
+        """Test that only changed cells and new rows are written."""
+        old = [["a", "b", "c", "d", "e", "f"], list("123456"), list("123456")]
+        new = [
+            ["a", "b", "c", "d", "e", "f"],
+            list("1x3456"),
+            list("y2345z"),
+            list("789012"),
+        ]
+
+        self.assertEqual(
+            diff_ranges(old, new, merge_gap=3),
+            [
+                {"range": "B2:B2", "values": [["x"]]},
+                {"range": "A3:A3", "values": [["y"]]},
+                {"range": "F3:F3", "values": [["z"]]},
+                {"range": "A4:F4", "values": [list("789012")]},
+            ],
+        )
+        self.assertEqual(diff_ranges(old, old), [])
+
+    def test_diff_ranges_merges_close_cells(self):
+        """Test that changes separated by a small gap are written as one range."""
+        old = [["a", "b", "c", "d"], list("1234")]
+        new = [["a", "b", "c", "d"], list("x23y")]
+
+        self.assertEqual(
+            diff_ranges(old, new, merge_gap=2),
+            [{"range": "A2:D2", "values": [list("x23y")]}],
+        )
+
+    def test_diff_ranges_rewrites_on_header_change(self):
+        """Test that a changed header rewrites the whole sheet in one range."""
+        new = [["a", "c"], ["1", "2"]]
+
+        self.assertEqual(
+            diff_ranges([["a", "b"], ["1", "2"]], new),
+            [{"range": "A1:B2", "values": new}],
+        )
+
+    @patch.object(gsheet_utils, "gspread_client")
+    def test_upload_uses_local_cache(self, mock_client):
+        """Test that a second upload diffs against the cached frame in chunks."""
+        worksheet = MagicMock(row_count=3, col_count=2)
+        worksheet.get_all_values.return_value = []
+        worksheet.update_title.side_effect = lambda t: setattr(worksheet, "title", t)
+        sheet = mock_client.return_value.open.return_value
+        sheet.id = "sheet-id"
+        sheet.get_worksheet.return_value = worksheet
+        df = pd.DataFrame({"login": ["alice", "bob"], "level": [1, 2]})
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(
+            gsheet_utils, "GSHEET_CACHE_DIR", Path(tmp)
+        ):
+            self.assertEqual(upload2gsheet_diff(df, "sheet"), 1)
+            df.loc[0, "level"] = 3
+            df.loc[1, "level"] = 4
+            self.assertEqual(upload2gsheet_diff(df, "sheet", batch_size=1), 2)
+
+        worksheet.get_all_values.assert_called_once()
+        self.assertEqual(worksheet.batch_update.call_count, 3)
+
+
+class ReportExportTest(TestCase):
+    """Test cases for the columnar report export."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.settings_override = override_settings(
+            DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+            MEDIA_ROOT=tmp.name,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.df = pd.DataFrame({"login": ["alice", "bob"], "level": [4.2, 0.0]})
+
+    def test_export_csv_with_manifest(self):
+        """Test that a report is written under a dated prefix and read back."""
+        at = datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)
+
+        url = export_report(self.df, "cursus-21", formats=("csv",), at=at)
+
+        self.assertTrue(
+            url.endswith("reports/cursus-21/2024/01/02/030405/manifest.json")
+        )
+        pd.testing.assert_frame_equal(read_report("cursus-21"), self.df)
+
+    def test_export_parquet(self):
+        """Test that Parquet is preferred when reading back."""
+        export_report(self.df, "cursus-21")
+
+        pd.testing.assert_frame_equal(read_report("cursus-21"), self.df)
+
+
+class SnapshotArchiveTest(TestCase):
+    """Test cases for the columnar snapshot archive."""
+
+    def setUp(self):
+        snapshot_at = datetime(2024, 1, 2, tzinfo=dt_timezone.utc)
+        self.records = [
+            CadetRecord.from_api(
+                {
+                    "id": intra_id,
+                    "login": login,
+                    "cursus_users": (
+                        [{"cursus_id": 21, "level": level}] if level else []
+                    ),
+                },
+                snapshot_at=snapshot_at + timedelta(hours=i),
+            )
+            for i, (intra_id, login, level) in enumerate(
+                [(1, "alice", 4.2), (1, "alice", 4.5), (2, "bob", None)]
+            )
+        ]
+
+    def test_flatten_tags_rows_by_snapshot(self):
+        """Test that rows of several snapshots of a cadet keep their own snapshot_at."""
+        frames = flatten_snapshots(self.records)
+
+        self.assertEqual(len(frames["profiles"]), 3)
+        cursus_users = frames["cursus_users"]
+        self.assertEqual(list(cursus_users["level"]), [4.2, 4.5])
+        self.assertEqual(
+            list(cursus_users["snapshot_at"].dt.hour),
+            [0, 1],
+        )
+
+    def test_archive_and_load(self):
+        """Test that a day is archived and loaded back with a column subset."""
+        profile = IntraProfile.objects.create(login="alice", intra_id=1)
+        HistIntraProfileData.objects.create(
+            profile=profile,
+            data={
+                "id": 1,
+                "login": "alice",
+                "cursus_users": [{"cursus_id": 21, "level": 4.2}],
+            },
+        )
+        today = timezone.localdate()
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+            MEDIA_ROOT=tmp,
+        ):
+            self.assertEqual(archive_snapshots(day=today), 1)
+            df = load_archive(
+                "cursus_users",
+                today,
+                today,
+                columns=["level"],
+                filters={"cursus_id": 21},
+            )
+
+        self.assertEqual(list(df.columns), ["level", "snapshot_date"])
+        self.assertEqual(list(df["level"]), [4.2])
+
+
+class DashboardAggregatesTest(TestCase):
+    """Test cases for the precomputed dashboard aggregates."""
+
+    def setUp(self):
+        now = timezone.now()
+        for intra_id, cursus_ids, level, bh_in, pool in [
+            (1, [9, 21], 4.2, 3, ("2023", "july")),
+            (2, [21], 4.9, 20, ("2023", "july")),
+            (3, [21], 12.0, 40, ("2024", "february")),
+            (4, [21], 1.5, -5, ("2023", "july")),
+            (5, [9], None, None, ("2024", "february")),
+            (6, [], None, None, (None, None)),
+        ]:
+            profile = IntraProfile.objects.create(
+                login=f"cadet{intra_id}",
+                intra_id=intra_id,
+                cursus_ids=cursus_ids,
+                pool_year=pool[0],
+                pool_month=pool[1],
+            )
+            if level is not None:
+                CursusUser.objects.create(
+                    profile=profile,
+                    cursus_id=21,
+                    level=level,
+                    blackholed_at=now + timedelta(days=bh_in, hours=1),
+                )
+
+    def _aggregates(self):
+        ret = {}
+        for i in DashboardAggregate.objects.all():
+            ret.setdefault(i.metric, {})[i.key] = i.count
+        return ret
+
+    def test_refresh(self):
+        """Test that every metric is counted and stored in display order."""
+        self.assertEqual(refresh_dashboard_aggregates(), 11)
+
+        aggregates = self._aggregates()
+        self.assertEqual(
+            aggregates["enrollment"], {"cadet": 4, "no-cursus": 1, "pisciner": 1}
+        )
+        self.assertEqual(
+            aggregates["blackhole"],
+            {"in 14 days": 1, "in 14-30 days": 1, "in 45 days": 3},
+        )
+        self.assertEqual(
+            list(aggregates["level"].items()), [("1", 1), ("4", 2), ("12", 1)]
+        )
+        self.assertEqual(
+            list(aggregates["pool"].items()),
+            [("2023 july", 3), ("2024 february", 2)],
+        )
+
+    def test_refresh_replaces(self):
+        """Test that a refresh drops buckets that no longer exist."""
+        refresh_dashboard_aggregates()
+        CursusUser.objects.filter(level=12.0).delete()
+        refresh_dashboard_aggregates()
+
+        self.assertNotIn("12", self._aggregates()["level"])
+
+    @patch.object(Intra, "get_cursus_users_by_cursus_id")
+    def test_refreshed_after_sync(self, mock_get):
+        """Test that the cursus sync refreshes the aggregates."""
+        mock_get.return_value = [_cursus_user(7, "alice", 7.5)]
+        sync_cursus_users()
+
+        self.assertEqual(self._aggregates()["level"]["7"], 1)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    @patch.object(Intra, "get_user_infos_thr")
+    @patch.object(Intra, "get_users_by_cursus_id", return_value=[])
+    def test_refreshed_once_after_full_sync(self, mock_users, mock_infos):
+        """Test that the full sync refreshes the aggregates once, not per batch."""
+        cursus_user = _cursus_user(7, "alice", 7.5)
+        mock_infos.return_value = (
+            [{**cursus_user["user"], "cursus_users": [cursus_user]}],
+            [],
+        )
+        with patch(
+            "apptasks.services.update_intraprofile.refresh_dashboard_aggregates",
+            wraps=refresh_dashboard_aggregates,
+        ) as mock_refresh:
+            save_user_infos(mock_infos.return_value[0])
+            mock_refresh.assert_not_called()
+            update_intraprofile()
+
+        mock_refresh.assert_called_once()
+        self.assertEqual(self._aggregates()["level"]["7"], 1)
+
+
+class BhChaserTest(TestCase):
+    """Test cases for the blackhole Discord report."""
+
+    def setUp(self):
+        DiscordWebhookModel.objects.create(
+            name="notifications", url="https://discord.com/api/webhooks/1/t"
+        )
+
+    def _fields(self, mock_webhook):
+        embed = mock_webhook.return_value.add_embed.call_args.args[0]
+        return {i["name"]: i["value"] for i in embed.fields}
+
+    @patch("apptasks.tasks.bh_chaser.DiscordWebhook")
+    def test_zero_report_without_cursus_users(self, mock_webhook):
+        """Test that an empty CursusUser table sends a zero report."""
+        mock_webhook.return_value.execute.return_value.status_code = 200
+
+        self.assertTrue(bh_chaser())
+        self.assertEqual(
+            self._fields(mock_webhook),
+            {"in 14 days": "0", "in 14-30 days": "0", "in 45 days": "0"},
+        )
+
+    @patch("apptasks.tasks.bh_chaser.DiscordWebhook")
+    def test_report_counts(self, mock_webhook):
+        """Test that upcoming blackholes are counted per bucket."""
+        mock_webhook.return_value.execute.return_value.status_code = 200
+        profile = IntraProfile.objects.create(login="alice", intra_id=1)
+        CursusUser.objects.create(
+            profile=profile,
+            cursus_id=21,
+            blackholed_at=timezone.now() + timedelta(days=3, hours=1),
+        )
+        bh_chaser()
+
+        self.assertEqual(
+            self._fields(mock_webhook),
+            {"in 14 days": "1", "in 14-30 days": "0", "in 45 days": "1"},
+        )
+
+
+class SnapToGsheetTest(TestCase):
+    """Test cases for the cohort report upload."""
+
+    @patch("apptasks.tasks.snappy.upload2gsheet")
+    @patch("apptasks.tasks.snappy.upload2gsheet_diff")
+    @patch("apptasks.tasks.snappy.export_report", side_effect=OSError("bucket down"))
+    @patch("apptasks.tasks.snappy.build_cohort_report")
+    def test_export_failure_keeps_upload(
+        self, mock_build, mock_export, mock_diff, mock_upload
+    ):
+        """Test that a failing storage export does not abort the Sheets upload."""
+        mock_build.return_value = pd.DataFrame({"login": ["alice"]})
+
+        self.assertTrue(snap_to_gsheet(21, "Cursus 21", "Cursus 21 history"))
+        mock_diff.assert_called_once()
+        mock_upload.assert_called_once()
+        mock_export.assert_called_once()
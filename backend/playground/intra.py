@@ -1,23 +1,21 @@
 # flake8: noqa
 """
-Dumps all project slugs to a file
+Dumps all project slugs of a cursus to a file, from the project catalog
 """
 import json
 import os
 
 import django
-from appcore.services.utils import slugify
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 django.setup()
 ####
-from appcore.services.intra.intra import Intra as Api
+from apptasks.services.project_catalog import catalog_slugs, refresh_project_catalog
 
 
-api = Api()
-projects = api.get_projects_by_cursus(69)
-slugs = []
-for p in projects:
-    slugs.append(p["slug"])
+slugs = catalog_slugs(69)
+if not slugs:
+    refresh_project_catalog()
+    slugs = catalog_slugs(69)
 with open("slugs.txt", "w") as f:
     json.dump(slugs, f)
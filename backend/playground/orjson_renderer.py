@@ -0,0 +1,94 @@
+# flake8: noqa
+"""
+Micro-benchmark of the default JSON renderer against the orjson renderer
+on a page of GetLastestCadetMetaOut, like /data/cadetmeta/latest/ returns
+"""
+
+import os
+import timeit
+import uuid
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+django.setup()
+####
+from django.utils import timezone
+from ninja.renderers import JSONRenderer
+
+from appcore.services.renderers import ORJSONRenderer
+from appdata.models.intras import HistIntraProfileData
+from appdata.serializers.cadetmeta import GetLastestCadetMetaOut
+
+PAGE_SIZE = 100
+ROUNDS = 200
+
+
+def fake_user(i: int) -> dict:
+    """Roughly the shape and size of an intra /users/:id payload"""
+    return {
+        "id": i,
+        "login": f"cadet{i}",
+        "email": f"cadet{i}@student.42bangkok.com",
+        "first_name": "First",
+        "last_name": "Last",
+        "correction_point": 5,
+        "pool_month": "july",
+        "pool_year": "2024",
+        "image": {"link": f"https://cdn.intra.42.fr/users/{i}.jpg", "versions": {}},
+        "cursus_users": [
+            {
+                "cursus_id": cursus_id,
+                "level": 4.2,
+                "grade": "Learner",
+                "blackholed_at": "2025-01-01T00:00:00.000Z",
+                "cursus": {"id": cursus_id, "slug": "42cursus", "name": "42cursus"},
+                "skills": [
+                    {"id": s, "name": f"skill{s}", "level": 1.5} for s in range(8)
+                ],
+            }
+            for cursus_id in (9, 21)
+        ],
+        "projects_users": [
+            {
+                "id": i * 100 + p,
+                "occurrence": 0,
+                "final_mark": 100,
+                "status": "finished",
+                "validated?": True,
+                "cursus_ids": [21],
+                "updated_at": "2024-08-01T00:00:00.000Z",
+                "project": {"id": p, "name": f"project{p}", "slug": f"project-{p}"},
+            }
+            for p in range(40)
+        ],
+        "achievements": [{"id": a, "name": f"achievement{a}"} for a in range(20)],
+    }
+
+
+now = timezone.now()
+page = {
+    "count": PAGE_SIZE,
+    "total_page": 1,
+    "items": [
+        GetLastestCadetMetaOut.from_orm(
+            HistIntraProfileData(
+                id=uuid.uuid4(),
+                profile_id=uuid.uuid4(),
+                created=now,
+                updated=now,
+                data=fake_user(i),
+            )
+        ).model_dump()
+        for i in range(PAGE_SIZE)
+    ],
+}
+
+for renderer in (JSONRenderer(), ORJSONRenderer()):
+    seconds = timeit.timeit(
+        lambda: renderer.render(None, page, response_status=200), number=ROUNDS
+    )
+    size = len(renderer.render(None, page, response_status=200))
+    print(
+        f"{type(renderer).__name__:16} {seconds / ROUNDS * 1000:7.2f} ms/page  {size} bytes"
+    )